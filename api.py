@@ -6,11 +6,15 @@ import uuid
 import aiohttp
 from bson import ObjectId
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 import config
 from utils.zapi import Zapi
 from src.database.mongo import mongo
+from src.database.resilience import DatabaseError
 from src.api.firebase import initialize_firebase, send_to_firebase
+from src.helpers.metrics import registry
+from src.helpers.thumbnails import schedule_thumbnails
 
 zapi_credentials = config.ZAPI_CREDENTIALS["Stênio"]["primary"]
 
@@ -21,10 +25,22 @@ zapi_client_token = config.ZAPI_CLIENT_TOKEN
 
 app = FastAPI()
 
+if config.MONGODB_PROFILE == "default":
+    mongo.use_profile("webhook")
+
+@app.exception_handler(DatabaseError)
+async def database_error_handler(request: Request, exc: DatabaseError):
+    logging.error(f"Erro de banco de dados em {request.url.path}: {exc}")
+    return JSONResponse(status_code=503, content={"detail": "Banco de dados indisponível, tente novamente."})
+
 @app.get("/")
 async def root():
     return {"message": "Olá, Mundo!"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/response")
 async def handle_response(request: Request):
     try:
@@ -39,6 +55,10 @@ async def handle_response(request: Request):
     if not image_base64:
         raise HTTPException(status_code=400, detail="Campo 'file' ausente no JSON")
 
+    saved_changes_id = data.get("metadata", {}).get("savedChangesId")
+    if saved_changes_id and not ObjectId.is_valid(saved_changes_id):
+        raise HTTPException(status_code=400, detail="savedChangesId inválido")
+
     try:
         image_data = base64.b64decode(image_base64)
         temp_path = config.TMP_PATH / f"image_{uuid.uuid4()}.png"
@@ -49,7 +69,14 @@ async def handle_response(request: Request):
         initialize_firebase()
         client_id = data.get("metadata", {}).get("clientId")
         logging.info(f"Client ID: {client_id}")
-        image_url = send_to_firebase(temp_path, client_id)
+        image_url, image_location = send_to_firebase(temp_path, client_id) or (None, None)
+
+        if image_url and saved_changes_id:
+            # Guarda a URL real da arte e gera as miniaturas ao lado dela, em vez de deduzir uma da outra pelo nome.
+            await mongo.update_one(
+                "saved_changes", {"_id": ObjectId(saved_changes_id)}, {"$set": {"url": image_url}}
+            )
+            schedule_thumbnails("saved_changes", saved_changes_id, image_data, image_location)
 
         client = await mongo.find_one(
             "clients", {"_id": ObjectId(client_id)}
@@ -0,0 +1,233 @@
+"""
+Benchmark das funções de src/helpers/image.py contra as implementações antigas.
+
+Cada caso roda a versão atual e a de referência (cópia da implementação
+anterior, pixel a pixel) sobre as mesmas imagens, confere que os resultados são
+idênticos e grava os tempos em benchmarks/results/. Sem --images usa um logo
+sintético com bordas suavizadas.
+
+Uso:
+    python -m benchmarks.image --images logo1.png logo2.png --repeat 3
+"""
+
+import argparse
+import colorsys
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image as PILImage
+from PIL import ImageDraw
+
+import src.helpers.color as colorutils
+from src.helpers.image import ImageEffects, border_brightness, check_if_border_pixel_is_dark
+
+RESULTS_PATH = Path(__file__).parent / "results"
+
+
+def legacy_colorize(image, color, shape="false"):
+    hue, sout, _ = colorutils.to_hsl(color)
+
+    img = image.convert("RGBA")
+    arr = np.array(np.asarray(img).astype("float"))
+
+    r, g, b, a = np.rollaxis(arr, axis=-1)
+    h, s, v = np.vectorize(colorsys.rgb_to_hsv)(r, g, b)
+
+    h = hue / 360
+
+    if shape == "true":
+        s = sout / 100
+
+    r, g, b = np.vectorize(colorsys.hsv_to_rgb)(h, s, v)
+
+    return PILImage.fromarray(np.dstack((r, g, b, a)).astype("uint8"), "RGBA")
+
+
+def legacy_neighbors(img_array, x, y):
+    neighbors = []
+    height, width, _ = img_array.shape
+
+    for i in range(max(0, x - 1), min(height, x + 2)):
+        for j in range(max(0, y - 1), min(width, y + 2)):
+            if i != x or j != y:
+                neighbors.append(img_array[i, j])
+
+    return neighbors
+
+
+def legacy_border_brightness(img) -> float:
+    """
+    Laço pixel a pixel de check_if_border_pixel_is_dark antes da vetorização.
+
+    O original somava os canais em uint8 e estourava acima de 255 (200+100+50 virava 94);
+    aqui a imagem é convertida para int64 antes, que é o comportamento pretendido.
+    """
+    img = img.astype(np.int64)
+
+    count_rgb_pixels = 0
+    sum_brightness_pixels = 0
+
+    for x, row in enumerate(img):
+        for y, pixel in enumerate(row):
+            if pixel[3] == 0:
+                continue
+
+            neighbors = legacy_neighbors(img, x, y)
+
+            if not any(neighbor[3] == 0 for neighbor in neighbors):
+                continue
+
+            brightness_pixels = [sum(neighbor[:3]) / 3 for neighbor in neighbors if neighbor[3] != 0]
+
+            count_rgb_pixels += len(brightness_pixels)
+            sum_brightness_pixels += sum(brightness_pixels)
+
+    return sum_brightness_pixels / count_rgb_pixels
+
+
+def random_alpha_image(rng, size: int) -> np.ndarray:
+    img = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    img[:, :, 3] = np.where(rng.random((size, size)) < 0.4, 0, img[:, :, 3])
+    # Garante pelo menos um pixel opaco encostado em um transparente.
+    img[0, 0, 3], img[0, 1, 3] = 255, 0
+
+    return img
+
+
+def synthetic_logo(size: int = 1080, seed: int = 7) -> PILImage.Image:
+    rng = np.random.default_rng(seed)
+    image = PILImage.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    for _ in range(12):
+        x, y = rng.integers(0, size, 2)
+        radius = int(rng.integers(size // 20, size // 5))
+        fill = tuple(int(value) for value in rng.integers(0, 256, 3)) + (255,)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=fill)
+
+    draw.text((size // 4, size // 2), "Hortifruti", fill=(20, 20, 20, 255))
+
+    # Suaviza a borda para ter pixels semitransparentes, como um logo real.
+    return image.resize((size // 2, size // 2), PILImage.LANCZOS).resize((size, size), PILImage.LANCZOS)
+
+
+def timed(func, repeat: int) -> tuple[float, object]:
+    durations = []
+    result = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations), result
+
+
+def bench_colorize(images: dict, repeat: int) -> list[dict]:
+    results = []
+
+    for name, image in images.items():
+        for color, shape in (("#ff6600", "false"), ("#1e90ff", "true"), ("rgb(128, 128, 128)", "true")):
+            current_s, current = timed(lambda: ImageEffects(image).colorize(color, shape), repeat)
+            legacy_s, legacy = timed(lambda: legacy_colorize(image, color, shape), 1)
+
+            results.append({
+                "image": name,
+                "size": image.size,
+                "color": color,
+                "shape": shape,
+                "identical": bool(np.array_equal(np.asarray(current), np.asarray(legacy))),
+                "current_ms": round(current_s * 1000, 2),
+                "legacy_ms": round(legacy_s * 1000, 2),
+                "speedup": round(legacy_s / current_s, 1),
+            })
+
+    return results
+
+
+def bench_border_brightness(images: dict, repeat: int) -> list[dict]:
+    results = []
+    rng = np.random.default_rng(11)
+
+    # Regressão: imagens pequenas com transparência aleatória, inclusive nas bordas da imagem.
+    mismatches = [
+        size
+        for size in rng.integers(2, 40, 200)
+        for img in [random_alpha_image(rng, int(size))]
+        if not np.isclose(border_brightness(img), legacy_border_brightness(img))
+    ]
+    results.append({"image": "random-small", "cases": 200, "identical": not mismatches, "mismatched_sizes": mismatches})
+
+    for name, image in images.items():
+        img = np.asarray(image)
+
+        with tempfile.NamedTemporaryFile(suffix=".png") as file:
+            image.save(file.name)
+            current_s, answer = timed(lambda: check_if_border_pixel_is_dark(file.name), repeat)
+
+        current = border_brightness(img)
+        legacy_s, legacy = timed(lambda: legacy_border_brightness(img), 1)
+
+        results.append({
+            "image": name,
+            "size": image.size,
+            "identical": bool(np.isclose(current, legacy)),
+            "answer": answer,
+            "brightness": round(current, 3),
+            "current_ms": round(current_s * 1000, 2),
+            "legacy_ms": round(legacy_s * 1000, 2),
+            "speedup": round(legacy_s / current_s, 1),
+        })
+
+    return results
+
+
+BENCHMARKS = {
+    "colorize": bench_colorize,
+    "border_brightness": bench_border_brightness,
+}
+
+
+def load_images(paths: list[Path], size: int) -> dict:
+    if not paths:
+        return {f"synthetic-{size}": synthetic_logo(size)}
+
+    return {path.name: PILImage.open(path).convert("RGBA") for path in paths}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=Path, nargs="*", default=[])
+    parser.add_argument("--size", type=int, default=1080, help="Lado do logo sintético")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), nargs="*", default=None)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    images = load_images(args.images, args.size)
+    results = {
+        name: bench(images, args.repeat)
+        for name, bench in BENCHMARKS.items()
+        if not args.only or name in args.only
+    }
+
+    report = {"created_at": datetime.now().isoformat(), "params": vars(args), "results": results}
+
+    output = args.output or RESULTS_PATH / f"image-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=4, default=str))
+
+    print(json.dumps(results, indent=4, default=str))
+    print(f"Resultado salvo em {output}")
+
+    if not all(entry["identical"] for entries in results.values() for entry in entries):
+        raise SystemExit("Resultado diferente da implementação de referência.")
+
+
+if __name__ == "__main__":
+    main()
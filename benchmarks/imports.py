@@ -0,0 +1,123 @@
+"""
+Relatório do tempo de import dos pontos de entrada.
+
+Executa `python -X importtime -c "import <módulo>"` em um processo novo para cada
+alvo e resume o tempo total, os pacotes de topo mais caros (tempo acumulado) e os
+módulos com maior tempo próprio. Com --budget, termina com erro se algum alvo
+passar do limite, para uso em CI.
+
+Uso:
+    python -m benchmarks.imports api main --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+RESULTS_PATH = Path(__file__).parent / "results"
+ROOT = Path(__file__).parent.parent
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+DEFAULT_TARGETS = ("api", "main", "src.helpers.image", "src.api.picwish", "src.helpers.nlp")
+
+
+def profile(target: str, top: int) -> dict:
+    env = {
+        "SERVER_URL": "http://localhost/",
+        "GENERATED_CARD_IMAGES_PATH": "/tmp",
+        **os.environ,
+    }
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    modules = []
+
+    for line in process.stderr.splitlines():
+        match = LINE.match(line)
+
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append((name, int(own), int(cumulative), len(indent)))
+
+    # O -X importtime lista os filhos antes do pai, dois espaços mais à direita;
+    # os imports diretos do alvo são as linhas logo acima dele com um nível a mais.
+    packages = defaultdict(int)
+    target_index = max((index for index, module in enumerate(modules) if module[0] == target), default=None)
+
+    if target_index is not None:
+        depth = modules[target_index][3]
+
+        for name, _, cumulative, indent in reversed(modules[:target_index]):
+            if indent <= depth:
+                break
+
+            if indent == depth + 2:
+                packages[name.split(".")[0]] += cumulative
+
+    def ms(us: int) -> float:
+        return round(us / 1000, 1)
+
+    return {
+        "target": target,
+        "ok": process.returncode == 0,
+        "error": process.stderr.strip().splitlines()[-1] if process.returncode else None,
+        "process_s": round(elapsed, 3),
+        "import_ms": ms(modules[target_index][2] if target_index is not None else 0),
+        "top_packages_ms": {
+            name: ms(us) for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+        "top_self_ms": {
+            name: ms(own) for name, own, _, _ in sorted(modules, key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=None, help="Tempo máximo de import por alvo, em segundos")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = [profile(target, args.top) for target in args.targets]
+
+    report = {"created_at": datetime.now().isoformat(), "python": sys.version.split()[0], "targets": results}
+
+    output = args.output or RESULTS_PATH / f"imports-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=4))
+
+    for result in results:
+        status = "ok" if result["ok"] else f"erro: {result['error']}"
+        print(f"{result['target']:<24} {result['import_ms']:>9.1f} ms  ({status})")
+
+        for name, value in result["top_packages_ms"].items():
+            print(f"    {name:<32} {value:>9.1f} ms")
+
+    print(f"Resultado salvo em {output}")
+
+    if args.budget is not None:
+        over = [result["target"] for result in results if result["import_ms"] / 1000 > args.budget]
+
+        if over:
+            print(f"Acima do limite de {args.budget}s: {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark do loop de prospecção com Z-API, Agendor e MongoDB locais.
+
+Executa `prospection()` da campanha SDR contra um servidor HTTP falso (Z-API e
+Agendor no mesmo app aiohttp) e um MongoDB em memória (mongomock-motor), com os
+intervalos de pacing comprimidos. Ao final grava um JSON em benchmarks/results/
+com leads/s, operações no MongoDB por lead, p50/p99 por etapa e o atraso do event loop.
+
+Uso:
+    python -m benchmarks.prospection --leads 500 --instances 6 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+os.environ.setdefault("SERVER_URL", "http://localhost/")
+os.environ.setdefault("GENERATED_CARD_IMAGES_PATH", "/tmp")
+
+import aiohttp
+from aiohttp import web
+from mongomock_motor import AsyncMongoMockClient
+
+import config
+import src.database.mongo as mongo_module
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from src.database.bulk import BulkResult
+from src.database.mongo import mongo
+from utils import campaign as engine
+from utils.agendor import agendor
+from utils.campaigns import SDR
+from utils.instances import ZapiInstance
+from utils.zapi import Zapi
+
+RESULTS_PATH = Path(__file__).parent / "results"
+
+ZAPI_STAGES = {
+    "get_instance_status": "status",
+    "check_phone_exists": "phone_check",
+    "send_message": "send",
+    "send_image": "send",
+    "send_audio": "send",
+}
+MONGO_STAGES = {
+    "find_one_and_update": "claim",
+    "update_one": "db_write",
+    "count_documents": "quota",
+    "find_one": "db_read",
+}
+
+
+class Recorder:
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.mongo_ops = 0
+
+    def timed(self, stage, func, mongo_op=False):
+        async def wrapper(*args, **kwargs):
+            if mongo_op:
+                self.mongo_ops += 1
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.timings[stage].append(time.perf_counter() - start)
+
+        return wrapper
+
+    def timed_sync(self, stage, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.timings[stage].append(time.perf_counter() - start)
+
+        return wrapper
+
+    def summary(self):
+        def percentile(values, q):
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+        return {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(statistics.median(values) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3),
+            }
+            for stage, values in sorted(self.timings.items())
+        }
+
+
+def fake_server(latency: float, no_whatsapp_ratio: float) -> web.Application:
+    async def delay():
+        if latency:
+            await asyncio.sleep(random.uniform(latency * 0.5, latency * 1.5))
+
+    async def status(request):
+        await delay()
+        return web.json_response({"connected": True})
+
+    async def phone_exists(request):
+        await delay()
+        exists = random.random() >= no_whatsapp_ratio
+        return web.json_response({"exists": exists, "phone": request.match_info["phone"] if exists else None})
+
+    async def send(request):
+        await delay()
+        await request.json()
+        return web.json_response({"messageId": random.randint(1, 10**9)})
+
+    async def deal_stage(request):
+        await delay()
+        return web.json_response({"data": {"id": int(request.match_info["deal"])}})
+
+    app = web.Application()
+    app.router.add_get("/instances/{instance}/token/{token}/status", status)
+    app.router.add_get("/instances/{instance}/token/{token}/phone-exists/{phone}", phone_exists)
+    app.router.add_post("/instances/{instance}/token/{token}/{kind:send-.*}", send)
+    app.router.add_put("/v3/deals/{deal}/stage", deal_stage)
+    return app
+
+
+async def seed(leads: int, instances: list[ZapiInstance]):
+    await mongo.insert_one("config", {"greeting_messages": {"secondary": ["{greeting}, aqui é {prospector}!"]}})
+
+    for index in range(leads):
+        instance = instances[index % len(instances)]
+        await mongo.insert_one(SDR.collection, {
+            "name": f"Lead {index}",
+            "phone": f"5531{index:09d}",
+            "prospector": {"name": instance.seller, "phone": instance.seller_phone},
+            "agendor_deal_id": index + 1,
+        })
+
+
+async def mock_bulk_write(collection, operations: list, ordered: bool = True) -> BulkResult:
+    """
+    mongomock não aceita as operações das versões recentes do pymongo em bulk_write;
+    aplica cada uma no mock mantendo uma única chamada contabilizada por lote.
+    """
+    details = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "writeErrors": []}
+
+    for index, operation in enumerate(operations):
+        try:
+            if isinstance(operation, InsertOne):
+                await collection.insert_one(operation._doc)
+                details["nInserted"] += 1
+            elif isinstance(operation, (UpdateOne, UpdateMany, ReplaceOne)):
+                method = {UpdateOne: collection.update_one, UpdateMany: collection.update_many, ReplaceOne: collection.replace_one}
+                result = await method[type(operation)](operation._filter, operation._doc, upsert=operation._upsert)
+                details["nMatched"] += result.matched_count
+                details["nModified"] += result.modified_count
+            elif isinstance(operation, DeleteOne):
+                details["nRemoved"] += (await collection.delete_one(operation._filter)).deleted_count
+        except Exception as e:
+            details["writeErrors"].append({"index": index, "errmsg": str(e)})
+            if ordered:
+                break
+
+    return BulkResult.from_details(len(operations), details, ordered)
+
+
+def instrument(recorder: Recorder):
+    for method, stage in ZAPI_STAGES.items():
+        setattr(Zapi, method, recorder.timed(stage, getattr(Zapi, method)))
+
+    for method, stage in MONGO_STAGES.items():
+        setattr(mongo, method, recorder.timed(stage, getattr(mongo, method), mongo_op=True))
+
+    for method in ("find", "insert_one", "update_many", "aggregate", "delete_one", "bulk_write"):
+        setattr(mongo, method, recorder.timed(f"mongo_{method}", getattr(mongo, method), mongo_op=True))
+
+    agendor.update_deal_stage = recorder.timed_sync("crm_update", agendor.update_deal_stage)
+
+
+async def monitor_loop_lag(samples: list, interval: float = 0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run(args) -> dict:
+    runner = web.AppRunner(fake_server(args.latency, args.no_whatsapp))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", args.port)
+    await site.start()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    config.ZAPI_API_URL = base_url
+    config.PACING_SCALE = args.pacing_scale
+    config.SUPPORT_NUMBERS = []
+    config.ZAPI_CLIENT_TOKEN = "benchmark"
+    agendor.agendor_base_url = f"{base_url}/v3/"
+
+    mongo.client = AsyncMongoMockClient(tz_aware=True)
+    mongo_module.run_bulk_write = mock_bulk_write
+
+    SDR.hours = engine.WorkingHours(0, 23, range(7))
+    SDR.quota = args.leads * 10
+
+    instances = [
+        ZapiInstance(seller=f"Seller {index}", slot="secondary", instance=f"instance-{index}", token="token", seller_phone=f"55319000{index:04d}")
+        for index in range(args.instances)
+    ]
+    await seed(args.leads, instances)
+
+    recorder = Recorder()
+    instrument(recorder)
+
+    lag_samples = []
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples))
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(
+            engine.prospection(SDR, instance, session, f"bench:{instance.key}")
+            for instance in instances
+        ))
+        await mongo.flush_buffers()
+    elapsed = time.perf_counter() - start
+    mongo_ops = recorder.mongo_ops
+    stages = recorder.summary()
+
+    lag_task.cancel()
+    await runner.cleanup()
+
+    prospected = await mongo.count_documents(SDR.collection, {"prospection_date": {"$exists": True}})
+    no_whatsapp = await mongo.count_documents(SDR.collection, {"no_whatsapp": True})
+    claims = len(recorder.timings["claim"])
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "params": vars(args),
+        "elapsed_s": round(elapsed, 3),
+        "claims": claims,
+        "prospected": prospected,
+        "no_whatsapp": no_whatsapp,
+        "claims_per_s": round(claims / elapsed, 2),
+        "leads_per_min": round(args.leads / elapsed * 60, 1),
+        "mongo_ops_per_lead": round(mongo_ops / args.leads, 2),
+        "stages": stages,
+        "event_loop_lag_ms": {
+            "p50": round(statistics.median(lag_samples) * 1000, 3),
+            "p99": round(sorted(lag_samples)[int(0.99 * (len(lag_samples) - 1))] * 1000, 3),
+            "max": round(max(lag_samples) * 1000, 3),
+        } if lag_samples else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=300)
+    parser.add_argument("--instances", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.02, help="Latência média do servidor falso, em segundos")
+    parser.add_argument("--no-whatsapp", type=float, default=0.1, help="Fração de telefones sem WhatsApp")
+    parser.add_argument("--pacing-scale", type=float, default=0.0001)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    output = args.output or RESULTS_PATH / f"prospection-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=4, default=str))
+
+    print(json.dumps(result, indent=4, default=str))
+    print(f"Resultado salvo em {output}")
+
+
+if __name__ == "__main__":
+    main()
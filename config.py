@@ -2,9 +2,8 @@ import logging
 from pathlib import Path
 import dotenv
 import os
-from openai import AsyncOpenAI
 
-from src.handlers.log import DailyRotatingFileHandler
+from src.handlers.log import DailyRotatingFileHandler, JsonFormatter, setup_queue_logging
 
 dotenv.load_dotenv(override=True)
 
@@ -13,6 +12,7 @@ DEV = os.getenv("DEV") == "true"
 ABS_PATH = Path(__file__).parent.absolute()
 TMP_PATH = ABS_PATH / ".tmp"
 LOGS_PATH = ABS_PATH / "logs"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
 
 CARDS_PATH = ABS_PATH / "cards"
 CLIENTS_PATH = ABS_PATH / "data/clients"
@@ -30,10 +30,53 @@ MAX_FREE_USE = 60
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 ELEVENLABS_API_URL = os.getenv("ELEVENLABS_API_URL")
+ELEVENLABS_MODEL = os.getenv("ELEVENLABS_MODEL", "eleven_multilingual_v1")
 
 SUPPORT_NUMBERS = ["553198929068"]
 MONGODB_URI = os.getenv("MONGODB_URI")
 MONGODB_NAME = 'videoai'
+MONGODB_MAX_TO_LIST = int(os.getenv("MONGODB_MAX_TO_LIST", 10000))
+MONGODB_RETRY_ATTEMPTS = int(os.getenv("MONGODB_RETRY_ATTEMPTS", 3))
+MONGODB_BREAKER_THRESHOLD = int(os.getenv("MONGODB_BREAKER_THRESHOLD", 5))
+MONGODB_BREAKER_RESET = float(os.getenv("MONGODB_BREAKER_RESET", 30))
+# Cada instância de prospecção mantém no máximo uma operação em voo, então 20
+# conexões cobrem os workers e os flushes do WriteBuffer com folga.
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", 20))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", 2))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 60000))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10000))
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zstd,snappy,zlib")
+MONGODB_PROFILE = os.getenv("MONGODB_PROFILE", "default")
+MONGODB_COLLECTIONS_TTL = int(os.getenv("MONGODB_COLLECTIONS_TTL", 300))
+CLIENT_SEARCH_BACKEND = os.getenv("CLIENT_SEARCH_BACKEND", "tokens")
+CLIENT_SEARCH_ATLAS_INDEX = os.getenv("CLIENT_SEARCH_ATLAS_INDEX", "clients")
+CLIENT_SEARCH_COUNT_LIMIT = int(os.getenv("CLIENT_SEARCH_COUNT_LIMIT", 1000))
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", 4))
+JOBS_TTL = int(os.getenv("JOBS_TTL", 60 * 60 * 24))
+CATEGORIES_REFRESH_INTERVAL = int(os.getenv("CATEGORIES_REFRESH_INTERVAL", 300))
+
+REMOVEBG_MODEL = os.getenv("REMOVEBG_MODEL", "u2net")
+REMOVEBG_WORKERS = int(os.getenv("REMOVEBG_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+REMOVEBG_CACHE_PATH = Path(os.getenv("REMOVEBG_CACHE_PATH", TMP_PATH / "removebg"))
+REMOVEBG_CACHE_MAX_BYTES = int(os.getenv("REMOVEBG_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+THUMBNAIL_SIZES = [int(size) for size in os.getenv("THUMBNAIL_SIZES", "300,500").split(",") if size.strip()]
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", 80))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", 2))
+
+NARRATION_STORE_PATH = Path(os.getenv("NARRATION_STORE_PATH", ABS_PATH / "data/narrations"))
+NARRATION_STORE_MAX_BYTES = int(os.getenv("NARRATION_STORE_MAX_MB", 4096)) * 1024 * 1024
+
+SYLLABLES_DB_PATH = Path(os.getenv("SYLLABLES_DB_PATH", ABS_PATH / "data/syllables.sqlite3"))
+SYLLABLES_MEMO_SIZE = int(os.getenv("SYLLABLES_MEMO_SIZE", 50_000))
+SYLLABLES_REMOTE = os.getenv("SYLLABLES_REMOTE", "true") == "true"
+SYLLABLES_REMOTE_CONCURRENCY = int(os.getenv("SYLLABLES_REMOTE_CONCURRENCY", 4))
+SYLLABLES_REMOTE_TIMEOUT = int(os.getenv("SYLLABLES_REMOTE_TIMEOUT", 30))
+
+PICWISH_MAX_SIDE = int(os.getenv("PICWISH_MAX_SIDE", 4096))
+PICWISH_WEBP_QUALITY = int(os.getenv("PICWISH_WEBP_QUALITY", 90))
+PICWISH_CACHE_PATH = Path(os.getenv("PICWISH_CACHE_PATH", TMP_PATH / "picwish"))
+PICWISH_CACHE_MAX_BYTES = int(os.getenv("PICWISH_CACHE_MAX_MB", 512)) * 1024 * 1024
 
 AGENDOR_TOKEN = os.getenv("AGENDOR_TOKEN")
 
@@ -58,7 +101,15 @@ ZAPI_CREDENTIALS = {
     }
 }
 
+WORKER_SHARDING = os.getenv("WORKER_SHARDING") == "true"
+WORKER_ID = os.getenv("WORKER_ID")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
 ZAPI_ENDPOINT = os.getenv("ZAPI_ENDPOINT")
+ZAPI_API_URL = os.getenv("ZAPI_API_URL", "https://api.z-api.io")
+
+# Multiplica todos os intervalos das campanhas (ex.: 0.001 nos benchmarks)
+PACING_SCALE = float(os.getenv("PACING_SCALE", 1))
 ZAPI_CLIENT_TOKEN = os.getenv("ZAPI_CLIENT_TOKEN")
 
 # ZAPI_TOKEN = {
@@ -89,22 +140,22 @@ FIREBASE_TOKEN_URI = os.getenv("FIREBASE_TOKEN_URI")
 FIREBASE_AUTH_PROVIDER_X509_CERT_URL = os.getenv("FIREBASE_AUTH_PROVIDER_X509_CERT_URL")
 FIREBASE_CLIENT_X509_CERT_URL = os.getenv("FIREBASE_CLIENT_X509_CERT_URL")
 FIREBASE_STORAGE_BUCKET = os.getenv("FIREBASE_STORAGE_BUCKET")
+# Acima deste tamanho o upload é resumível, em chunks (múltiplos de 256 KB).
+FIREBASE_RESUMABLE_THRESHOLD = int(os.getenv("FIREBASE_RESUMABLE_THRESHOLD_MB", 8)) * 1024 * 1024
+FIREBASE_UPLOAD_CHUNK_SIZE = int(os.getenv("FIREBASE_UPLOAD_CHUNK_MB", 8)) * 1024 * 1024
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
 file_handler = DailyRotatingFileHandler(
     LOGS_PATH, maxBytes=10 * 1024 * 1024, backupCount=5
 )
 file_handler.setFormatter(formatter)
 
-logger.addHandler(file_handler)
+log_listener = setup_queue_logging(file_handler)
 
 # openai = AsyncOpenAI(api_key=OPENAI_APIKEY)
 
@@ -1,56 +1,82 @@
 import asyncio
 import logging
 from pathlib import Path
+from typing import Optional
 
-import requests
+import aiohttp
 
 import config
-from src.api.zapi import ZApi
 from src.helpers import audio
+from src.helpers.audio_index import narration_audio_index
+from src.helpers.narration_store import narration_store
 
 
 class ElevenLabs:
-    def __init__(self):
+    def __init__(self, model: str = config.ELEVENLABS_MODEL):
+        self.model = model
         self.feminine_voice()
 
-    async def generate(self, audio_path: str | Path, text: str):
-        trys = 2
-
-        while trys != 0:
+    async def synthesize(self, audio_path: Path, text: str, attempts: int = 2):
+        """
+        Chama a API e grava o mp3 em `audio_path` à medida que os chunks chegam.
+        Áudio vazio ou inválido conta como falha e gera nova tentativa.
+        """
+        for attempt in range(1, attempts + 1):
             try:
-                response = requests.post(
-                    f"{config.ELEVENLABS_API_URL}/{self.voice_id}",
-                    json={
-                        "model_id": "eleven_multilingual_v1",
-                        "text": text,
-                        "voice_settings": {"stability": 1, "similarity_boost": 1},
-                        "generation_config": {
-                            "chunk_length_schedule": [500, 500, 500, 500]
+                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
+                    async with session.post(
+                        f"{config.ELEVENLABS_API_URL}/{self.voice_id}",
+                        json={
+                            "model_id": self.model,
+                            "text": text,
+                            "voice_settings": {"stability": 1, "similarity_boost": 1},
+                            "generation_config": {
+                                "chunk_length_schedule": [500, 500, 500, 500]
+                            },
+                        },
+                        headers={
+                            "Content-Type": "application/json",
+                            "Xi-Api-Key": config.ELEVENLABS_API_KEY,
                         },
-                    },
-                    headers={
-                        "Content-Type": "application/json",
-                        "Xi-Api-Key": config.ELEVENLABS_API_KEY,
-                    },
-                )
+                    ) as response:
+                        response.raise_for_status()
 
-                if not response.content:
-                    continue
+                        size = 0
 
-                audio_path.write_bytes(response.content)
+                        with open(audio_path, "wb") as f:
+                            async for chunk in response.content.iter_chunked(64 * 1024):
+                                f.write(chunk)
+                                size += len(chunk)
 
-                if not audio.is_valid(audio_path):
-                    continue
+                if size and await asyncio.to_thread(audio.is_valid, audio_path):
+                    return audio_path
 
-                return audio.normalize(audio_path)
-            except Exception as e:
+                logging.error(f"ElevenLabs retornou um áudio {'inválido' if size else 'vazio'} para: {text}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 logging.exception(e)
-            finally:
-                trys -= 1
+
+            # Espera só entre tentativas que falharam.
+            if attempt < attempts:
                 await asyncio.sleep(5)
 
         raise Exception("ElevenLabs failed to generate!")
 
+    async def generate(self, audio_path: str | Path, text: str, client: Optional[str] = None):
+        """
+        Áudio normalizado de `text` em `audio_path`. A síntese só acontece se a
+        mesma frase nunca foi gerada com esta voz e modelo, para nenhum cliente.
+        """
+        audio_path = Path(audio_path)
+
+        source = await narration_store.get_into(text, self.voice_id, self.model, self.synthesize, audio_path)
+
+        if client:
+            await narration_audio_index.register(
+                client, audio_path.name, hash=source.stem, voice_id=self.voice_id, model=self.model
+            )
+
+        return audio_path
+
     def male_voice(self):
         self.voice_id = "bVMeCyTHy58xNoL34h3p"
 
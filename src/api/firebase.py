@@ -1,11 +1,21 @@
+import asyncio
+import hashlib
 import mimetypes
 from pathlib import Path
-import firebase_admin
-from firebase_admin import credentials, storage
 import logging
 import uuid
+from typing import BinaryIO, NamedTuple, Optional
 
 import config
+from src.helpers.lazy import lazy_import
+
+firebase_admin = lazy_import("firebase_admin")
+credentials = lazy_import("firebase_admin.credentials")
+storage = lazy_import("firebase_admin.storage")
+
+# Handles de bucket reaproveitados entre requisições e o resultado do `exists()` de cada um.
+_buckets: dict = {}
+_bucket_exists: dict[str, bool] = {}
 
 def initialize_firebase():
     if not firebase_admin._apps:
@@ -22,12 +32,16 @@ def initialize_firebase():
                 "client_x509_cert_url": config.FIREBASE_CLIENT_X509_CERT_URL
             })
             firebase_admin.initialize_app(cred, {'storageBucket': config.FIREBASE_STORAGE_BUCKET})
+            get_bucket()
             logging.info("Aplicação Firebase inicializada com sucesso.")
         except Exception as e:
             logging.error(f"Falha ao inicializar o Firebase: {e}")
             raise
 
-def send_to_firebase(file_path: Path, main_client: str):
+def send_to_firebase(file_path: Path, main_client: str) -> Optional[tuple[str, str]]:
+    """
+    Envia o arquivo para `prospection_BF/` e retorna (URL pública, caminho no bucket), ou None se falhar.
+    """
     file_name = file_path.name
     try:
         mime_type, _ = mimetypes.guess_type(file_name)
@@ -53,8 +67,135 @@ def send_to_firebase(file_path: Path, main_client: str):
         logging.info(f"URL pública gerada para {file_name}: {url}")
 
         
-        return url
+        return url, blob.name
 
     except Exception as e:
         logging.error(f"Erro ao enviar o arquivo {file_name} para o Firebase: {e}")
         return None
+
+
+def get_bucket(bucket_name: Optional[str] = None):
+    bucket_name = bucket_name or config.FIREBASE_STORAGE_BUCKET
+
+    if bucket_name not in _buckets:
+        _buckets[bucket_name] = storage.bucket(bucket_name)
+
+    return _buckets[bucket_name]
+
+
+async def bucket_exists(bucket_name: Optional[str] = None) -> bool:
+    """
+    `bucket.exists()` faz uma chamada à API; o resultado positivo fica guardado para o processo.
+    """
+    bucket_name = bucket_name or config.FIREBASE_STORAGE_BUCKET
+
+    if not _bucket_exists.get(bucket_name):
+        _bucket_exists[bucket_name] = await asyncio.to_thread(get_bucket(bucket_name).exists)
+
+    return _bucket_exists[bucket_name]
+
+
+def get_blob(location: str, bucket_name: Optional[str] = None):
+    # Montar o bucket/blob não faz chamada de rede; a URL pública já é conhecida antes do upload.
+    return get_bucket(bucket_name).blob(location)
+
+
+def _upload_bytes(blob, data: bytes, content_type: str) -> str:
+    blob.upload_from_string(data, content_type=content_type)
+    blob.make_public()
+
+    return blob.public_url
+
+
+async def upload_bytes(data: bytes, location: str, content_type: str, bucket_name: Optional[str] = None) -> str:
+    """
+    Envia `data` para o Storage em uma thread, sem bloquear o loop, e retorna a URL pública.
+    """
+    blob = get_blob(location, bucket_name)
+    url = await asyncio.to_thread(_upload_bytes, blob, data, content_type)
+    logging.info(f"Arquivo {location} enviado para o Firebase Storage.")
+
+    return url
+
+
+async def delete_blob(location: str, bucket_name: Optional[str] = None) -> None:
+    await asyncio.to_thread(get_blob(location, bucket_name).delete)
+    logging.info(f"Arquivo {location} removido do Firebase Storage.")
+
+
+class UploadResult(NamedTuple):
+    url: str
+    size: int
+    sha256: str
+
+
+class HashingReader:
+    """
+    Repassa as leituras do arquivo para o upload contando bytes e calculando o sha256,
+    sem precisar ler o conteúdo antes só para saber o tamanho. Com `sink`, cada
+    byte novo também é copiado para ele (uma leitura só para o upload e a cópia).
+    """
+
+    def __init__(self, file: BinaryIO, sink: Optional[BinaryIO] = None):
+        self.file = file
+        self.sink = sink
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        start = self.file.tell()
+        chunk = self.file.read(size)
+
+        # O upload resumível volta ao início do chunk em caso de retry; bytes já
+        # contados não entram de novo no hash.
+        if start + len(chunk) > self.size:
+            new = chunk[self.size - start :]
+            self.digest.update(new)
+
+            if self.sink is not None:
+                self.sink.write(new)
+
+            self.size = start + len(chunk)
+
+        return chunk
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+
+def _upload_stream(
+    blob, file: BinaryIO, content_type: str, size: Optional[int], sink: Optional[BinaryIO] = None
+) -> UploadResult:
+    reader = HashingReader(file, sink)
+
+    if size is None or size > config.FIREBASE_RESUMABLE_THRESHOLD:
+        # Upload resumível em chunks: só um chunk fica em memória e uma falha de rede
+        # retoma do último chunk confirmado em vez de reenviar o arquivo inteiro.
+        blob.chunk_size = config.FIREBASE_UPLOAD_CHUNK_SIZE
+
+    blob.upload_from_file(reader, content_type=content_type, size=size, rewind=True)
+    blob.make_public()
+
+    return UploadResult(blob.public_url, reader.size, reader.digest.hexdigest())
+
+
+async def upload_stream(
+    file: BinaryIO,
+    location: str,
+    content_type: str,
+    bucket_name: Optional[str] = None,
+    size: Optional[int] = None,
+    sink: Optional[BinaryIO] = None,
+) -> UploadResult:
+    """
+    Envia um arquivo aberto para o Storage em uma thread, lendo em partes; com
+    `sink`, o conteúdo enviado é copiado para ele na mesma leitura.
+    """
+    blob = get_blob(location, bucket_name)
+    result = await asyncio.to_thread(_upload_stream, blob, file, content_type, size, sink)
+    logging.info(f"Arquivo {location} enviado para o Firebase Storage ({result.size} bytes).")
+
+    return result
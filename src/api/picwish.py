@@ -1,132 +1,216 @@
+import asyncio
 import logging
 import os
 import uuid
+import weakref
 from io import BytesIO
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Optional
 
-import rembg
-import requests
+import aiohttp
 from PIL import Image as PILImage
-from webptools import cwebp
 
 import config
+from src.helpers.cache import ContentCache, content_hash
 from src.helpers.is_ import Is
+from src.helpers.metrics import REMOVEBG_REQUESTS, REMOVEBG_SECONDS, timer
+
+cache = ContentCache(config.PICWISH_CACHE_PATH, config.PICWISH_CACHE_MAX_BYTES, ".png")
+
+# Remoções em andamento por hash da imagem, separadas por loop: pedidos simultâneos
+# da mesma imagem esperam o mesmo resultado, mas um future só pode ser aguardado no
+# loop que o criou (o fallback do rembg roda a Picwish com `asyncio.run` numa thread).
+_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+
+def _loop_in_flight() -> dict[str, asyncio.Future]:
+    return _in_flight.setdefault(asyncio.get_running_loop(), {})
+
+
+class PicwishError(Exception):
+    def __init__(self, message: str = "Não foi possível remover o fundo da imagem."):
+        super().__init__(message)
+
+
+def has_transparency(image: PILImage.Image) -> bool:
+    """
+    Canal alfa ou transparência por paleta/cor-chave (`tRNS`) com algum pixel não opaco.
+    """
+    if "A" not in image.getbands():
+        if "transparency" not in image.info:
+            return False
+
+        image = image.convert("RGBA")
+
+    return image.getchannel("A").getextrema() != (255, 255)
+
+
+def prepare_upload(data: bytes, max_side: int = config.PICWISH_MAX_SIDE) -> Optional[bytes]:
+    """
+    Decodifica uma vez, reduz para `max_side` e codifica em WebP na memória.
+
+    Retorna None se a imagem já tem transparência (não há fundo a remover).
+    """
+    image = PILImage.open(BytesIO(data))
+
+    if has_transparency(image):
+        return None
+
+    resized = max(image.size) > max_side
+
+    if resized:
+        image.thumbnail((max_side, max_side), PILImage.LANCZOS)
+
+    buffer = BytesIO()
+    image.convert("RGB").save(buffer, format="WEBP", quality=config.PICWISH_WEBP_QUALITY, method=4)
+    upload = buffer.getvalue()
+
+    # Um PNG/JPEG pequeno pode ficar maior em WebP; nesse caso envia o original.
+    if not resized and len(upload) >= len(data):
+        return data
+
+    return upload
 
 
 class Picwish:
-    def __init__(self, client=None):
+    def __init__(self, client=None, session: Optional[aiohttp.ClientSession] = None):
         self.url = os.getenv("PICWISH_API_URL")
+        self.session = session
 
-    def _get_file(self, image: str | BinaryIO):
-        if Is.url(image):
-            with requests.get(image, stream=True) as response:
-                return BytesIO(response.content)
-        elif (type(image) == str or isinstance(image, Path)) and (path := Path(image)):
-            return open(image, "rb")
-        else:
+    async def _read(self, session: aiohttp.ClientSession, image: str | Path | bytes | BinaryIO) -> bytes:
+        if isinstance(image, bytes):
             return image
 
-    def _request(self, url, headers, data, files):
-        trys = 3
+        if isinstance(image, str) and Is.url(image):
+            async with session.get(image) as response:
+                response.raise_for_status()
+                return await response.read()
 
-        while trys > 0:
-            try:
-                logging.info(
-                    f"Trying to remove the background from the image. {trys} attempts left. {url}"
-                )
-                return requests.post(
-                    url, headers=headers, data=data, files=files, timeout=60
-                )
-            except Exception as e:
-                logging.error(f"picwish: {e}")
-                trys -= 1
+        if isinstance(image, (str, Path)):
+            return await asyncio.to_thread(Path(image).read_bytes)
 
-        raise Exception("Não foi possível remover o fundo da imagem.")
+        return image.read()
 
-    def _request_image(self, image):
-        file = self._get_file(image)
+    async def _request(self, session: aiohttp.ClientSession, upload: bytes, attempts: int = 3) -> bytes:
         headers = {"X-API-KEY": os.getenv("PICWISH_API_KEY")}
-        data = {"sync": "1", "crop": "1"}
-        files = {"image_file": file}
 
-        response = self._request(self.url, headers, data, files)
+        for attempt in range(1, attempts + 1):
+            form = aiohttp.FormData({"sync": "1", "crop": "1"})
+            form.add_field("image_file", upload, filename="image.webp", content_type="image/webp")
 
-        if response.status_code != 200:
-            logging.error(f"picwish: {response.text}")
-            raise Exception("Não foi possível remover o fundo da imagem.")
-
-        response = response.json()
+            try:
+                logging.info(f"Trying to remove the background from the image. {attempts - attempt + 1} attempts left. {self.url}")
 
-        logging.info(f"picwish: {response}")
+                with timer(REMOVEBG_SECONDS, backend="picwish", batch="1"):
+                    async with session.post(self.url, headers=headers, data=form, timeout=aiohttp.ClientTimeout(total=60)) as response:
+                        if response.status != 200:
+                            logging.error(f"picwish: {await response.text()}")
+                            raise PicwishError()
 
-        if response.get("status") != 200 and response.get("message") != "success":
-            raise Exception("Não foi possível remover o fundo da imagem.")
+                        result = await response.json()
 
-        image = response.get("data", {}).get("image", "")
+                    logging.info(f"picwish: {result}")
 
-        logging.info(f"picwish: {image}")
+                    if result.get("status") != 200 and result.get("message") != "success":
+                        raise PicwishError()
 
-        if not image:
-            raise Exception("Não foi possível remover o fundo da imagem.")
+                    image_url = result.get("data", {}).get("image", "")
 
-        return image
+                    if not image_url:
+                        raise PicwishError()
 
-    def resize_image_proportional(
-        self, image: PILImage, output_path, max_width, max_height
-    ):
-        if image.width > max_width or image.height > max_height:
-            aspect_ratio = image.width / image.height
+                    async with session.get(image_url) as response:
+                        response.raise_for_status()
+                        return await response.read()
 
-            if aspect_ratio > 1:
-                new_width = max_width
-                new_height = int(max_width / aspect_ratio)
-            else:
-                new_height = max_height
-                new_width = int(max_height * aspect_ratio)
+            except (aiohttp.ClientError, asyncio.TimeoutError, PicwishError) as e:
+                logging.error(f"picwish: {e}")
 
-            logging.info(f"picwish: {image} (resizing)")
+                if attempt < attempts:
+                    await asyncio.sleep(2 ** attempt)
 
-            image = image.resize((new_width, new_height))
+        raise PicwishError()
 
-            image.save(output_path)
+    async def _remove(self, session: aiohttp.ClientSession, data: bytes, fallback: bool) -> bytes:
+        upload = await asyncio.to_thread(prepare_upload, data)
 
-    def process_image(self, image):
-        image_data = PILImage.open(self._get_file(image)).convert("RGBA")
+        if upload is None:
+            return data
 
-        if image_data.getextrema()[-1] != (
-            255,
-            255,
-        ):
-            return image
+        try:
+            result = await self._request(session, upload)
+            REMOVEBG_REQUESTS.inc(result="picwish")
+            return result
+        except PicwishError:
+            if not fallback:
+                raise
 
-        self.resize_image_proportional(image_data, image, 4096, 4096)
+        from src.helpers.removebg import background_remover
 
-        if os.path.getsize(image) > 15 * 1024 * 1024:
-            logging.info(f"picwish: {image} (compressing)")
+        result = await background_remover.remove(data, fallback=False)
 
-            image_path = Path(image)
-            image = image_path.with_suffix(".webp").as_posix()
+        from src.helpers.image import ImagePipeline
 
-            cwebp(
-                input_image=image_path.as_posix(),
-                output_image=image,
-                option="-q 90",
-            )
+        # O rembg não recorta como o `crop=1` da Picwish: decodifica uma vez, recorta pelo alfa e codifica.
+        return await asyncio.to_thread(lambda: ImagePipeline.load(result).crop().encode(".png"))
 
-        try:
-            process_image = self._request_image(image)
-        except Exception as e:
-            logging.error(f"picwish: {e}")
+    async def remove_background(self, image, fallback: bool = True) -> bytes:
+        """
+        Retorna o PNG sem fundo. O resultado fica em cache pelo hash da imagem de
+        entrada; sem resposta da Picwish usa o rembg local (se `fallback`).
+        """
+        async with aiohttp.ClientSession() if self.session is None else _borrow(self.session) as session:
+            data = await self._read(session, image)
+            key = content_hash(data)
 
-            process_image = config.TMP_PATH / (uuid.uuid4().hex + ".png")
+            if (cached := await asyncio.to_thread(cache.get, key)) is not None:
+                REMOVEBG_REQUESTS.inc(result="cache_hit")
+                return cached
 
-            rembg.remove(image_data).save(process_image)
+            in_flight = _loop_in_flight()
 
-            image = PILImage.open(process_image).convert("RGBA")
+            if key in in_flight:
+                REMOVEBG_REQUESTS.inc(result="deduplicated")
+                return await asyncio.shield(in_flight[key])
 
-            image = image.resize(image.getbbox())
+            future = in_flight[key] = asyncio.get_running_loop().create_future()
 
-            image.save(process_image)
+            try:
+                result = await self._remove(session, data, fallback)
+                await asyncio.to_thread(cache.put, key, result)
+                future.set_result(result)
+                return result
+            except BaseException as e:
+                future.set_exception(e)
+                # Evita o aviso de exceção não lida quando ninguém mais estava esperando.
+                future.exception()
+                raise
+            finally:
+                in_flight.pop(key, None)
+
+    async def process_image(self, image) -> Path:
+        """
+        Compatível com o fluxo antigo: grava o resultado em um PNG temporário e retorna o caminho.
+        """
+        result = await self.remove_background(image)
+
+        process_image = config.TMP_PATH / (uuid.uuid4().hex + ".png")
+        process_image.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(process_image.write_bytes, result)
 
         return process_image
+
+
+class _borrow:
+    """
+    Usa uma sessão existente em um `async with` sem fechá-la no final.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+
+    async def __aenter__(self) -> aiohttp.ClientSession:
+        return self.session
+
+    async def __aexit__(self, *exc) -> None:
+        return None
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+class OperationResult:
+    """
+    Resultado de uma operação dentro de um bulk_write, na mesma posição em que foi enviada.
+    """
+
+    def __init__(self, index: int, ok: bool, upserted_id: Any = None, error: Optional[str] = None) -> None:
+        self.index = index
+        self.ok = ok
+        self.upserted_id = upserted_id
+        self.error = error
+
+    def __repr__(self) -> str:
+        return f"OperationResult(index={self.index}, ok={self.ok}, error={self.error!r})"
+
+
+class BulkResult:
+    """
+    Totais do bulk_write e o resultado de cada operação.
+
+    No modo ordenado o MongoDB para na primeira falha; as operações seguintes
+    aparecem com ok=False e error="not executed".
+    """
+
+    def __init__(self, operations: list[OperationResult], details: Dict[str, Any]) -> None:
+        self.operations = operations
+        self.inserted_count = details.get("nInserted", 0)
+        self.matched_count = details.get("nMatched", 0)
+        self.modified_count = details.get("nModified", 0)
+        self.deleted_count = details.get("nRemoved", 0)
+        self.upserted_count = details.get("nUpserted", 0)
+
+    @property
+    def ok(self) -> bool:
+        return all(operation.ok for operation in self.operations)
+
+    @property
+    def errors(self) -> list[OperationResult]:
+        return [operation for operation in self.operations if not operation.ok]
+
+    @classmethod
+    def from_details(cls, size: int, details: Dict[str, Any], ordered: bool) -> "BulkResult":
+        errors = {error["index"]: error.get("errmsg", "") for error in details.get("writeErrors", [])}
+        upserted = {entry["index"]: entry["_id"] for entry in details.get("upserted", [])}
+        first_error = min(errors) if errors else size
+
+        operations = []
+        for index in range(size):
+            if index in errors:
+                operations.append(OperationResult(index, False, error=errors[index]))
+            elif ordered and index > first_error:
+                operations.append(OperationResult(index, False, error="not executed"))
+            else:
+                operations.append(OperationResult(index, True, upserted_id=upserted.get(index)))
+
+        return cls(operations, details)
+
+    @classmethod
+    def failed(cls, size: int, error: str) -> "BulkResult":
+        return cls([OperationResult(index, False, error=error) for index in range(size)], {})
+
+
+async def run_bulk_write(collection, operations: list, ordered: bool = True) -> BulkResult:
+    """
+    Executa as operações em um único round trip e devolve o resultado por operação.
+    """
+    if not operations:
+        return BulkResult([], {})
+
+    try:
+        result = await collection.bulk_write(operations, ordered=ordered)
+        return BulkResult.from_details(len(operations), result.bulk_api_result, ordered)
+    except BulkWriteError as e:
+        return BulkResult.from_details(len(operations), e.details, ordered)
+
+
+class WriteBuffer:
+    """
+    Acumula escritas de uma coleção e as envia em lote com bulk_write.
+
+    O lote é enviado ao atingir `max_operations` ou `flush_interval` segundos depois
+    da primeira escrita pendente. Cada escrita devolve um future com o seu
+    OperationResult; quem precisa da confirmação aguarda o future, quem não precisa
+    pode ignorá-lo (falhas são registradas no log).
+    """
+
+    def __init__(
+        self,
+        database,
+        collection_name: str,
+        max_operations: int = 500,
+        flush_interval: float = 1.0,
+        ordered: bool = False,
+    ) -> None:
+        self.database = database
+        self.collection_name = collection_name
+        self.max_operations = max_operations
+        self.flush_interval = flush_interval
+        self.ordered = ordered
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, operation) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((operation, future))
+
+        if len(self._pending) >= self.max_operations:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.flush_interval, self._scheduled_flush)
+
+        return future
+
+    def _scheduled_flush(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def insert_one(self, document: Dict[str, Any]) -> asyncio.Future:
+        return await self.submit(InsertOne(document))
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> asyncio.Future:
+        return await self.submit(UpdateOne(query, update, upsert=upsert))
+
+    async def update_many(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> asyncio.Future:
+        return await self.submit(UpdateMany(query, update, upsert=upsert))
+
+    async def replace_one(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool = False) -> asyncio.Future:
+        return await self.submit(ReplaceOne(query, document, upsert=upsert))
+
+    async def delete_one(self, query: Dict[str, Any]) -> asyncio.Future:
+        return await self.submit(DeleteOne(query))
+
+    async def flush(self) -> Optional[BulkResult]:
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            batch, self._pending = self._pending, []
+
+            if not batch:
+                return None
+
+            operations = [operation for operation, _ in batch]
+
+            try:
+                result = await self.database.bulk_write(self.collection_name, operations, ordered=self.ordered)
+            except Exception as e:
+                logging.exception(f"Erro ao gravar lote de {len(operations)} operações em {self.collection_name}: {e}")
+                result = BulkResult.failed(len(operations), str(e))
+
+        if result.errors:
+            logging.error(
+                f"{len(result.errors)} de {len(operations)} operações falharam em {self.collection_name}: "
+                f"{result.errors[0].error}"
+            )
+
+        for (_, future), operation_result in zip(batch, result.operations):
+            if not future.done():
+                future.set_result(operation_result)
+
+        return result
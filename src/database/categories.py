@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+import config
+from src.database.mongo import mongo
+from src.helpers.tasks import run_in_background
+
+CATEGORIES_COLLECTION = "categories"
+
+
+class CategoryRegistry:
+    """
+    Cópia em memória da coleção de categorias (pequena e quase estática).
+
+    Carrega no primeiro uso e acompanha mudanças por change stream; onde não há
+    change stream (standalone, mongomock) recarrega a cada `refresh_interval`
+    segundos. Um id desconhecido força uma recarga, no máximo uma vez a cada
+    `miss_interval` segundos, para categorias criadas depois da última leitura.
+    """
+
+    def __init__(
+        self,
+        collection: str = CATEGORIES_COLLECTION,
+        refresh_interval: float = config.CATEGORIES_REFRESH_INTERVAL,
+        miss_interval: float = 5,
+    ) -> None:
+        self.collection = collection
+        self.refresh_interval = refresh_interval
+        self.miss_interval = miss_interval
+        self.categories: dict[ObjectId, dict] = {}
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._watching = False
+        self._watch_retry_at = 0.0
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    async def load(self) -> None:
+        documents = await mongo.find(self.collection, {}, {"name": 1, "slug": 1})
+
+        self.categories = {
+            document["_id"]: {
+                "id": str(document["_id"]),
+                "name": document.get("name"),
+                "slug": document.get("slug"),
+            }
+            for document in documents
+        }
+        self.loaded_at = self._now()
+
+        logging.info(f"{len(self.categories)} categorias carregadas.")
+
+    async def _reload_if(self, max_age: float) -> None:
+        async with self._lock:
+            if self.loaded_at is None or self._now() - self.loaded_at > max_age:
+                await self.load()
+
+    async def ensure_loaded(self) -> None:
+        self.start()
+
+        await self._reload_if(float("inf") if self._watching else self.refresh_interval)
+
+    def invalidate(self) -> None:
+        self.loaded_at = None
+
+    def start(self) -> None:
+        if (self._watch_task is None or self._watch_task.done()) and self._now() >= self._watch_retry_at:
+            self._watch_task = run_in_background(self._watch(), name="categories:watch")
+
+    async def _watch(self) -> None:
+        try:
+            async with mongo.get_collection(self.collection).watch() as stream:
+                self._watching = True
+                logging.info("Acompanhando mudanças nas categorias.")
+
+                async for _ in stream:
+                    self.invalidate()
+                    await self._reload_if(0)
+        except (PyMongoError, NotImplementedError, AttributeError) as e:
+            self._watch_retry_at = self._now() + self.refresh_interval
+            logging.info(f"Change stream de categorias indisponível, recarregando a cada {self.refresh_interval}s: {e}")
+        finally:
+            self._watching = False
+
+    async def resolve(self, ids: Iterable) -> list[dict]:
+        """
+        `{id, name, slug}` de cada id, na ordem recebida; ids inexistentes são ignorados.
+        """
+        ids = [ObjectId(category_id) for category_id in ids or []]
+
+        await self.ensure_loaded()
+
+        if any(category_id not in self.categories for category_id in ids):
+            await self._reload_if(self.miss_interval)
+
+        return [self.categories[category_id] for category_id in ids if category_id in self.categories]
+
+
+category_registry = CategoryRegistry()
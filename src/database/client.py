@@ -0,0 +1,127 @@
+import importlib.util
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, WriteConcern, monitoring
+from pymongo.read_concern import ReadConcern
+
+import config
+from src.helpers.metrics import (
+    MONGO_POOL_CHECKOUT_FAILURES,
+    MONGO_POOL_CHECKOUT_SECONDS,
+    MONGO_POOL_CONNECTIONS,
+    MONGO_POOL_MAX_SIZE,
+)
+
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+# Opções de coleção por tipo de carga; o processo escolhe uma com MONGODB_PROFILE
+# ou mongo.use_profile().
+PROFILES = {
+    "default": {},
+    # Campanhas gravam muitas atualizações pequenas e relidas apenas pelo próprio worker;
+    # confirmação só do primário basta, a limpeza de tarefas antigas cobre perdas raras.
+    "campaign": {
+        "read_preference": ReadPreference.PRIMARY,
+        "write_concern": WriteConcern(w=1),
+    },
+    # Webhooks e API leem muito mais do que escrevem; continuam lendo durante a troca de primário.
+    "webhook": {
+        "read_preference": ReadPreference.PRIMARY_PREFERRED,
+        "read_concern": ReadConcern("local"),
+    },
+}
+
+
+def available_compressors(names: str) -> list[str]:
+    """
+    Mantém apenas os compressores cujos módulos estão instalados, na ordem de preferência.
+    """
+    compressors = []
+
+    for name in filter(None, (item.strip() for item in names.split(","))):
+        module = COMPRESSOR_MODULES.get(name)
+
+        if module and importlib.util.find_spec(module):
+            compressors.append(name)
+        else:
+            logging.debug(f"Compressor {name} indisponível para o MongoDB.")
+
+    return compressors
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Publica conexões abertas/em uso, tempo de espera por conexão e falhas de checkout.
+    """
+
+    def pool_created(self, event):
+        MONGO_POOL_MAX_SIZE.set(event.options.get("maxPoolSize", 100), address=self._address(event))
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = self._address(event)
+        MONGO_POOL_CONNECTIONS.set(0, address=address, state="open")
+        MONGO_POOL_CONNECTIONS.set(0, address=address, state="in_use")
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc(address=self._address(event), state="open")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec(address=self._address(event), state="open")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES.inc(address=self._address(event), reason=str(event.reason))
+
+    def connection_checked_out(self, event):
+        address = self._address(event)
+        MONGO_POOL_CONNECTIONS.inc(address=address, state="in_use")
+
+        if getattr(event, "duration", None) is not None:
+            MONGO_POOL_CHECKOUT_SECONDS.observe(event.duration, address=address)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CONNECTIONS.dec(address=self._address(event), state="in_use")
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+
+def create_client(uri: str) -> AsyncIOMotorClient:
+    """
+    Cria o cliente no event loop atual com o pool dimensionado pelo config.
+    """
+    options = {
+        "tz_aware": True,
+        "maxPoolSize": config.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": config.MONGODB_MIN_POOL_SIZE,
+        "maxIdleTimeMS": config.MONGODB_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "event_listeners": [PoolMetricsListener()],
+    }
+
+    compressors = available_compressors(config.MONGODB_COMPRESSORS)
+
+    if compressors:
+        options["compressors"] = compressors
+
+    client = AsyncIOMotorClient(uri, **options)
+    logging.info(
+        f"Conectado ao MongoDB (pool {config.MONGODB_MIN_POOL_SIZE}-{config.MONGODB_MAX_POOL_SIZE}, "
+        f"compressão: {', '.join(compressors) or 'nenhuma'})."
+    )
+
+    return client
@@ -0,0 +1,176 @@
+"""
+Busca de clientes do painel administrativo.
+
+Dois backends: "tokens" (padrão) usa os prefixos normalizados gravados em
+`search_tokens` com um índice multikey (clientes ainda sem tokens são buscados
+pelo regex antigo); "atlas" usa um índice do Atlas Search com campos
+`autocomplete` nos mesmos caminhos. Os dois paginam por `_id` e limitam a
+contagem a `CLIENT_SEARCH_COUNT_LIMIT`, acima do qual o total é estimado.
+"""
+
+import re
+from typing import Optional
+
+import config
+from src.database.mongo import mongo
+from src.database.search import (
+    SEARCH_FIELD,
+    keyset_filter,
+    search_filter,
+    search_tokens,
+    tokenize,
+)
+
+CLIENTS_COLLECTION = "clients"
+CLIENT_SEARCH_PATHS = ("client", "info.name", "info.email", "info.cellphone", "info.instagram")
+CLIENTS_SORT = [("_id", -1)]
+PHONE_TERM = re.compile(r"[\d\s()+\-.]+")
+
+
+def _get(document: dict, path: str):
+    for part in path.split("."):
+        document = document.get(part) if isinstance(document, dict) else None
+
+    return document
+
+
+def phone_variants(value: str) -> list[str]:
+    """
+    O número completo, sem o 55 e sem o 55 + DDD, para que "99999", "11 99999" e
+    "5511 99999" encontrem o mesmo cliente usando só prefixos.
+    """
+    digits = re.sub(r"\D", "", value)
+
+    if len(digits) < 10:
+        return [digits] if digits else []
+
+    variants = [digits]
+
+    if digits.startswith("55") and len(digits) >= 12:
+        digits = digits[2:]
+        variants.append(digits)
+
+    variants.append(digits[2:])
+
+    return variants
+
+
+def client_search_tokens(document: dict) -> list[str]:
+    values = []
+
+    for path in CLIENT_SEARCH_PATHS:
+        value = _get(document, path)
+
+        for item in value if isinstance(value, list) else [value]:
+            if not item:
+                continue
+
+            item = str(item)
+
+            if path in ("client", "info.cellphone"):
+                values.extend(phone_variants(item))
+            else:
+                values.append(item)
+
+    return search_tokens(*values, prefix_only=True)
+
+
+def _atlas_stage(term: str) -> Optional[dict]:
+    words = tokenize(term)
+
+    if not words:
+        return None
+
+    return {
+        "$search": {
+            "index": config.CLIENT_SEARCH_ATLAS_INDEX,
+            "compound": {
+                "must": [
+                    {
+                        "compound": {
+                            "should": [
+                                {"autocomplete": {"query": word, "path": path}}
+                                for path in CLIENT_SEARCH_PATHS
+                            ],
+                            "minimumShouldMatch": 1,
+                        }
+                    }
+                    for word in words
+                ]
+            },
+        }
+    }
+
+
+def _tokens_or_legacy(term: Optional[str]) -> dict:
+    """
+    Filtro por tokens; clientes gravados sem `search_tokens` (criados ou alterados
+    fora do `update_client`, antes do backfill) caem na busca antiga por regex.
+    """
+    tokens = search_filter(term)
+
+    if not tokens:
+        return {}
+
+    pattern = {"$regex": re.escape(term), "$options": "i"}
+
+    return {
+        "$or": [
+            tokens,
+            {SEARCH_FIELD: {"$exists": False}, "$or": [{path: pattern} for path in CLIENT_SEARCH_PATHS]},
+        ]
+    }
+
+
+async def search_clients(
+    term: Optional[str],
+    filters: dict,
+    limit: int,
+    after: Optional[dict] = None,
+    skip: int = 0,
+    backend: str = config.CLIENT_SEARCH_BACKEND,
+) -> tuple[list[dict], int, bool]:
+    """
+    Retorna (clientes, total, total_estimado). Traz `limit + 1` clientes para o
+    chamador saber se há próxima página.
+    """
+    if term and PHONE_TERM.fullmatch(term):
+        # "(11) 99999-1234" vira um só token, como o número gravado.
+        term = re.sub(r"\D", "", term)
+
+    keyset = keyset_filter(CLIENTS_SORT, after)
+    count_limit = config.CLIENT_SEARCH_COUNT_LIMIT
+
+    if term and backend == "atlas" and (search_stage := _atlas_stage(term)):
+        match = {**filters, **keyset}
+        pipeline = [search_stage, {"$match": match}, {"$sort": dict(CLIENTS_SORT)}]
+
+        if skip and not after:
+            pipeline.append({"$skip": skip})
+
+        pipeline += [{"$limit": limit + 1}, {"$project": {SEARCH_FIELD: 0}}]
+
+        count_pipeline = [search_stage, {"$match": filters}, {"$limit": count_limit}, {"$count": "count"}]
+        clients = await mongo.aggregate(CLIENTS_COLLECTION, pipeline)
+        counted = await mongo.aggregate(CLIENTS_COLLECTION, count_pipeline)
+        count = counted[0]["count"] if counted else 0
+
+        return clients, count, count >= count_limit
+
+    query = {**filters, **_tokens_or_legacy(term)}
+    clients = await mongo.find(
+        CLIENTS_COLLECTION,
+        {**query, **keyset},
+        {SEARCH_FIELD: 0},
+        limit=limit + 1,
+        sort=CLIENTS_SORT,
+        skip=skip if not after else 0,
+    )
+
+    if not query:
+        # Sem filtro o total vem dos metadados da coleção, sem varrer nada.
+        return clients, await mongo.estimated_document_count(CLIENTS_COLLECTION), True
+
+    count = await mongo.count_documents(CLIENTS_COLLECTION, query, limit=count_limit)
+
+    return clients, count, count >= count_limit
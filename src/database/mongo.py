@@ -1,58 +1,264 @@
-from typing import Any, Dict, Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import functools
+from typing import Any, AsyncIterator, Dict, Optional
 from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
 
 import config
 import logging
+from src.database.client import PROFILES, create_client
+from src.database.bulk import BulkResult, WriteBuffer, run_bulk_write
+from src.database.resilience import (
+    CircuitBreaker,
+    DatabaseError,
+    DatabaseUnavailable,
+    RetryPolicy,
+    is_infrastructure_error,
+)
+from src.helpers.metrics import MONGO_OPERATION_SECONDS, timer
 
 DEV = config.DEV
 uri = config.MONGODB_URI #if not DEV else "mongodb://localhost:27017"
 DB_NAME = config.MONGODB_NAME
+MAX_TO_LIST = config.MONGODB_MAX_TO_LIST
+
+
+class ResultTooLarge(Exception):
+    """
+    `find`/`aggregate` sem `limit` encontrou mais de MAX_TO_LIST documentos.
+    """
+
+    def __init__(self, collection: str, limit: int) -> None:
+        super().__init__(
+            f"Resultado de {collection} passa de {limit} documentos; use iter_find/iter_aggregate ou informe limit."
+        )
+        self.collection = collection
+        self.limit = limit
+
+
+def instrumented(operation: str, read: bool = True):
+    """
+    Mede a operação e a executa com a política de retry e o circuit breaker do cliente.
+
+    Falhas chegam ao chamador como DatabaseError; None, [] e 0 passam a significar
+    apenas "nada encontrado".
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, collection_name: str, *args, **kwargs):
+            with timer(MONGO_OPERATION_SECONDS, f"mongo.{operation}", operation=operation, collection=collection_name):
+                return await self.retry.run(
+                    lambda: func(self, collection_name, *args, **kwargs),
+                    operation,
+                    collection_name,
+                    self.breaker,
+                    read=read
+                )
+
+        return wrapper
+
+    return decorator
 
 
 class MongoDB:
 
-    def __init__(self):
-        self.client = AsyncIOMotorClient(uri, tz_aware=True)
-        self.db = self.client[DB_NAME]
-        logging.info("Conectado ao MongoDB.")
+    """
+    O cliente só é criado no primeiro acesso, dentro do event loop que vai usá-lo;
+    importar este módulo não abre conexões. Se o processo passar a usar outro loop
+    (vários asyncio.run), um novo cliente é criado para ele.
+    """
+
+    def __init__(self, profile: str = config.MONGODB_PROFILE):
+        self._client = None
+        self._client_loop = None
+        self._pinned = False
+        self.profile = profile
+        self.buffers: Dict[str, WriteBuffer] = {}
+        self.retry = RetryPolicy(attempts=config.MONGODB_RETRY_ATTEMPTS)
+        self.breaker = CircuitBreaker(config.MONGODB_BREAKER_THRESHOLD, config.MONGODB_BREAKER_RESET)
+        self._collection_names: Optional[tuple[float, list[str]]] = None
+        self._indexes: set = set()
+
+    @staticmethod
+    def _current_loop():
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+    @property
+    def client(self):
+        loop = self._current_loop()
+
+        if self._client is None or (not self._pinned and loop is not None and loop is not self._client_loop):
+            self._client = create_client(uri)
+            self._client_loop = loop
+
+        return self._client
+
+    @client.setter
+    def client(self, client) -> None:
+        """
+        Usa um cliente já criado (testes, benchmarks) em qualquer loop.
+        """
+        self._client = client
+        self._client_loop = self._current_loop()
+        self._pinned = client is not None
+
+    @property
+    def db(self):
+        return self.client[DB_NAME]
+
+    # Nome usado pelas rotas (`mongo.database.assets...`).
+    database = db
+
+    def use_profile(self, profile: str) -> None:
+        if profile not in PROFILES:
+            raise ValueError(f"Perfil do MongoDB desconhecido: {profile}")
+
+        self.profile = profile
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+        self._client = None
+        self._client_loop = None
+        self._pinned = False
 
     def get_collection(self, collection_name: str):
-        return self.db[collection_name]
+        return self.db.get_collection(collection_name, **PROFILES.get(self.profile, {}))
     
+    @instrumented("index_information")
     async def index_information(self, collection_name: str) -> Dict[str, Any]:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.index_information()
-        except Exception as e:
-            logging.error(f"Erro ao obter informações de índice na coleção {collection_name}: {e}")
-            return {}
+        collection = self.get_collection(collection_name)
+        return await collection.index_information()
     
-    async def find(self, collection_name: str, query: Dict[str, Any], user_filter: Dict[str, Any] = {}) -> list[dict]:
+    async def collection_names(self, ttl: float = config.MONGODB_COLLECTIONS_TTL) -> list[str]:
+        """
+        `list_collection_names` com cache de `ttl` segundos; a lista quase nunca muda.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._collection_names is None or loop.time() - self._collection_names[0] > ttl:
+            with timer(MONGO_OPERATION_SECONDS, operation="list_collection_names", collection="*"):
+                names = await self.db.list_collection_names()
+
+            self._collection_names = (loop.time(), sorted(names))
+
+        return self._collection_names[1]
+
+    async def ensure_index(self, collection_name: str, keys: list, **kwargs) -> None:
+        """
+        create_index uma vez por processo; chamadas seguintes com as mesmas chaves não vão ao servidor.
+        """
+        key = (collection_name, tuple(keys), tuple(sorted(kwargs.items())))
+
+        if key in self._indexes:
+            return
+
         try:
-            collection = self.get_collection(collection_name)
-            cursor = collection.find(query, user_filter)
-            return await cursor.to_list(length=None)
-        except Exception as e:
-            logging.error(f"Erro ao buscar no MongoDB: {e}")        
-            return []
-    
-    async def find_one(self, collection_name: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            await self.get_collection(collection_name).create_index(keys, **kwargs)
+        except PyMongoError as e:
+            logging.warning(f"Não foi possível criar o índice {keys} em {collection_name}: {e}")
+            return
+
+        self._indexes.add(key)
+
+    @staticmethod
+    async def _bounded_list(cursor, collection_name: str, limit: Optional[int]) -> list[dict]:
+        """
+        Materializa o cursor. Sem `limit`, um resultado maior que MAX_TO_LIST levanta
+        ResultTooLarge em vez de voltar cortado: use iter_find/iter_aggregate.
+        """
+        if limit:
+            return await cursor.to_list(length=limit)
+
+        documents = await cursor.to_list(length=MAX_TO_LIST + 1)
+
+        if len(documents) > MAX_TO_LIST:
+            raise ResultTooLarge(collection_name, MAX_TO_LIST)
+
+        return documents
+
+    async def _stream(self, operation: str, collection_name: str, cursor) -> AsyncIterator[dict]:
+        """
+        Repassa os documentos do cursor; falhas no meio da leitura não são repetidas,
+        porque parte do resultado já foi entregue.
+        """
+        if not self.breaker.allow():
+            raise DatabaseUnavailable(operation, collection_name, Exception("circuito aberto"), retryable=True)
+
         try:
-            collection = self.get_collection(collection_name)
-            return await collection.find_one(query)
-        except Exception as e:
-            logging.error(f"Erro ao buscar um documento no MongoDB: {e}")
-            return None
+            async for document in cursor:
+                yield document
+
+            self.breaker.record_success()
+        except PyMongoError as e:
+            if is_infrastructure_error(e):
+                self.breaker.record_failure()
+            raise DatabaseError(operation, collection_name, e) from e
+        finally:
+            self.breaker.release()
+
+    @instrumented("find")
+    async def find(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        user_filter: Dict[str, Any] = {},
+        limit: Optional[int] = None,
+        sort: Optional[list] = None,
+        skip: int = 0
+    ) -> list[dict]:
+        collection = self.get_collection(collection_name)
+        cursor = collection.find(query, user_filter or None)
+
+        if sort:
+            cursor = cursor.sort(sort)
+
+        if skip:
+            cursor = cursor.skip(skip)
+
+        if limit:
+            cursor = cursor.limit(limit)
+
+        return await self._bounded_list(cursor, collection_name, limit)
+
+    async def iter_find(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 500,
+        sort: Optional[list] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Percorre o resultado em lotes de `batch_size` sem carregar a coleção inteira em memória.
+        """
+        collection = self.get_collection(collection_name)
+        cursor = collection.find(query, projection, batch_size=batch_size)
+
+        if sort:
+            cursor = cursor.sort(sort)
+
+        async for document in self._stream("iter_find", collection_name, cursor):
+            yield document
+    
+    @instrumented("find_one")
+    async def find_one(
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        collection = self.get_collection(collection_name)
+        return await collection.find_one(query, projection)
         
     async def get_config(self, data: dict = {}):
-        try:
-            collection = self.get_collection("config")
-            return await collection.find_one({}, {"_id": 0}.update(data))
-        except Exception as e:
-            logging.error(f"Erro ao buscar um documento no MongoDB: {e}")
-            return None
+        return await self.find_one("config", {}, {"_id": 0, **data})
     
+    @instrumented("find_one_and_update", read=False)
     async def find_one_and_update(
         self,
         collection_name: str,
@@ -60,29 +266,29 @@ class MongoDB:
         update: Dict[str, Any],
         return_document: ReturnDocument = ReturnDocument.AFTER
     ) -> Optional[Dict[str, Any]]:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.find_one_and_update(filter, update, return_document=return_document)
-        except Exception as e:
-            logging.error(f"Erro ao buscar e atualizar um documento no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        return await collection.find_one_and_update(filter, update, return_document=return_document)
     
-    async def count_documents(self, collection_name: str, query: Dict[str, Any]) -> int:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.count_documents(query)
-        except Exception as e:
-            logging.error(f"Erro ao contar documentos no MongoDB: {e}")
-            return 0
+    @instrumented("count_documents")
+    async def count_documents(self, collection_name: str, query: Dict[str, Any], limit: Optional[int] = None) -> int:
+        collection = self.get_collection(collection_name)
+
+        if limit:
+            return await collection.count_documents(query, limit=limit)
+
+        return await collection.count_documents(query)
+
+    @instrumented("estimated_document_count")
+    async def estimated_document_count(self, collection_name: str) -> int:
+        collection = self.get_collection(collection_name)
+        return await collection.estimated_document_count()
         
+    @instrumented("insert_one", read=False)
     async def insert_one(self, collection_name: str, document: Dict[str, Any]) -> Any:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.insert_one(document)
-        except Exception as e:
-            logging.error(f"Erro ao inserir um documento no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        return await collection.insert_one(document)
 
+    @instrumented("update_one", read=False)
     async def update_one(
         self,
         collection_name: str,
@@ -90,13 +296,10 @@ class MongoDB:
         update: Dict[str, Any],
         upsert: bool = False
     ) -> Any:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.update_one(query, update, upsert=upsert)
-        except Exception as e:
-            logging.error(f"Erro ao atualizar um documento no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        return await collection.update_one(query, update, upsert=upsert)
 
+    @instrumented("update_many", read=False)
     async def update_many(
         self,
         collection_name: str,
@@ -104,35 +307,71 @@ class MongoDB:
         update: Dict[str, Any],
         upsert: bool = False
     ) -> Any:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.update_many(query, update, upsert=upsert)
-        except Exception as e:
-            logging.error(f"Erro ao atualizar vários documentos no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        return await collection.update_many(query, update, upsert=upsert)
         
+    @instrumented("delete_one", read=False)
     async def delete_one(
         self,
         collection_name: str,
         query: Dict[str, Any]
     ) -> Any:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.delete_one(query)
-        except Exception as e:
-            logging.error(f"Erro ao deletar um documento no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        return await collection.delete_one(query)
+
+    @instrumented("delete_many", read=False)
+    async def delete_many(
+        self,
+        collection_name: str,
+        query: Dict[str, Any]
+    ) -> Any:
+        collection = self.get_collection(collection_name)
+        return await collection.delete_many(query)
         
+    @instrumented("bulk_write", read=False)
+    async def bulk_write(self, collection_name: str, operations: list, ordered: bool = True) -> BulkResult:
+        collection = self.get_collection(collection_name)
+        return await run_bulk_write(collection, operations, ordered=ordered)
+
+    def buffer(self, collection_name: str, **kwargs) -> WriteBuffer:
+        """
+        WriteBuffer compartilhado da coleção; os argumentos só valem na primeira chamada.
+        """
+        if collection_name not in self.buffers:
+            self.buffers[collection_name] = WriteBuffer(self, collection_name, **kwargs)
+
+        return self.buffers[collection_name]
+
+    async def flush_buffers(self) -> None:
+        for buffer in list(self.buffers.values()):
+            await buffer.flush()
+
+    @instrumented("aggregate")
     async def aggregate(
         self,
         collection_name: str,
-        pipeline: list
+        pipeline: list,
+        allow_disk_use: bool = False,
+        limit: Optional[int] = None
         ) -> Any:
-        try:
-            collection = self.get_collection(collection_name)
-            return await collection.aggregate(pipeline).to_list(length=None)
-        except Exception as e:
-            logging.error(f"Erro ao realizar uma agregação no MongoDB: {e}")
-            return None
+        collection = self.get_collection(collection_name)
+        cursor = collection.aggregate(pipeline, allowDiskUse=allow_disk_use)
+        return await self._bounded_list(cursor, collection_name, limit)
+
+    async def iter_aggregate(
+        self,
+        collection_name: str,
+        pipeline: list,
+        batch_size: int = 500,
+        allow_disk_use: bool = False
+    ) -> AsyncIterator[dict]:
+        """
+        Executa a agregação retornando os documentos em lotes de `batch_size`.
+        """
+        collection = self.get_collection(collection_name)
+        cursor = collection.aggregate(pipeline, allowDiskUse=allow_disk_use, batchSize=batch_size)
+
+        async for document in self._stream("iter_aggregate", collection_name, cursor):
+            yield document
 
 mongo = MongoDB()
\ No newline at end of file
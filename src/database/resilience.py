@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from pymongo.errors import (
+    AutoReconnect,
+    ConnectionFailure,
+    NotPrimaryError,
+    OperationFailure,
+    PyMongoError,
+    ServerSelectionTimeoutError,
+)
+
+from src.helpers.metrics import MONGO_CIRCUIT_OPEN, MONGO_RETRIES
+
+T = TypeVar("T")
+
+WRITE_CONFLICT = 112
+TRANSIENT_LABELS = ("TransientTransactionError", "RetryableWriteError")
+
+
+class DatabaseError(Exception):
+    """
+    Falha de uma operação no MongoDB, distinta de um resultado vazio.
+    """
+
+    def __init__(self, operation: str, collection: str, error: Exception, retryable: bool = False) -> None:
+        super().__init__(f"{operation} em {collection} falhou: {error}")
+        self.operation = operation
+        self.collection = collection
+        self.retryable = retryable
+
+
+class DatabaseUnavailable(DatabaseError):
+    """
+    O circuito está aberto: a operação nem chegou a ser enviada ao MongoDB.
+    """
+
+
+def is_retryable(error: Exception, read: bool) -> bool:
+    """
+    Erros de rede, troca de primário e WriteConflict são transitórios.
+
+    Escritas só são repetidas quando o servidor garante que não foram aplicadas
+    (sem primário, WriteConflict ou rótulo RetryableWriteError); uma queda de
+    conexão no meio de uma escrita deixa o resultado incerto.
+    """
+    if isinstance(error, (NotPrimaryError, ServerSelectionTimeoutError)):
+        return True
+
+    if isinstance(error, PyMongoError) and any(error.has_error_label(label) for label in TRANSIENT_LABELS):
+        return True
+
+    if isinstance(error, OperationFailure) and error.code == WRITE_CONFLICT:
+        return True
+
+    return read and isinstance(error, (AutoReconnect, ConnectionFailure))
+
+
+def is_infrastructure_error(error: Exception) -> bool:
+    return isinstance(error, (ConnectionFailure, ServerSelectionTimeoutError, NotPrimaryError))
+
+
+class CircuitBreaker:
+    """
+    Abre após `failure_threshold` falhas de infraestrutura seguidas e recusa operações
+    por `reset_timeout` segundos; depois deixa uma operação de teste passar (meio aberto).
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, name: str = "mongodb") -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """
+        Libera a operação de teste sem conclusão sobre o servidor (erro local, cancelamento).
+        """
+        self._probing = False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logging.info(f"Circuito {self.name} fechado novamente.")
+            MONGO_CIRCUIT_OPEN.set(0, circuit=self.name)
+
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+        if self._probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+            if self.opened_at is None:
+                logging.error(f"Circuito {self.name} aberto após {self.failures} falhas seguidas.")
+
+            self.opened_at = time.monotonic()
+            MONGO_CIRCUIT_OPEN.set(1, circuit=self.name)
+
+        self._probing = False
+
+
+class RetryPolicy:
+    """
+    Repete operações com erros transitórios usando backoff exponencial com jitter completo.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.1, max_delay: float = 2.0) -> None:
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        operation: str,
+        collection: str,
+        breaker: CircuitBreaker,
+        read: bool = True,
+    ) -> T:
+        for attempt in range(self.attempts):
+            if not breaker.allow():
+                raise DatabaseUnavailable(operation, collection, Exception("circuito aberto"), retryable=True)
+
+            try:
+                result = await func()
+            except PyMongoError as e:
+                retryable = is_retryable(e, read)
+
+                if is_infrastructure_error(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                if not retryable or attempt + 1 == self.attempts:
+                    raise DatabaseError(operation, collection, e, retryable=retryable) from e
+
+                delay = self.delay(attempt)
+                MONGO_RETRIES.inc(operation=operation)
+                logging.warning(f"{operation} em {collection} falhou ({e}); nova tentativa em {delay:.2f}s.")
+                await asyncio.sleep(delay)
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                breaker.record_success()
+                return result
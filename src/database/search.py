@@ -0,0 +1,190 @@
+"""
+Busca por tokens e paginação por cursor (keyset).
+
+Os documentos pesquisáveis guardam em `search_tokens` os n-gramas normalizados dos
+campos de texto; a busca vira um `$all` sobre um índice multikey em vez de um
+`$regex` com `i`, que sempre varre a coleção. A paginação continua a partir da
+chave de ordenação do último item, então a página 100 custa o mesmo que a primeira.
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import re
+from typing import Callable, Iterable, Optional
+
+from bson import json_util
+from pymongo import UpdateOne
+
+from src.helpers.nlp import make_ngrams
+from src.helpers.string import normalize
+
+SEARCH_FIELD = "search_tokens"
+MIN_TOKEN = 2
+MAX_TOKEN = 15
+
+
+def tokenize(value) -> list[str]:
+    return [word for word in re.split(r"\W+", normalize(str(value), remove_spaces=False)) if word]
+
+
+def search_tokens(*values, prefix_only: bool = False, max_size: int = MAX_TOKEN) -> list[str]:
+    """
+    N-gramas de cada palavra dos valores; com `prefix_only`, só os prefixos
+    (busca "começa com", bem menos tokens por documento).
+    """
+    tokens = set()
+
+    for value in values:
+        if not value:
+            continue
+
+        for word in tokenize(value):
+            tokens.update(make_ngrams(word[:max_size], min_size=MIN_TOKEN, prefix_only=prefix_only))
+
+    return sorted(tokens)
+
+
+def search_filter(term: Optional[str], field: str = SEARCH_FIELD, max_size: int = MAX_TOKEN) -> dict:
+    """
+    Filtro que exige todas as palavras do termo. Palavras menores que o menor
+    n-grama não restringem nada e são ignoradas.
+    """
+    words = sorted({word[:max_size] for word in tokenize(term or "") if len(word) >= MIN_TOKEN})
+
+    if not words:
+        return {}
+
+    return {field: {"$all": words}}
+
+
+def encode_cursor(values: dict) -> str:
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, fields: Iterable[str] = ("_id",)) -> dict:
+    """
+    Levanta ValueError se o cursor não decodifica para um dict com todos os `fields`.
+    """
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+    if not isinstance(values, dict) or any(field not in values for field in fields):
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+    return values
+
+
+def keyset_filter(sort: list[tuple[str, int]], after: Optional[dict]) -> dict:
+    """
+    Documentos depois de `after` na ordem `sort`. O último campo deve ser único (normalmente `_id`).
+
+    [("created_at", -1), ("_id", -1)] vira
+    {"$or": [{"created_at": {"$lt": c}}, {"created_at": c, "_id": {"$lt": i}}]}
+    """
+    if not after:
+        return {}
+
+    clauses = []
+
+    for position, (field, direction) in enumerate(sort):
+        clause = {previous: after[previous] for previous, _ in sort[:position]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": after[field]}
+        clauses.append(clause)
+
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def next_cursor(documents: list[dict], sort: list[tuple[str, int]], limit: int) -> tuple[list[dict], Optional[str]]:
+    """
+    Recebe até `limit + 1` documentos; o excedente só indica que há próxima página.
+    """
+    if len(documents) <= limit:
+        return documents, None
+
+    documents = documents[:limit]
+    last = documents[-1]
+
+    return documents, encode_cursor({field: last.get(field) for field, _ in sort})
+
+
+def preset(collection_name: str) -> tuple[Callable[[dict], list[str]], dict]:
+    """
+    Como gerar os tokens de cada coleção pesquisável: (função, projeção).
+    """
+    if collection_name.startswith("assets"):
+        return (lambda document: search_tokens(document.get("name"))), {"name": 1}
+
+    if collection_name == "clients":
+        from src.database.client_search import CLIENT_SEARCH_PATHS, client_search_tokens
+
+        return client_search_tokens, {path: 1 for path in CLIENT_SEARCH_PATHS}
+
+    raise ValueError(f"Coleção sem busca por tokens: {collection_name}")
+
+
+async def backfill(collection_name: str, batch_size: int = 500) -> int:
+    """
+    Preenche `search_tokens` nos documentos que ainda não têm o campo e cria o índice.
+    """
+    from src.database.mongo import mongo
+
+    tokenizer, projection = preset(collection_name)
+    operations = []
+    updated = 0
+
+    async for document in mongo.iter_find(collection_name, {SEARCH_FIELD: {"$exists": False}}, projection, batch_size):
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {SEARCH_FIELD: tokenizer(document)}}))
+
+        if len(operations) >= batch_size:
+            updated += (await mongo.bulk_write(collection_name, operations, ordered=False)).modified_count
+            operations = []
+
+    if operations:
+        updated += (await mongo.bulk_write(collection_name, operations, ordered=False)).modified_count
+
+    await mongo.ensure_index(collection_name, [(SEARCH_FIELD, 1)])
+
+    logging.info(f"{updated} documentos de {collection_name} com {SEARCH_FIELD} preenchido.")
+
+    return updated
+
+
+async def ensure_search_indexes() -> list[str]:
+    """
+    Cria o índice de `search_tokens` em todas as coleções pesquisáveis. Roda no
+    deploy (ou como tarefa de inicialização), nunca dentro de uma requisição.
+    """
+    from src.database.mongo import mongo
+
+    collections = [name for name in await mongo.collection_names() if name == "clients" or name.startswith("assets")]
+
+    await asyncio.gather(*(mongo.ensure_index(collection, [(SEARCH_FIELD, 1)]) for collection in collections))
+
+    return collections
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preenche search_tokens nas coleções (assets, assets_*, clients).")
+    parser.add_argument("collections", nargs="*")
+    parser.add_argument("--indexes", action="store_true", help="Só cria os índices de busca em todas as coleções.")
+    args = parser.parse_args()
+
+    if not args.collections and not args.indexes:
+        parser.error("informe as coleções ou --indexes")
+
+    async def run():
+        for collection in args.collections:
+            await backfill(collection)
+
+        if args.indexes:
+            logging.info(f"Índices de busca criados em: {', '.join(await ensure_search_indexes())}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,188 @@
-from datetime import datetime
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
+# Listener ativo do setup_queue_logging; uma nova chamada encerra o anterior.
+_listener = None
 
 
-class DailyRotatingFileHandler(RotatingFileHandler):
-    def __init__(self, base_log_path, *args, **kwargs):
+class BatchedFlushMixin:
+    """
+    Adia o flush do arquivo até acumular `flush_records` registros ou passar `flush_interval` segundos.
+    """
+
+    def _init_batching(self, flush_records: int, flush_interval: float):
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        self._pending += 1
+
+        if self._pending >= self.flush_records or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush_pending()
+
+    def flush_pending(self):
+        if self._pending:
+            super().flush()
+
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush_pending()
+        super().close()
+
+
+class BufferedFileHandler(BatchedFlushMixin, logging.FileHandler):
+    def __init__(self, filename, *args, flush_records: int = 100, flush_interval: float = 1.0, **kwargs):
+        self._init_batching(flush_records, flush_interval)
+        super().__init__(filename, *args, **kwargs)
+
+
+class DailyRotatingFileHandler(BatchedFlushMixin, RotatingFileHandler):
+    """
+    Grava em `base_log_path/AAAA/MM/DD/sync.log`, trocando de pasta à meia-noite.
+
+    A troca de dia compara `record.created` com o timestamp da próxima meia-noite,
+    sem formatar datas a cada registro, e o tamanho do arquivo é contado em memória
+    para que a rotação por tamanho não force um flush a cada registro.
+    """
+
+    def __init__(self, base_log_path, *args, flush_records: int = 100, flush_interval: float = 1.0, **kwargs):
         self.base_log_path = Path(base_log_path)
-        self.current_date = datetime.now().strftime("%Y/%m/%d")
-        self._update_log_path()
+        self._init_batching(flush_records, flush_interval)
+        self._update_log_path(datetime.now())
         super().__init__(self.log_file, *args, **kwargs)
+        self._bytes = self.log_file.stat().st_size if self.log_file.exists() else 0
 
-    def _update_log_path(self):
+    def _update_log_path(self, now: datetime):
+        self.current_date = now.strftime("%Y/%m/%d")
         log_path = self.base_log_path / self.current_date
         log_path.mkdir(parents=True, exist_ok=True)
         self.log_file = log_path / "sync.log"
 
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self.next_day_at = tomorrow.timestamp()
+
+    def shouldRollover(self, record):
+        # Tamanho em bytes no arquivo, não em caracteres: os logs têm muito texto acentuado.
+        self._record_size = len((self.format(record) + self.terminator).encode(self.encoding or "utf-8"))
+
+        return self.maxBytes > 0 and self._bytes + self._record_size >= self.maxBytes
+
+    def doRollover(self):
+        super().doRollover()
+        self._bytes = 0
+
     def emit(self, record):
-        new_date = datetime.now().strftime("%Y/%m/%d")
-        if new_date != self.current_date:
-            self.current_date = new_date
-            self._update_log_path()
+        if record.created >= self.next_day_at:
+            self.flush_pending()
+            self._update_log_path(datetime.fromtimestamp(record.created))
             self.baseFilename = str(self.log_file)
 
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+
+            self._bytes = self.log_file.stat().st_size if self.log_file.exists() else 0
+
         super().emit(record)
+        self._bytes += self._record_size
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como uma linha JSON.
+    """
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        if record.exc_text:
+            data["exception"] = record.exc_text
+
+        return json.dumps(data, ensure_ascii=False)
+
+
+class FlushingQueueListener(QueueListener):
+    """
+    QueueListener que descarrega os arquivos quando a fila fica ociosa.
+    """
+
+    def __init__(self, log_queue, *handlers, idle_flush: float = 1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.idle_flush = idle_flush
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, self.idle_flush)
+            except queue.Empty:
+                for handler in self.handlers:
+                    if isinstance(handler, BatchedFlushMixin):
+                        handler.flush_pending()
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+            for handler in self.handlers:
+                if isinstance(handler, BatchedFlushMixin):
+                    handler.flush_pending()
+
+
+def _stop_listener() -> None:
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_queue_logging(*handlers: logging.Handler, level: int = logging.INFO) -> QueueListener:
+    """
+    Troca os handlers do logger raiz por um QueueHandler; os handlers informados
+    passam a escrever em uma thread separada, fora do event loop.
+
+    Uma nova chamada encerra o listener anterior (depois de escrever o que estava
+    na fila) e fecha os handlers dele que não foram passados de novo.
+    """
+    global _listener
+
+    previous = _listener
+    _stop_listener()
+
+    if previous is not None:
+        for handler in previous.handlers:
+            if handler not in handlers:
+                handler.close()
+
+    log_queue = queue.SimpleQueue()
+
+    _listener = FlushingQueueListener(log_queue, *handlers)
+    _listener.start()
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    logger.handlers = [QueueHandler(log_queue)]
+
+    return _listener
+
+
+atexit.register(_stop_listener)
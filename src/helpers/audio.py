@@ -1,13 +1,15 @@
 from pathlib import Path
 
-from moviepy import AudioFileClip as a_clip
-from pydub import AudioSegment
-from pydub.effects import normalize as pydub_normalize
+from src.helpers.lazy import lazy_import
+
+moviepy = lazy_import("moviepy")
+pydub = lazy_import("pydub")
+pydub_effects = lazy_import("pydub.effects")
 
 
 def is_valid(path: Path):
     try:
-        a_clip(path.resolve().as_posix())
+        moviepy.AudioFileClip(path.resolve().as_posix())
         return True
     except Exception:
         return False
@@ -15,9 +17,9 @@ def is_valid(path: Path):
 
 def normalize(path: Path):
     audio_path = path.resolve().as_posix()
-    audio = AudioSegment.from_file(audio_path)
+    audio = pydub.AudioSegment.from_file(audio_path)
 
-    normalized_audio = pydub_normalize(audio)
+    normalized_audio = pydub_effects.normalize(audio)
 
     if normalized_audio.max_dBFS > 0:
         normalized_audio = normalized_audio - normalized_audio.max_dBFS
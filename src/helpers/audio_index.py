@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from src.database.mongo import mongo
+
+NARRATION_AUDIOS_COLLECTION = "narration_audios"
+NARRATION_KINDS = ("opening", "call-us", "slogan")
+
+
+def audio_kind(filename: str) -> str:
+    """
+    `call-us-2.mp3` -> `call-us`; arquivos fora dos tipos conhecidos usam o nome sem extensão.
+    """
+    stem = Path(filename).stem
+
+    for kind in NARRATION_KINDS:
+        if stem == kind or stem.startswith(f"{kind}-"):
+            return kind
+
+    return stem
+
+
+class NarrationAudioIndex:
+    """
+    Registro dos áudios de narração gerados pelo `ElevenLabs.generate` por cliente
+    (`client`, `kind`, `filename`), com o hash do áudio de origem no store.
+
+    O índice não cobre todos os áudios: a pasta do cliente também recebe arquivos
+    gravados por outros fluxos. Por isso a invalidação sempre percorre a pasta
+    (com subpastas) e usa o índice só para limpar as entradas registradas.
+    """
+
+    def __init__(self, collection: str = NARRATION_AUDIOS_COLLECTION) -> None:
+        self.collection = collection
+
+    async def register(self, client: str, filename: str, **fields) -> None:
+        await mongo.update_one(
+            self.collection,
+            {"client": client, "filename": filename},
+            {"$set": {"kind": audio_kind(filename), "updated_at": datetime.now(), **fields}},
+            upsert=True,
+        )
+
+    @staticmethod
+    def _scan(audios_path: Path, kinds: list[str]) -> list[str]:
+        """
+        Caminhos (relativos à pasta do cliente, incluindo subpastas) dos mp3 dos tipos `kinds`.
+        """
+        return [
+            path.relative_to(audios_path).as_posix()
+            for path in audios_path.rglob("*.mp3")
+            if path.is_file() and audio_kind(path.name) in kinds
+        ]
+
+    async def invalidate(self, client: str, audios_path: Path, kinds: Iterable[str]) -> list[str]:
+        """
+        Remove os áudios dos tipos `kinds` (arquivo e entrada no índice); retorna os nomes removidos.
+
+        A pasta do cliente é percorrida inteira, como antes do índice; os nomes
+        registrados no índice entram junto.
+        """
+        kinds = list(kinds)
+
+        if not kinds:
+            return []
+
+        await mongo.ensure_index(self.collection, [("client", 1), ("kind", 1)])
+
+        entries, scanned = await asyncio.gather(
+            mongo.find(self.collection, {"client": client, "kind": {"$in": kinds}}, {"filename": 1}),
+            asyncio.to_thread(self._scan, audios_path, kinds),
+        )
+        filenames = sorted({entry["filename"] for entry in entries} | set(scanned))
+
+        def unlink() -> None:
+            for filename in filenames:
+                (audios_path / filename).unlink(missing_ok=True)
+
+        await asyncio.to_thread(unlink)
+        await mongo.delete_many(self.collection, {"client": client, "kind": {"$in": kinds}})
+
+        if filenames:
+            logging.info(f"Áudios de narração removidos de {client}: {', '.join(filenames)}")
+
+        return filenames
+
+    async def rename_client(self, client: str, new_client: str) -> None:
+        if client != new_client:
+            await mongo.update_many(self.collection, {"client": client}, {"$set": {"client": new_client}})
+
+
+narration_audio_index = NarrationAudioIndex()
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+
+
+def content_hash(data: bytes, *parts: str) -> str:
+    digest = hashlib.sha256(data)
+
+    for part in parts:
+        digest.update(b"\0" + str(part).encode())
+
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    Cache em disco endereçado pelo hash do conteúdo de entrada.
+
+    Cada entrada é um arquivo `<raiz>/<2 primeiros>/<hash><suffix>`; a leitura
+    atualiza o mtime e, quando o total passa de `max_bytes`, os arquivos menos
+    usados recentemente são removidos.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, suffix: str = "") -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def path_for(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}{self.suffix}"
+
+    def _entries(self) -> list[Path]:
+        return [
+            path
+            for path in self.path.glob(f"*/*{self.suffix}")
+            if path.is_file() and not path.name.startswith(".")
+        ]
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(path.stat().st_size for path in self._entries())
+
+        return self._size
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Grava em um arquivo temporário e renomeia para nunca expor uma entrada pela metade.
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+
+        with self._lock:
+            size = self._current_size() - (path.stat().st_size if path.exists() else 0)
+            os.replace(tmp_path, path)
+            self._size = size + len(data)
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+        return path
+
+    def put_path(self, key: str, source: Path) -> Path:
+        """
+        Move um arquivo já gravado (ex.: download em streaming) para o cache.
+        """
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        size = Path(source).stat().st_size
+
+        with self._lock:
+            current = self._current_size() - (path.stat().st_size if path.exists() else 0)
+            os.replace(source, path)
+            self._size = current + size
+
+            if self._size > self.max_bytes:
+                self._evict()
+
+        return path
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda path: path.stat().st_mtime)
+        removed = 0
+
+        for path in entries:
+            if self._size <= target:
+                break
+
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+
+            self._size -= size
+            removed += 1
+
+        logging.info(f"Cache {self.path.name}: {removed} entradas removidas, {self._size / 1024 / 1024:.1f} MB em uso.")
@@ -118,3 +118,44 @@ async def download_file(
         )
 
     return result
+
+
+async def fetch_metadata(url: str, timeout: float = 30) -> dict:
+    """
+    Tamanho, mimetype e nome de um arquivo remoto sem baixar o conteúdo.
+
+    Usa HEAD e, se o servidor não informar o tamanho (ou não aceitar HEAD), um GET
+    de um único byte com Range, lendo o total do Content-Range.
+    """
+    filename = Path(urlparse(url).path).name
+    size = None
+    content_type = None
+
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        try:
+            async with session.head(url, allow_redirects=True) as response:
+                if response.status == 200:
+                    content_type = response.headers.get("content-type")
+                    size = response.content_length
+        except aiohttp.ClientError as e:
+            logging.warning(f"HEAD {url} falhou: {e}")
+
+        if size is None:
+            async with session.get(url, headers={"Range": "bytes=0-0"}) as response:
+                if response.status not in (200, 206):
+                    raise Exception(f"Failed to request {url} with status code {response.status}")
+
+                content_type = content_type or response.headers.get("content-type")
+                content_range = response.headers.get("content-range", "")
+
+                if "/" in content_range and not content_range.endswith("*"):
+                    size = int(content_range.rsplit("/", 1)[1])
+                elif response.status == 200:
+                    size = response.content_length
+
+    mimetype = (content_type or "").split(";")[0].strip() or None
+
+    if not mimetype or mimetype == "application/octet-stream":
+        mimetype = mimetypes.guess_type(filename, strict=False)[0] or mimetype
+
+    return {"size": size or 0, "mimetype": mimetype, "filename": filename}
@@ -1,9 +1,8 @@
 import uuid
 
-from pydub import AudioSegment
-
 from config import TMP_PATH, openai
 from src.helpers.download import download_file
+from src.helpers.lazy import lazy_import
 from src.models.analytics import (
     GPT,
     GPTAvailableModels,
@@ -12,6 +11,8 @@ from src.models.analytics import (
 )
 from src.models.zapi import MessageTypes
 
+pydub = lazy_import("pydub")
+
 
 async def speech_to_text(message: MessageTypes, session):
     session.flow.lockCreation = True
@@ -22,7 +23,7 @@ async def speech_to_text(message: MessageTypes, session):
     )
     tmp_file_path = session.session_path / f"{uuid.uuid4().hex}.mp3"
 
-    audio = AudioSegment.from_file(tmp_audio_file)
+    audio = pydub.AudioSegment.from_file(tmp_audio_file)
 
     audio.export(tmp_file_path, format="mp3")
 
@@ -1,18 +1,50 @@
-import colorsys
 from io import BytesIO
 from pathlib import Path
 
-import cv2
-import numpy as np
-import rembg
 import requests
 from PIL import Image as PILImage
 
 import src.helpers.color as colorutils
 from src.helpers.is_ import Is as is_
+from src.helpers.lazy import lazy_import
 
-rgb_to_hsv = np.vectorize(colorsys.rgb_to_hsv)
-hsv_to_rgb = np.vectorize(colorsys.hsv_to_rgb)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+
+def hsv_with_hue(r, g, b, hue: float, saturation=None):
+    """
+    Equivalente vetorizado de colorsys.rgb_to_hsv seguido de colorsys.hsv_to_rgb
+    trocando o matiz por `hue` (e a saturação por `saturation`, se informada).
+
+    Segue as mesmas operações de ponto flutuante do colorsys para gerar
+    exatamente os mesmos valores.
+    """
+    v = np.maximum(np.maximum(r, g), b)
+
+    if saturation is None:
+        minc = np.minimum(np.minimum(r, g), b)
+        rangec = v - minc
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.where(rangec == 0, 0.0, rangec / v)
+    else:
+        s = saturation
+
+    i = int(hue * 6.0)
+    f = (hue * 6.0) - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+
+    return {
+        0: (v, t, p),
+        1: (q, v, p),
+        2: (p, v, t),
+        3: (p, q, v),
+        4: (t, p, v),
+        5: (v, p, q),
+    }[i % 6]
 
 
 class ImageEffects(object):
@@ -27,20 +59,13 @@ class ImageEffects(object):
                 return self.image
 
         img = self.image.convert("RGBA")
-        arr = np.array(np.asarray(img).astype("float"))
+        arr = np.asarray(img, dtype=float)
 
         hue = hue / 360
         sout = sout / 100
 
         r, g, b, a = np.rollaxis(arr, axis=-1)
-        h, s, v = rgb_to_hsv(r, g, b)
-
-        h = hue
-
-        if shape == "true":
-            s = sout
-
-        r, g, b = hsv_to_rgb(h, s, v)
+        r, g, b = hsv_with_hue(r, g, b, hue, sout if shape == "true" else None)
 
         new_img = PILImage.fromarray(np.dstack((r, g, b, a)).astype("uint8"), "RGBA")
 
@@ -52,7 +77,12 @@ class ImageTransformations(object):
         self.image = image
 
     def removebg(self):
-        self.image = rembg.remove(self.image)
+        from src.helpers.removebg import background_remover
+
+        buffer = BytesIO()
+        self.image.save(buffer, format="PNG")
+
+        self.image = PILImage.open(BytesIO(background_remover.remove_sync(buffer.getvalue())))
         return self
 
     def crop(self):
@@ -113,119 +143,196 @@ class Image(object):
 
     @staticmethod
     def is_equal(image, filepath):
-        original_image = cv2.imread(str(image))
-        cached_image = cv2.imread(str(filepath))
+        return ImagePipeline.load(image).equals(ImagePipeline.load(filepath))
 
-        if original_image.shape == cached_image.shape:
-            diff = cv2.subtract(original_image, cached_image)
+    @staticmethod
+    def create_mask(processed_image):
+        return Image(ImagePipeline.load(processed_image).mask().to_pil())
+
+    @staticmethod
+    def removebg_with_mask(original, mask):
+        return Image(ImagePipeline.load(original).apply_mask(ImagePipeline.load(mask)).to_pil())
+
+    @staticmethod
+    def apply_blur_to_edges(image):
+        return Image(ImagePipeline.load(image).blur_edges().to_pil())
+
+    def __getattr__(self, name):
+        return getattr(self.image, name)
 
-            b, g, r = cv2.split(diff)
 
-            if not (
-                cv2.countNonZero(b) == 0
-                and cv2.countNonZero(g) == 0
-                and cv2.countNonZero(r) == 0
-            ):
-                return False
-        else:
-            return False
 
-        return True
+class ImagePipeline(object):
+    """
+    Decodifica a imagem uma vez e aplica as operações em um único ndarray RGBA
+    (ordem de canais do PIL), sem passar pelo disco entre as etapas. A conversão
+    para PIL compartilha o buffer; só `encode`/`save` codificam a imagem.
+    """
 
-    @staticmethod
-    def create_mask(processed_image):
-        img = cv2.imread(str(processed_image), cv2.IMREAD_UNCHANGED)
+    def __init__(self, array):
+        self.array = array
 
-        img[np.where((img[:, :, 3] >= 200))] = [255, 255, 255, 255]
-        img[np.where((img[:, :, 3] < 200))] = [0, 0, 0, 255]
+    @classmethod
+    def load(cls, source) -> "ImagePipeline":
+        if isinstance(source, ImagePipeline):
+            return source
 
-        return Image(img)
+        if isinstance(source, PILImage.Image):
+            image = source if source.mode == "RGBA" else source.convert("RGBA")
+            return cls(np.array(image))
+
+        if isinstance(source, np.ndarray):
+            return cls(cls._to_rgba(source))
+
+        if isinstance(source, BytesIO):
+            source = source.getvalue()
+
+        if isinstance(source, (str, Path)):
+            if is_.url(str(source)):
+                source = requests.get(str(source)).content
+            else:
+                source = Path(source).read_bytes()
+
+        array = cv2.imdecode(np.frombuffer(source, np.uint8), cv2.IMREAD_UNCHANGED)
+
+        if array is None:
+            raise TypeError("Image error - invalid type")
+
+        return cls(cls._from_cv2(array))
 
     @staticmethod
-    def removebg_with_mask(original, mask):
-        original_image = cv2.imread(str(original), cv2.IMREAD_UNCHANGED)
-        mask_image = cv2.imread(str(mask), cv2.IMREAD_UNCHANGED)
+    def _from_cv2(array):
+        if array.ndim == 2:
+            return cv2.cvtColor(array, cv2.COLOR_GRAY2RGBA)
 
-        original_image[np.all(mask_image == [0, 0, 0, 255], axis=-1)] = [0, 0, 0, 0]
+        if array.shape[2] == 3:
+            return cv2.cvtColor(array, cv2.COLOR_BGR2RGBA)
 
-        return Image(original_image)
+        return cv2.cvtColor(array, cv2.COLOR_BGRA2RGBA)
 
     @staticmethod
-    def apply_blur_to_edges(image):
-        original = cv2.imread(str(image), cv2.IMREAD_UNCHANGED)
-        image = cv2.imread(str(image), cv2.IMREAD_UNCHANGED)
+    def _to_rgba(array):
+        if array.ndim == 2:
+            return cv2.cvtColor(array, cv2.COLOR_GRAY2RGBA)
+
+        if array.shape[2] == 3:
+            return cv2.cvtColor(array, cv2.COLOR_RGB2RGBA)
+
+        return np.ascontiguousarray(array)
+
+    @property
+    def alpha(self):
+        return self.array[:, :, 3]
+
+    def mask(self, threshold: int = 200) -> "ImagePipeline":
+        """
+        Branco opaco onde alpha >= threshold, preto opaco no resto.
+        """
+        solid = self.alpha >= threshold
+        self.array[solid] = (255, 255, 255, 255)
+        self.array[~solid] = (0, 0, 0, 255)
+        return self
 
-        kernelSizes = [(41, 41)]
+    def apply_mask(self, mask: "ImagePipeline") -> "ImagePipeline":
+        """
+        Torna transparentes os pixels pretos da máscara.
+        """
+        self.array[np.all(mask.array == (0, 0, 0, 255), axis=-1)] = (0, 0, 0, 0)
+        return self
 
-        for kx, ky in kernelSizes:
-            blurred = cv2.GaussianBlur(image, (kx, ky), 0)
+    def blur_edges(self, kernel: int = 41, radius: int = 200) -> "ImagePipeline":
+        """
+        Desfoca um círculo de `radius` no centro e mantém o restante nítido, com
+        transição suave: a mesma fórmula do `apply_blur_to_edges` antigo.
+        """
+        height, width = self.array.shape[:2]
 
-            mask = np.zeros(image.shape, dtype=np.uint8)
+        weight = np.zeros((height, width), dtype=np.float32)
+        cv2.circle(weight, (width // 2, height // 2), radius, 1.0, -1, cv2.LINE_AA)
+        weight = cv2.GaussianBlur(weight, (kernel, kernel), 0)[:, :, None]
 
-            cv2.circle(
-                mask,
-                (int(image.shape[1] / 2), int(image.shape[0] / 2)),
-                200,
-                (255, 255, 255),
-                -1,
-                cv2.LINE_AA,
-            )
+        blurred = cv2.GaussianBlur(self.array, (kernel, kernel), 0)
+        self.array = (blurred * weight + self.array * (1 - weight)).round().astype(np.uint8)
+        return self
 
-            mask = cv2.GaussianBlur(mask, (kx, ky), 0)
+    def colorize(self, color, shape: str = "false") -> "ImagePipeline":
+        try:
+            hue, sout, _ = colorutils.to_hsl(color)
+        except ValueError:
+            return self
+
+        r, g, b = (self.array[:, :, channel].astype(float) for channel in range(3))
+        r, g, b = hsv_with_hue(r, g, b, hue / 360, sout / 100 if shape == "true" else None)
 
-            image = blurred * (mask / 255) + image * (1 - mask / 255)
+        self.array[:, :, :3] = np.dstack((r, g, b)).astype(np.uint8)
+        return self
 
-        image[0 : original.shape[0], 0 : original.shape[1]] = original
+    def crop(self) -> "ImagePipeline":
+        rows = np.flatnonzero(self.alpha.any(axis=1))
+        columns = np.flatnonzero(self.alpha.any(axis=0))
 
-        return Image(image)
+        if rows.size:
+            self.array = np.ascontiguousarray(self.array[rows[0] : rows[-1] + 1, columns[0] : columns[-1] + 1])
 
-    def __getattr__(self, name):
-        return getattr(self.image, name)
+        return self
 
+    def equals(self, other: "ImagePipeline") -> bool:
+        """
+        Compara só os canais de cor, como a comparação antiga com cv2.imread.
+        """
+        return self.array.shape == other.array.shape and np.array_equal(self.array[:, :, :3], other.array[:, :, :3])
 
-def get_pixel_with_neighbors(img_array, x, y):
-    neighbors = []
-    height, width, _ = img_array.shape
+    def to_pil(self) -> PILImage.Image:
+        return PILImage.fromarray(self.array)
 
-    for i in range(max(0, x - 1), min(height, x + 2)):
-        for j in range(max(0, y - 1), min(width, y + 2)):
-            if i != x or j != y:
-                neighbors.append(img_array[i, j])
+    def encode(self, extension: str = ".png", params: tuple = ()) -> bytes:
+        ok, buffer = cv2.imencode(extension, cv2.cvtColor(self.array, cv2.COLOR_RGBA2BGRA), list(params))
 
-    return neighbors
+        if not ok:
+            raise ValueError(f"Falha ao codificar a imagem em {extension}")
 
+        return buffer.tobytes()
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.write_bytes(self.encode(path.suffix or ".png"))
+        return path
 
-def check_if_border_pixel_is_dark(img_path: str):
-    img = np.array(PILImage.open(img_path).convert("RGBA"))
 
-    count_rgb_pixels = 0
-    sum_brightness_pixels = 0
+def neighbor_count(mask):
+    """
+    Quantos dos 8 vizinhos de cada pixel estão marcados em `mask` (convolução 3x3
+    sem o centro; fora da imagem conta como não marcado).
+    """
+    padded = np.pad(mask.astype(np.int32), 1)
+    height, width = mask.shape
 
-    for x, row in enumerate(img):
-        for y, pixel in enumerate(row):
-            _, _, _, a = pixel
+    return sum(
+        padded[1 + dy : 1 + dy + height, 1 + dx : 1 + dx + width]
+        for dy in (-1, 0, 1)
+        for dx in (-1, 0, 1)
+        if dy or dx
+    )
 
-            if a != 0:
-                neighbors = get_pixel_with_neighbors(img, x, y)
-                without_transparency = list(
-                    filter(lambda pixel: pixel[3] != 0, neighbors)
-                )
 
-                has_transparency = (
-                    len(list(filter(lambda pixel: pixel[3] == 0, neighbors))) > 0
-                )
+def border_brightness(img) -> float:
+    """
+    Média de brilho dos pixels opacos vizinhos da borda do logo (pixels opacos que
+    tocam a transparência), ponderada por quantos pixels de borda cada um toca.
+    """
+    opaque = img[:, :, 3] != 0
+    border = opaque & (neighbor_count(~opaque) > 0)
+    weights = np.where(opaque, neighbor_count(border), 0)
 
-                if not has_transparency:
-                    continue
+    rgb_sum = img[:, :, :3].sum(axis=2, dtype=np.int64)
 
-                brightness_pixels = list(
-                    map(
-                        lambda pixel: sum([pixel[0], pixel[1], pixel[2]]) / 3,
-                        without_transparency,
-                    )
-                )
+    count_rgb_pixels = int(weights.sum())
+    sum_brightness_pixels = int((rgb_sum * weights).sum()) / 3
 
-                count_rgb_pixels += len(brightness_pixels)
-                sum_brightness_pixels += sum(brightness_pixels)
+    return sum_brightness_pixels / count_rgb_pixels
+
+
+def check_if_border_pixel_is_dark(img_path: str):
+    img = np.asarray(PILImage.open(img_path).convert("RGBA"))
 
-    return True if (sum_brightness_pixels / count_rgb_pixels) >= (255 / 2) else False
+    return True if border_brightness(img) >= (255 / 2) else False
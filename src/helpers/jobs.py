@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+
+import config
+from src.database.mongo import mongo
+from src.helpers.tasks import run_in_background
+
+JOBS_COLLECTION = "jobs"
+
+
+class JobStatus:
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class JobQueue:
+    """
+    Tarefas demoradas disparadas por rotas, executadas no próprio processo.
+
+    O estado fica na coleção `jobs` (consultada por polling) e, se a rota receber
+    um `webhook`, o documento final do job é enviado por POST para ele. No máximo
+    `concurrency` jobs rodam ao mesmo tempo; os documentos expiram depois de `ttl` segundos.
+    """
+
+    def __init__(
+        self,
+        collection: str = JOBS_COLLECTION,
+        concurrency: int = config.JOBS_CONCURRENCY,
+        ttl: int = config.JOBS_TTL,
+    ) -> None:
+        self.collection = collection
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        return self._semaphore
+
+    async def submit(
+        self,
+        kind: str,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        webhook: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+
+        await mongo.ensure_index(self.collection, [("created_at", 1)], expireAfterSeconds=self.ttl)
+        await mongo.insert_one(
+            self.collection,
+            {
+                "_id": job_id,
+                "kind": kind,
+                "status": JobStatus.queued,
+                "metadata": metadata or {},
+                "webhook": webhook,
+                "result": None,
+                "error": None,
+                "created_at": datetime.now(),
+                "updated_at": datetime.now(),
+            },
+        )
+
+        run_in_background(self._run(job_id, func, *args), name=f"job:{kind}:{job_id}")
+
+        return job_id
+
+    async def _set(self, job_id: str, **fields) -> Optional[dict]:
+        return await mongo.find_one_and_update(
+            self.collection,
+            {"_id": job_id},
+            {"$set": {**fields, "updated_at": datetime.now()}},
+        )
+
+    async def _run(self, job_id: str, func: Callable[..., Awaitable[Any]], *args) -> None:
+        async with self.semaphore:
+            await self._set(job_id, status=JobStatus.running)
+
+            try:
+                result = await func(*args)
+            except Exception as e:
+                logging.exception(f"Job {job_id} falhou: {e}")
+                job = await self._set(job_id, status=JobStatus.failed, error=str(e))
+            else:
+                job = await self._set(job_id, status=JobStatus.done, result=result)
+
+        if job and job.get("webhook"):
+            await self._notify(job)
+
+    async def _notify(self, job: dict, attempts: int = 3) -> None:
+        payload = {
+            "id": job["_id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "result": job["result"],
+            "error": job["error"],
+            "metadata": job["metadata"],
+        }
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            for attempt in range(attempts):
+                try:
+                    async with session.post(job["webhook"], json=payload) as response:
+                        response.raise_for_status()
+                        return
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logging.warning(f"Webhook do job {job['_id']} falhou ({attempt + 1}/{attempts}): {e}")
+                    await asyncio.sleep(2**attempt)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = await mongo.find_one(self.collection, {"_id": job_id}, {"webhook": 0})
+
+        if job:
+            job["id"] = job.pop("_id")
+
+        return job
+
+
+jobs = JobQueue()
@@ -0,0 +1,54 @@
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule(ModuleType):
+    """
+    Proxy que só importa o módulo no primeiro acesso a um atributo.
+
+    Usado para dependências pesadas (cv2, rembg, spacy, moviepy, firebase_admin)
+    que só algumas rotas precisam; assim importar o app ou um script não paga o
+    custo de carregá-las.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    logging.debug(f"Módulo {self.__name__} carregado sob demanda em {time.perf_counter() - start:.2f}s")
+                    self.__dict__["_lazy_module"] = module
+
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "carregado" if self.loaded else "não carregado"
+        return f"<LazyModule {self.__name__} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -30,17 +30,18 @@ async def create_template(prospect_client_id: ObjectId):
 
         print("Get templates")
 
-        templates = await mongo.find(
+        template = await mongo.find_one(
             "templates",
             {
+                "_id": ObjectId(template_id),
                 "designs.design": {"$exists": True}
             }
         )
 
-        if not templates:
+        if not template:
             raise Exception("No templates found") 
 
-        templates = {str(template["_id"]): template for template in templates}
+        templates = {str(template["_id"]): template}
 
         print("Get clients")
 
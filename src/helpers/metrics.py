@@ -0,0 +1,212 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+try:
+    from opentelemetry import trace
+
+    tracer = trace.get_tracer("db_prospection")
+except ImportError:
+    tracer = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: tuple, extra: Optional[dict] = None) -> str:
+    pairs = list(labels) + list((extra or {}).items())
+
+    if not pairs:
+        return ""
+
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    @staticmethod
+    def _key(labels: dict) -> tuple:
+        return tuple(sorted(labels.items()))
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+            lines.extend(self._samples())
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self) -> Iterable[str]:
+        for labels, (counts, total, count) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket{_format_labels(labels, {'le': bound})} {bucket_count}"
+
+            yield f"{self.name}_bucket{_format_labels(labels, {'le': '+Inf'})} {count}"
+            yield f"{self.name}_sum{_format_labels(labels)} {total}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._register(Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        """
+        Exporta as métricas no formato texto do Prometheus.
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+PROSPECTION_STAGE_SECONDS = registry.histogram(
+    "prospection_stage_seconds", "Duração de cada etapa da prospecção (claim, phone_check, send, crm_update, db_write)."
+)
+PROSPECTION_OUTCOMES = registry.counter(
+    "prospection_outcomes_total", "Resultado de cada prospect processado (sent, no_whatsapp, send_failure, skipped, exception)."
+)
+PROSPECTION_ACTIVE_INSTANCES = registry.gauge(
+    "prospection_active_instances", "Instâncias com tarefa de prospecção em execução por campanha."
+)
+ZAPI_INSTANCE_CONNECTED = registry.gauge("zapi_instance_connected", "1 se a instância Z-API estava conectada na última verificação.")
+ZAPI_REQUEST_SECONDS = registry.histogram("zapi_request_seconds", "Duração das requisições à Z-API.")
+AGENDOR_REQUEST_SECONDS = registry.histogram("agendor_request_seconds", "Duração das requisições ao Agendor.")
+MONGO_OPERATION_SECONDS = registry.histogram(
+    "mongo_operation_seconds", "Duração das operações no MongoDB.", buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+MONGO_RETRIES = registry.counter("mongo_retries_total", "Novas tentativas de operações no MongoDB após erros transitórios.")
+MONGO_CIRCUIT_OPEN = registry.gauge("mongo_circuit_open", "1 enquanto o circuito do MongoDB está aberto.")
+MONGO_POOL_CONNECTIONS = registry.gauge("mongo_pool_connections", "Conexões do pool do MongoDB por estado (open, in_use).")
+MONGO_POOL_MAX_SIZE = registry.gauge("mongo_pool_max_size", "maxPoolSize configurado por servidor.")
+MONGO_POOL_CHECKOUT_SECONDS = registry.histogram(
+    "mongo_pool_checkout_seconds", "Espera por uma conexão livre no pool do MongoDB.", buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+)
+REMOVEBG_REQUESTS = registry.counter(
+    "removebg_requests_total", "Remoções de fundo por resultado (cache_hit, deduplicated, processed, picwish)."
+)
+REMOVEBG_SECONDS = registry.histogram("removebg_seconds", "Duração da remoção de fundo por backend.")
+MONGO_POOL_CHECKOUT_FAILURES = registry.counter("mongo_pool_checkout_failures_total", "Falhas ao obter conexão do pool do MongoDB.")
+THUMBNAIL_SECONDS = registry.histogram("thumbnail_seconds", "Tempo para gerar e enviar as miniaturas de uma imagem.")
+THUMBNAIL_FAILURES = registry.counter("thumbnail_failures_total", "Imagens cujas miniaturas não puderam ser geradas.")
+NARRATION_REQUESTS = registry.counter(
+    "narration_requests_total", "Áudios de narração pedidos ao store por resultado (cache_hit, deduplicated, synthesized, evicted)."
+)
+SYLLABLE_LOOKUPS = registry.counter(
+    "syllable_lookups_total", "Separações silábicas por origem (dictionary, rules, remote, remote_miss, remote_error)."
+)
+
+
+@contextmanager
+def timer(histogram: Histogram, span: Optional[str] = None, **labels):
+    """
+    Mede o bloco no histograma e, com OpenTelemetry instalado, abre um span com os mesmos atributos.
+    """
+    start = time.perf_counter()
+
+    if tracer is None:
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+        return
+
+    with tracer.start_as_current_span(span or histogram.name, attributes={key: str(value) for key, value in labels.items()}):
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, **labels)
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0"):
+    """
+    Expõe /metrics em um servidor aiohttp para processos sem FastAPI (workers de prospecção).
+    """
+    from aiohttp import web
+
+    async def handler(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+
+    logging.info(f"Métricas disponíveis em http://{host}:{port}/metrics")
+
+    return runner
@@ -1,8 +1,10 @@
 import re
 
-import requests
 from num2words import num2words
 
+import config
+from src.helpers.syllables import syllabify, syllable_dictionary
+
 
 def cellphone(phone: str):
     phone = re.sub(r"[^\d]", "", phone).strip()
@@ -41,50 +43,15 @@ def numbers_to_text_grouped(text: str):
 
 
 def get_syllables(phrase: str):
-    new_word = ""
-    new_syllables = ""
-
-    try:
-        for word in phrase.split():
-            response = requests.get(
-                f"https://www.separaremsilabas.com/index.php?lang=index.php&p={word}&button=Separa%C3%A7%C3%A3o+das+s%C3%ADlabas"
-            )
-
-            map_vowel = {"a": "â", "e": "ê", "i": "î", "o": "ô", "u": "û"}
-
-            def process_tonic(tonic):
-                vowels = re.findall(r"[aeiou]", tonic, re.I | re.M)
-
-                if not vowels:
-                    return tonic
-
-                replace_vowel = (
-                    vowels[-1] if vowels[0] == "u" and len(vowels) > 1 else vowels[0]
-                )
-
-                return tonic.replace(replace_vowel, map_vowel[replace_vowel])
-
-            regex = r"([\w-]+)?<strong>(\w+)</strong>([\w-]+)?"
+    """
+    Sílabas e palavras com a tônica marcada, sem rede: dicionário local ou regras.
+    Palavras fora do dicionário são consultadas no site em segundo plano.
+    """
+    syllables, words = zip(*(syllabify(word) for word in phrase.split())) if phrase.split() else ((), ())
 
-            if find := re.findall(regex, response.text, re.I | re.M):
-                syllables = list(find[0])
+    syllable_dictionary.schedule_lookup()
 
-                if not syllables[0] and not syllables[2] and not syllables[1].isascii():
-                    new_syllables += syllables[1] + " "
-                    new_word += syllables[1] + " "
-                    continue
-
-                tonic = process_tonic(syllables[1])
-
-                syllables[1] = tonic
-                syllables = [y for x in syllables for y in x.split("-") if y]
-
-                new_syllables += "-".join(syllables) + " "
-                new_word += "".join(syllables) + " "
-    except:
-        return {"syllables": None, "word": phrase}
-
-    return {"syllables": new_syllables, "word": new_word}
+    return {"syllables": " ".join(syllables), "word": " ".join(words)}
 
 
 def replace_using_words(text: str, words_map: dict = {}):
@@ -111,13 +78,26 @@ def text_to_narration(text: str, words_map: dict = {}):
         word = replace_using_words(lower_word, words_map)
 
         if word == lower_word and not word.isnumeric():
-            word = get_syllables(word)["word"]
+            word = syllabify(word)[1]
 
         narration_text.append(numbers_to_text_grouped(word))
 
+    syllable_dictionary.schedule_lookup()
+
     return " ".join(narration_text)
 
 
+async def text_to_narration_async(text: str, words_map: dict = {}):
+    """
+    Como `text_to_narration`, mas antes consulta no site (em lote) as palavras
+    que ainda não estão no dicionário, para usar a separação dele já nesta frase.
+    """
+    if config.SYLLABLES_REMOTE:
+        await syllable_dictionary.lookup(text.split())
+
+    return text_to_narration(text, words_map)
+
+
 def number_to_price(price):
     return num2words(
         float(str(re.sub(r"[^0-9\.,]", "", price)).replace(",", ".")),
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import shutil
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import config
+from src.helpers import audio
+from src.helpers.cache import ContentCache, content_hash
+from src.helpers.metrics import NARRATION_REQUESTS
+
+Synthesizer = Callable[[Path, str], Awaitable[None]]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Mesma frase, mesma chave: ignora diferenças de espaço, caixa e composição Unicode.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split()).casefold()
+
+
+class NarrationStore:
+    """
+    Áudios de narração endereçados por hash de (voz, modelo, texto normalizado).
+
+    Cada frase é sintetizada uma vez para toda a base de clientes; os áudios dos
+    clientes são cópias do arquivo do store (não hardlinks: o arquivo do cliente pode
+    ser reescrito sem afetar o store). O `synthesize` entrega um áudio
+    válido (e repete a chamada à API quando não é); o store normaliza antes de
+    guardar, então quem usa não precisa reprocessar.
+    """
+
+    def __init__(self, cache: Optional[ContentCache] = None) -> None:
+        self.cache = cache or ContentCache(config.NARRATION_STORE_PATH, config.NARRATION_STORE_MAX_BYTES, ".mp3")
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def key(text: str, voice_id: str, model: str) -> str:
+        return content_hash(normalize_text(text).encode(), voice_id, model)
+
+    async def _create(self, key: str, text: str, synthesize: Synthesizer) -> Path:
+        # Começa com ponto: o ContentCache ignora o arquivo até ele ser movido para a chave.
+        tmp_path = self.cache.path_for(key).with_name(f".{uuid.uuid4().hex}.mp3")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            await synthesize(tmp_path, text)
+            await asyncio.to_thread(audio.normalize, tmp_path)
+
+            return await asyncio.to_thread(self.cache.put_path, key, tmp_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    async def get(self, text: str, voice_id: str, model: str, synthesize: Synthesizer) -> Path:
+        key = self.key(text, voice_id, model)
+        path = self.cache.path_for(key)
+
+        try:
+            # Mantém o arquivo como recente para a limpeza por tamanho do ContentCache.
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        else:
+            NARRATION_REQUESTS.inc(result="cache_hit")
+            return path
+
+        if key in self._in_flight:
+            NARRATION_REQUESTS.inc(result="deduplicated")
+            return await asyncio.shield(self._in_flight[key])
+
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+
+        try:
+            path = await self._create(key, text, synthesize)
+            NARRATION_REQUESTS.inc(result="synthesized")
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _copy(self, source: Path, target: Path) -> Path:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{uuid.uuid4().hex}.tmp")
+
+        try:
+            # Com o lock do cache a entrada não é removida pela limpeza no meio da cópia.
+            with self.cache._lock:
+                shutil.copyfile(source, tmp_path)
+                os.utime(source)
+
+            tmp_path.replace(target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        return target
+
+    async def materialize(self, source: Path, target: Path) -> Path:
+        """
+        Copia a entrada do store para `target`; FileNotFoundError se ela já foi removida.
+        """
+        return await asyncio.to_thread(self._copy, source, target)
+
+    async def get_into(self, text: str, voice_id: str, model: str, synthesize: Synthesizer, target: Path) -> Path:
+        """
+        `get` + `materialize`: se a entrada some entre os dois (limpeza do cache),
+        ela é gerada de novo. Retorna o arquivo do store.
+        """
+        for attempt in range(2):
+            source = await self.get(text, voice_id, model, synthesize)
+
+            try:
+                await self.materialize(source, target)
+                return source
+            except FileNotFoundError:
+                if attempt:
+                    raise
+
+                NARRATION_REQUESTS.inc(result="evicted")
+
+
+narration_store = NarrationStore()
@@ -1,6 +1,16 @@
-import spacy
+import functools
 
-spacy_nlp = spacy.load("pt_core_news_sm")
+from src.helpers.lazy import lazy_import
+
+spacy = lazy_import("spacy")
+
+
+@functools.cache
+def get_nlp():
+    """
+    Carrega o modelo do spaCy no primeiro uso (leva segundos e algumas centenas de MB).
+    """
+    return spacy.load("pt_core_news_sm")
 
 
 def make_ngrams(word, min_size: int = 2, prefix_only: bool = False):
@@ -35,7 +45,7 @@ def create_ngrams(name_varietys):
 
 
 def process_text(text):
-    doc = spacy_nlp(text)
+    doc = get_nlp()(text)
 
     filtered_words = [token.text for token in doc if not token.is_stop]
 
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import config
+from src.helpers.cache import ContentCache, content_hash
+from src.helpers.metrics import REMOVEBG_REQUESTS, REMOVEBG_SECONDS, timer
+
+# Estado de cada processo do pool: a sessão do rembg (modelo ONNX) é criada uma
+# vez no initializer e reaproveitada em todas as chamadas.
+_session = None
+
+
+def _init_worker(model: str) -> None:
+    global _session
+
+    import rembg
+
+    _session = rembg.new_session(model)
+
+
+def _remove_batch(images: list[bytes]) -> list[bytes]:
+    import rembg
+
+    return [rembg.remove(image, session=_session) for image in images]
+
+
+class BackgroundRemover:
+    """
+    Remove fundos em um pool de processos com o modelo do rembg já carregado.
+
+    O resultado (PNG RGBA) fica em um cache em disco indexado pelo hash da imagem
+    de entrada, então o reenvio da mesma foto não reprocessa nada; chamadas
+    simultâneas para a mesma imagem compartilham o mesmo trabalho. Se o pool falhar,
+    a imagem é enviada para a Picwish.
+    """
+
+    def __init__(
+        self,
+        workers: int = config.REMOVEBG_WORKERS,
+        model: str = config.REMOVEBG_MODEL,
+        batch_size: int = 4,
+        cache: Optional[ContentCache] = None,
+    ) -> None:
+        self.workers = workers
+        self.model = model
+        self.batch_size = batch_size
+        self.cache = cache or ContentCache(config.REMOVEBG_CACHE_PATH, config.REMOVEBG_CACHE_MAX_BYTES, ".png")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: o onnxruntime não se dá bem com fork de um processo que já tem threads.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model,),
+                )
+
+            return self._pool
+
+    def shutdown(self, pool: Optional[ProcessPoolExecutor] = None) -> None:
+        """
+        Encerra o pool atual; com `pool`, só se ele ainda for o atual (outro lote
+        pode já ter recriado o pool depois da mesma falha).
+        """
+        with self._lock:
+            if self._pool is not None and (pool is None or self._pool is pool):
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def key(self, image: bytes) -> str:
+        return content_hash(image, self.model)
+
+    def _submit(self, images: list[bytes]) -> tuple[Optional[ProcessPoolExecutor], Future]:
+        pool = None
+
+        try:
+            pool = self.pool
+            return pool, pool.submit(_remove_batch, images)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return pool, future
+
+    def _collect(self, pool: Optional[ProcessPoolExecutor], future: Future, images: list[bytes], fallback: bool) -> list[bytes]:
+        try:
+            with timer(REMOVEBG_SECONDS, backend="rembg", batch=str(len(images))):
+                return future.result()
+        except BrokenProcessPool:
+            logging.error("Pool de remoção de fundo quebrou, recriando.")
+            self.shutdown(pool)
+
+            if not fallback:
+                raise
+        except Exception as e:
+            logging.exception(f"Erro ao remover fundo localmente: {e}")
+
+            if not fallback:
+                raise
+
+        return [self._picwish(image) for image in images]
+
+    @staticmethod
+    def _picwish(image: bytes) -> bytes:
+        from src.api.picwish import Picwish
+
+        # Roda em uma thread do to_thread (ou em código síncrono), sem loop próprio.
+        return asyncio.run(Picwish().remove_background(image, fallback=False))
+
+    def remove_many_sync(self, images: list[bytes], fallback: bool = True) -> list[bytes]:
+        """
+        Versão bloqueante (threads do FastAPI e código síncrono). Com fallback=False
+        falhas do pool local são propagadas em vez de irem para a Picwish.
+        """
+        keys = [self.key(image) for image in images]
+        results: dict[str, bytes] = {}
+        owned: dict[str, Future] = {}
+        waiting: dict[str, Future] = {}
+        pending: list[tuple[str, bytes]] = []
+
+        with self._lock:
+            for key, image in zip(keys, images):
+                if key in results or key in owned or key in waiting:
+                    continue
+
+                if (cached := self.cache.get(key)) is not None:
+                    results[key] = cached
+                    REMOVEBG_REQUESTS.inc(result="cache_hit")
+                elif key in self._in_flight:
+                    waiting[key] = self._in_flight[key]
+                    REMOVEBG_REQUESTS.inc(result="deduplicated")
+                else:
+                    owned[key] = self._in_flight[key] = Future()
+                    pending.append((key, image))
+
+        # Todos os lotes vão para o pool antes de esperar o primeiro, para ocupar todos os workers.
+        batches = [pending[start : start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        submitted = [self._submit([image for _, image in batch]) for batch in batches]
+
+        try:
+            for batch, (pool, future) in zip(batches, submitted):
+                outputs = self._collect(pool, future, [image for _, image in batch], fallback)
+
+                for (key, _), output in zip(batch, outputs):
+                    self.cache.put(key, output)
+                    results[key] = output
+                    owned[key].set_result(output)
+                    REMOVEBG_REQUESTS.inc(result="processed")
+        except Exception as e:
+            for _, future in submitted:
+                future.cancel()
+
+            for future in owned.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                for key in owned:
+                    self._in_flight.pop(key, None)
+
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return [results[key] for key in keys]
+
+    def remove_sync(self, image: bytes, fallback: bool = True) -> bytes:
+        return self.remove_many_sync([image], fallback)[0]
+
+    async def remove_many(self, images: list[bytes], fallback: bool = True) -> list[bytes]:
+        return await asyncio.to_thread(self.remove_many_sync, images, fallback)
+
+    async def remove(self, image: bytes, fallback: bool = True) -> bytes:
+        return (await self.remove_many([image], fallback))[0]
+
+
+background_remover = BackgroundRemover()
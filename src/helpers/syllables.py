@@ -0,0 +1,343 @@
+"""
+Separação silábica em português com a sílaba tônica marcada para a narração.
+
+A consulta é local: primeiro o dicionário em SQLite (palavras já separadas pelo
+separaremsilabas.com), depois regras de separação e acentuação que funcionam
+offline. O site só é consultado para palavras que ainda não estão no dicionário,
+em segundo plano e em lote, e o resultado fica gravado para as próximas vezes.
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+import aiohttp
+
+import config
+from src.helpers.metrics import SYLLABLE_LOOKUPS
+from src.helpers.tasks import run_in_background
+
+Entry = tuple[tuple[str, ...], int]
+
+VOWELS = frozenset("aeiouáéíóúâêôãõàüy")
+STRESS_MARKS = frozenset("áéíóúâêô")
+NASAL_MARKS = frozenset("ãõ")
+ACCENTED = STRESS_MARKS | NASAL_MARKS | frozenset("à")
+ONSETS = frozenset(
+    ("bl", "br", "cl", "cr", "dl", "dr", "fl", "fr", "gl", "gr", "kl", "kr", "pl", "pr", "tl", "tr", "vl", "vr")
+    + ("ch", "lh", "nh", "gu", "qu", "gü", "qü")
+)
+# Depois de um i/u, essas consoantes fechando a sílaba desfazem o ditongo: ra-iz, ca-ir, ru-im.
+HIATUS_CODAS = frozenset("lmnrz")
+PAROXYTONE_ENDINGS = ("a", "e", "o", "as", "es", "os", "am", "em", "ens")
+WORD = re.compile(r"[^\W\d_]+")
+
+REMOTE_URL = "https://www.separaremsilabas.com/index.php"
+REMOTE_PATTERN = re.compile(r"([\w-]+)?<strong>(\w+)</strong>([\w-]+)?", re.I | re.M)
+MAP_VOWEL = {"a": "â", "e": "ê", "i": "î", "o": "ô", "u": "û"}
+
+
+def _is_vowel(word: str, index: int) -> bool:
+    char = word[index]
+
+    if char not in VOWELS:
+        return False
+
+    # O u de gu/qu antes de vogal é semivogal e fica com a consoante: gui-a, á-gua, quei-jo.
+    if char in "uü" and 0 < index < len(word) - 1 and word[index - 1] in "gq" and word[index + 1] in VOWELS:
+        return False
+
+    return True
+
+
+def _is_diphthong(word: str, index: int) -> bool:
+    first, second = word[index], word[index + 1]
+
+    if first in NASAL_MARKS:
+        return second in "eo"
+
+    if second not in "iu" or first == second:
+        return False
+
+    rest = word[index + 2 :]
+
+    if rest.startswith("nh"):
+        return False
+
+    if rest and rest[0] in HIATUS_CODAS and (len(rest) == 1 or rest[1] not in VOWELS):
+        return False
+
+    return True
+
+
+def split_syllables(word: str) -> list[str]:
+    """
+    Separa uma palavra (minúscula, só letras) pelas regras do português:
+    uma consoante entre vogais vai para a sílaba seguinte, encontros como
+    br/ch/lh/nh/gu/qu não se separam e as demais consoantes se dividem.
+    """
+    nuclei = []
+    index = 0
+
+    while index < len(word):
+        if not _is_vowel(word, index):
+            index += 1
+            continue
+
+        end = index + 1
+
+        if end < len(word) and _is_vowel(word, end) and _is_diphthong(word, index):
+            end += 1
+
+        nuclei.append((index, end))
+        index = end
+
+    if not nuclei:
+        return [word]
+
+    bounds = [0]
+
+    for (_, end), (start, _) in zip(nuclei, nuclei[1:]):
+        consonants = word[end:start]
+
+        if len(consonants) <= 1:
+            bounds.append(end)
+        elif consonants[-2:] in ONSETS:
+            bounds.append(start - 2)
+        else:
+            bounds.append(start - 1)
+
+    bounds.append(len(word))
+
+    return [word[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def tonic_index(word: str, syllables: list[str]) -> int:
+    """
+    Sílaba do acento gráfico (agudo/circunflexo antes do til); sem acento,
+    paroxítona nas terminações a(s), e(s), o(s), am, em, ens e oxítona no resto.
+    """
+    for marks in (STRESS_MARKS, NASAL_MARKS):
+        for index, syllable in enumerate(syllables):
+            if not marks.isdisjoint(syllable):
+                return index
+
+    if len(syllables) > 1 and word.endswith(PAROXYTONE_ENDINGS):
+        return len(syllables) - 2
+
+    return len(syllables) - 1
+
+
+def process_tonic(tonic: str) -> str:
+    """
+    Marca a vogal tônica com circunflexo para a voz não errar a sílaba forte.
+    Sílabas que já têm acento gráfico ficam como estão.
+    """
+    if not ACCENTED.isdisjoint(tonic):
+        return tonic
+
+    vowels = re.findall(r"[aeiou]", tonic)
+
+    if not vowels:
+        return tonic
+
+    replace_vowel = vowels[-1] if vowels[0] == "u" and len(vowels) > 1 else vowels[0]
+
+    return tonic.replace(replace_vowel, MAP_VOWEL[replace_vowel])
+
+
+def parse_remote(html: str) -> Optional[Entry]:
+    """
+    `ca-<strong>mi</strong>-sa` -> (("ca", "mi", "sa"), 1)
+    """
+    if not (match := REMOTE_PATTERN.search(html)):
+        return None
+
+    before, tonic, after = (part or "" for part in match.groups())
+    before = [syllable.lower() for syllable in before.split("-") if syllable]
+    after = [syllable.lower() for syllable in after.split("-") if syllable]
+
+    return tuple(before + [tonic.lower()] + after), len(before)
+
+
+class SyllableDictionary:
+    """
+    Palavras já separadas pelo site, em SQLite e carregadas inteiras em memória
+    no primeiro uso. Palavras que o site não soube separar ficam gravadas sem
+    sílabas, para não serem consultadas de novo.
+    """
+
+    def __init__(self, path: Path = config.SYLLABLES_DB_PATH) -> None:
+        self.path = Path(path)
+        self.pending: set[str] = set()
+        self._entries: Optional[dict[str, Optional[Entry]]] = None
+        self._lock = threading.Lock()
+        self._in_flight: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS syllables (word TEXT PRIMARY KEY, syllables TEXT, tonic INTEGER, updated_at TEXT)"
+        )
+
+        return connection
+
+    def _load(self) -> dict[str, Optional[Entry]]:
+        try:
+            with closing(self._connect()) as connection:
+                rows = connection.execute("SELECT word, syllables, tonic FROM syllables").fetchall()
+        except sqlite3.Error as e:
+            logging.warning(f"Dicionário de sílabas indisponível ({self.path}): {e}")
+            return {}
+
+        return {word: (tuple(syllables.split("-")), tonic) if syllables else None for word, syllables, tonic in rows}
+
+    @property
+    def entries(self) -> dict[str, Optional[Entry]]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._load()
+
+        return self._entries
+
+    def get(self, word: str) -> Optional[Entry]:
+        """
+        Entrada do dicionário ou None; palavras nunca consultadas vão para `pending`.
+        """
+        entries = self.entries
+
+        if word in entries:
+            return entries[word]
+
+        self.pending.add(word)
+
+        return None
+
+    def store(self, entries: dict[str, Optional[Entry]]) -> None:
+        now = datetime.now().isoformat()
+        rows = [
+            (word, "-".join(entry[0]) if entry else None, entry[1] if entry else None, now)
+            for word, entry in entries.items()
+        ]
+
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO syllables VALUES (?, ?, ?, ?)", rows)
+
+        self.entries.update(entries)
+        self.pending.difference_update(entries)
+        # As palavras já resolvidas pelas regras passam a usar o dicionário.
+        syllabify.cache_clear()
+
+    @staticmethod
+    async def _fetch(session: aiohttp.ClientSession, word: str) -> Optional[Entry]:
+        params = {"lang": "index.php", "p": word, "button": "Separação das sílabas"}
+
+        async with session.get(REMOTE_URL, params=params) as response:
+            response.raise_for_status()
+            return parse_remote(await response.text())
+
+    async def lookup(self, words: Optional[Iterable[str]] = None) -> int:
+        """
+        Consulta o site só para as palavras fora do dicionário (por padrão, as
+        pendentes), em paralelo numa mesma sessão, e grava tudo numa transação.
+        Retorna quantas palavras foram gravadas.
+        """
+        if words is None:
+            words, self.pending = self.pending, set()
+
+        missing = {
+            part for word in words for part in WORD.findall(word.lower())
+        } - self.entries.keys() - self._in_flight
+
+        if not missing:
+            return 0
+
+        self._in_flight |= missing
+        semaphore = asyncio.Semaphore(config.SYLLABLES_REMOTE_CONCURRENCY)
+        found: dict[str, Optional[Entry]] = {}
+
+        async def fetch(session: aiohttp.ClientSession, word: str) -> None:
+            async with semaphore:
+                try:
+                    found[word] = entry = await self._fetch(session, word)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    SYLLABLE_LOOKUPS.inc(result="remote_error")
+                    logging.warning(f"Falha ao separar as sílabas de {word}: {e}")
+                else:
+                    SYLLABLE_LOOKUPS.inc(result="remote" if entry else "remote_miss")
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=config.SYLLABLES_REMOTE_TIMEOUT)
+
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                await asyncio.gather(*(fetch(session, word) for word in missing))
+
+            if found:
+                await asyncio.to_thread(self.store, found)
+        finally:
+            self._in_flight -= missing
+
+        return len(found)
+
+    def schedule_lookup(self) -> None:
+        """
+        Consulta as palavras pendentes em segundo plano, se houver um loop rodando.
+        Fora de um loop elas continuam pendentes até o próximo `lookup`.
+        """
+        if not self.pending or not config.SYLLABLES_REMOTE:
+            return
+
+        if self._task is not None and not self._task.done():
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._task = run_in_background(self.lookup(), name="syllables:lookup")
+
+
+syllable_dictionary = SyllableDictionary()
+
+
+@lru_cache(maxsize=config.SYLLABLES_MEMO_SIZE)
+def syllabify(token: str) -> tuple[str, str]:
+    """
+    (sílabas, palavra) de um token do texto, ex.: "camisa," -> ("ca-mî-sa,", "camîsa,").
+    Pontuação e números ficam no lugar; só as sequências de letras são separadas.
+    """
+    token = token.lower()
+    syllables_text, word_text, position = [], [], 0
+
+    for match in WORD.finditer(token):
+        word = match.group()
+
+        if entry := syllable_dictionary.get(word):
+            SYLLABLE_LOOKUPS.inc(result="dictionary")
+            syllables, tonic = list(entry[0]), entry[1]
+        else:
+            SYLLABLE_LOOKUPS.inc(result="rules")
+            syllables = split_syllables(word)
+            tonic = tonic_index(word, syllables)
+
+        syllables[tonic] = process_tonic(syllables[tonic])
+
+        syllables_text += [token[position : match.start()], "-".join(syllables)]
+        word_text += [token[position : match.start()], "".join(syllables)]
+        position = match.end()
+
+    syllables_text.append(token[position:])
+    word_text.append(token[position:])
+
+    return "".join(syllables_text), "".join(word_text)
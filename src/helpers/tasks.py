@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from typing import Coroutine
+
+# O loop só guarda referência fraca das tasks; sem isso uma task em segundo plano
+# pode ser coletada pelo GC antes de terminar.
+_tasks: set[asyncio.Task] = set()
+
+
+def _done(task: asyncio.Task) -> None:
+    _tasks.discard(task)
+
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logging.error(f"Tarefa em segundo plano {task.get_name()} falhou: {error}", exc_info=error)
+
+
+def run_in_background(coro: Coroutine, name: str = None) -> asyncio.Task:
+    """
+    Agenda `coro` sem esperar o resultado; erros são apenas registrados no log.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_done)
+
+    return task
+
+
+async def wait_background(timeout: float = None) -> None:
+    """
+    Espera as tarefas pendentes (ex.: antes de encerrar o processo).
+    """
+    if _tasks:
+        await asyncio.wait(set(_tasks), timeout=timeout)
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+from typing import NamedTuple, Optional, Union
+
+from bson import ObjectId
+from PIL import Image as PILImage
+
+import config
+from src.api.firebase import upload_bytes
+from src.helpers.metrics import THUMBNAIL_FAILURES, THUMBNAIL_SECONDS, timer
+from src.helpers.tasks import run_in_background
+
+# Pillow libera o GIL na decodificação e no resize, então threads bastam aqui.
+_executor = ThreadPoolExecutor(max_workers=config.THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+
+
+class Thumbnail(NamedTuple):
+    size: int
+    width: int
+    height: int
+    data: bytes
+
+
+def thumbnail_location(location: str, size: int) -> str:
+    """
+    `assets/x/logo.png` -> `assets/x/thumbs/logo_300x300.webp`, o mesmo padrão já usado pelas URLs antigas.
+    """
+    path = PurePosixPath(location)
+    return str(path.parent / "thumbs" / f"{path.stem}_{size}x{size}.webp")
+
+
+def render_thumbnails(data: Union[bytes, Path], sizes: list[int] = config.THUMBNAIL_SIZES) -> list[Thumbnail]:
+    """
+    Gera as miniaturas em WebP, da maior para a menor, cada uma a partir da anterior.
+
+    O tamanho é a caixa máxima (proporção mantida); imagens menores que a caixa não são ampliadas.
+    `data` pode ser o conteúdo ou o caminho da imagem.
+    """
+    image = PILImage.open(data if isinstance(data, Path) else BytesIO(data))
+    largest = max(sizes)
+
+    # Em JPEG decodifica direto em escala reduzida (1/2, 1/4, 1/8) quando possível.
+    image.draft("RGB", (largest, largest))
+    image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    thumbnails = []
+
+    for size in sorted(sizes, reverse=True):
+        image.thumbnail((size, size), PILImage.LANCZOS)
+
+        buffer = BytesIO()
+        image.save(buffer, format="WEBP", quality=config.THUMBNAIL_QUALITY, method=4)
+        thumbnails.append(Thumbnail(size, image.width, image.height, buffer.getvalue()))
+
+    return thumbnails[::-1]
+
+
+async def generate_thumbnails(
+    data: Union[bytes, Path],
+    location: str,
+    bucket_name: Optional[str] = None,
+    sizes: list[int] = config.THUMBNAIL_SIZES,
+) -> list[dict]:
+    """
+    Gera e envia as miniaturas de `data`; retorna o que deve ser gravado no documento.
+    """
+    with timer(THUMBNAIL_SECONDS):
+        loop = asyncio.get_running_loop()
+        thumbnails = await loop.run_in_executor(_executor, render_thumbnails, data, sizes)
+
+        urls = await asyncio.gather(
+            *[
+                upload_bytes(thumbnail.data, thumbnail_location(location, thumbnail.size), "image/webp", bucket_name)
+                for thumbnail in thumbnails
+            ]
+        )
+
+    return [
+        {
+            "size": thumbnail.size,
+            "width": thumbnail.width,
+            "height": thumbnail.height,
+            "bytes": len(thumbnail.data),
+            "location": thumbnail_location(location, thumbnail.size),
+            "url": url,
+        }
+        for thumbnail, url in zip(thumbnails, urls)
+    ]
+
+
+async def store_thumbnails(
+    collection_name: str,
+    document_id,
+    data: Union[bytes, Path],
+    location: str,
+    bucket_name: Optional[str] = None,
+    delete_source: bool = False,
+) -> list[dict]:
+    """
+    Com `delete_source`, `data` é um arquivo temporário removido ao final.
+    """
+    from src.database.mongo import mongo
+
+    try:
+        thumbnails = await generate_thumbnails(data, location, bucket_name)
+    except Exception:
+        THUMBNAIL_FAILURES.inc()
+        raise
+    finally:
+        if delete_source and isinstance(data, Path):
+            data.unlink(missing_ok=True)
+
+    await mongo.update_one(
+        collection_name,
+        {"_id": ObjectId(document_id)},
+        {"$set": {"thumbnails": thumbnails}},
+    )
+
+    logging.info(f"Miniaturas de {location} gravadas em {collection_name}/{document_id}.")
+
+    return thumbnails
+
+
+def schedule_thumbnails(
+    collection_name: str,
+    document_id,
+    data: Union[bytes, Path],
+    location: str,
+    bucket_name: Optional[str] = None,
+    delete_source: bool = False,
+) -> asyncio.Task:
+    """
+    Gera as miniaturas em segundo plano, sem atrasar a resposta de quem gravou a imagem.
+    """
+    return run_in_background(
+        store_thumbnails(collection_name, document_id, data, location, bucket_name, delete_source),
+        name=f"thumbnails:{location}",
+    )
+
+
+def pick_thumbnail(document: dict, size: int) -> Optional[str]:
+    """
+    URL da menor miniatura com pelo menos `size` px; sem miniaturas, a URL original.
+    """
+    thumbnails = sorted(document.get("thumbnails") or [], key=lambda thumbnail: thumbnail["size"])
+
+    for thumbnail in thumbnails:
+        if thumbnail["size"] >= size:
+            return thumbnail["url"]
+
+    return thumbnails[-1]["url"] if thumbnails else document.get("url")
@@ -1,23 +1,35 @@
+import asyncio
 import json
 import logging
 import mimetypes
 import uuid
+from contextlib import nullcontext
 from enum import Enum
 from pathlib import Path
 from typing import Optional, Union
 
 from bson import ObjectId
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, UploadFile
-from firebase_admin import storage
 from pydantic import BaseModel, Field
 
 from config import FIREBASE_STORAGE_BUCKET, TMP_PATH
+from src.api.firebase import bucket_exists, get_blob, upload_stream
 from src.auth.login import get_current_user
-from src.database import mongo
+from src.database.categories import category_registry
+from src.database.mongo import mongo
+from src.database.search import (
+    SEARCH_FIELD,
+    decode_cursor,
+    keyset_filter,
+    next_cursor,
+    search_filter,
+    search_tokens,
+)
 from src.helpers import date
-from src.helpers.download import download_file
+from src.helpers.download import fetch_metadata
 from src.helpers.is_ import Is
 from src.helpers.string import slugify
+from src.helpers.thumbnails import pick_thumbnail, schedule_thumbnails
 from src.models.client import ClientModel
 from src.routes.client import parse_form
 
@@ -109,45 +121,73 @@ class Projection(BaseModel):
     niche: Optional[int] = 1
     owner: Optional[int] = 1
     is_public: Optional[int] = 1
+    thumbnails: Optional[int] = 1
 
 
 class GetAssets(BaseModel):
     find: Find
     skip: Optional[int] = 0
     limit: Optional[int] = 10
+    cursor: Optional[str] = None
+    with_count: Optional[bool] = Field(None, alias="withCount")
     projection: Optional[Projection] = None
     my_content: Optional[bool] = Field(False, alias="myContent")
     exclude_categories: Optional[list[str]] = None
 
 
+ASSETS_SORT = [("_id", -1)]
+
+
+def union_pipeline(find: dict, collections: list[str], tail: Optional[list] = None) -> list:
+    """
+    `find` (+ `tail`) na coleção principal e em cada coleção extra via `$unionWith`.
+    """
+    branch = [{"$match": find}, *(tail or [])]
+
+    return [
+        *branch,
+        *[{"$unionWith": {"coll": collection, "pipeline": branch}} for collection in collections],
+    ]
+
+
+async def asset_collections(client: ClientModel) -> list[str]:
+    if client.is_dev:
+        return [
+            collection
+            for collection in await mongo.collection_names()
+            if collection.startswith("assets_")
+        ]
+
+    return [f"assets_{collection}" for collection in (client.niche, "logos")]
+
+
 @router.post("/list")
 async def get_assets(data: GetAssets, client: ClientModel = Depends(get_current_user)):
     find = {
         k: v
         for k, v in data.find.model_dump(exclude_none=True, exclude_unset=True).items()
-        if v
+        if v and k != "name"
     }
 
     if data.find.name:
-        find["name"] = {"$regex": find["name"], "$options": "i"}
+        find.update(search_filter(data.find.name))
 
-    if data.find.categories:
-        parsed_categories = [ObjectId(category) for category in data.find.categories]
+    categories_filter = {}
 
-        find["categories"] = {"$in": parsed_categories}
+    if data.find.categories:
+        categories_filter["$in"] = [ObjectId(category) for category in data.find.categories]
 
     if data.exclude_categories:
-        parsed_categories = [ObjectId(category) for category in data.exclude_categories]
+        categories_filter["$nin"] = [ObjectId(category) for category in data.exclude_categories]
 
-        find["categories"] = {"$nin": parsed_categories}
+    if categories_filter:
+        find["categories"] = categories_filter
 
     default_projection = Projection(
-        _id=1, name=1, type=1, subtype=1, categories=1, url=1
+        _id=1, name=1, type=1, subtype=1, categories=1, url=1, thumbnails=1, owner=1
     )
     projection = data.projection or default_projection
 
-    response_data = []
-
     if not client.is_dev:
         projection = default_projection
 
@@ -159,94 +199,85 @@ async def get_assets(data: GetAssets, client: ClientModel = Depends(get_current_
             }
         )
 
-    projection = projection.model_dump(
-        exclude_none=True, exclude_unset=True, include={"_id": 1}
-    )
+    projection = projection.model_dump(exclude_none=True, exclude_unset=True) or {
+        SEARCH_FIELD: 0
+    }
 
-    extra_collections = []
+    extra_collections = await asset_collections(client)
 
-    if client.is_dev:
-        for collection in await mongo.database.list_collection_names():
-            if collection.startswith("assets_"):
-                extra_collections.append(
-                    {
-                        "$unionWith": {
-                            "coll": collection,
-                            "pipeline": [{"$match": find}],
-                        }
-                    }
-                )
-    else:
-        client_available_collections = [client.niche, "logos"]
+    try:
+        after = decode_cursor(data.cursor) if data.cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-        for collection in client_available_collections:
-            extra_collections.append(
-                {
-                    "$unionWith": {
-                        "coll": f"assets_{collection}",
-                        "pipeline": [{"$match": find}],
-                    }
-                }
-            )
+    keyset = keyset_filter(ASSETS_SORT, after)
+    sort = {"$sort": dict(ASSETS_SORT)}
 
-    pipeline = [
-        {"$match": find},
-        *extra_collections,
-        {"$skip": data.skip},
-        {"$limit": data.limit},
+    page = [
+        {"$limit": data.limit + 1},
+        {"$project": projection},
     ]
 
-    if projection:
-        pipeline.append({"$project": projection})
+    paging = bool(after) and not data.with_count
+
+    if paging:
+        # Página seguinte sem total: cada coleção já corta pelo cursor (índice de
+        # `_id`) e devolve no máximo `limit + 1` itens, qualquer que seja a profundidade.
+        pipeline = [
+            *union_pipeline(
+                {**find, **keyset}, extra_collections, [sort, {"$limit": data.limit + 1}]
+            ),
+            sort,
+            *page,
+        ]
+    else:
+        # Primeira página (ou withCount): resultados e total da mesma união em uma ida ao banco.
+        results = [sort, *page]
 
-    pipeline.append(
-        {
-            "$lookup": {
-                "from": "categories",
-                "localField": "categories",
-                "foreignField": "_id",
-                "as": "categories",
-            }
-        }
-    )
+        if keyset:
+            results.insert(0, {"$match": keyset})
+        elif data.skip:
+            results.insert(1, {"$skip": data.skip})
 
-    print(pipeline)
+        pipeline = [
+            *union_pipeline(find, extra_collections),
+            {"$facet": {"results": results, "count": [{"$count": "count"}]}},
+        ]
 
     cursor = mongo.database.assets.aggregate(pipeline)
 
-    response_data = []
+    count = None
 
-    async for asset in cursor:
-        asset["id"] = str(asset.pop("_id"))
+    if paging:
+        assets = await cursor.to_list(data.limit + 1)
+    else:
+        facet = (await cursor.to_list(1))[0]
+        assets = facet["results"]
+        count = facet["count"][0]["count"] if facet["count"] else 0
 
-        url = asset["url"]
+    assets, next_page = next_cursor(assets, ASSETS_SORT, data.limit)
 
-        split_url = url.split("/")
-        split_url.insert(-1, "thumbs")
-        split_url[-1] = f"{split_url[-1].split('.')[0]}_300x300.webp"
+    response_data = []
 
-        asset["thumb"] = "/".join(split_url)
+    for asset in assets:
+        asset["id"] = str(asset.pop("_id"))
 
-        asset["categories"] = [
-            {
-                "id": str(category["_id"]),
-                "name": category["name"],
-                "slug": category["slug"],
-            }
-            for category in asset["categories"]
-        ]
+        # Só miniaturas que existem de fato; sem elas, a própria imagem.
+        asset["thumb"] = pick_thumbnail(asset, 300)
+        asset.pop("thumbnails", None)
 
-        asset["owner"] = [str(owner) for owner in asset["owner"]]
+        asset["categories"] = await category_registry.resolve(asset.get("categories", []))
 
-        response_data.append(asset)
+        if "owner" in asset:
+            owner = asset["owner"]
+            asset["owner"] = [str(owner) for owner in (owner if isinstance(owner, list) else [owner])]
 
-    count_assets = await mongo.database.assets.count_documents(find)
-    count_hortifruti = await mongo.database.assets_hortifruti.count_documents(find)
-    total_count = count_assets + count_hortifruti
+        response_data.append(asset)
 
     return {
-        "count": total_count,
+        "count": count,
         "results": response_data,
+        "next_cursor": next_page,
     }
 
 
@@ -321,10 +352,8 @@ async def create_asset(
 
     asset_data = asset.model_dump()
 
-    session_path = TMP_PATH / uuid.uuid4().hex
-    session_path.mkdir(parents=True, exist_ok=True)
-
     file_data = {}
+    thumbnail_source = None
 
     try:
         if isinstance(asset_data["file"], str):
@@ -334,14 +363,11 @@ async def create_asset(
             if not client.is_dev:
                 raise HTTPException(status_code=403, detail="Forbidden")
 
-            file = await download_file(asset_data["file"], session_path)
+            # Só os metadados: o arquivo continua no servidor externo.
+            metadata = await fetch_metadata(asset_data["file"])
 
-            if not isinstance(file, Path):
-                raise HTTPException(status_code=400, detail="Invalid file")
-
-            size = file.stat().st_size
-            filename = file.name
-            mimetype = mimetypes.guess_type(filename, strict=False)[0]
+            filename = metadata["filename"]
+            mimetype = metadata["mimetype"] or "application/octet-stream"
 
             subtype = None
 
@@ -351,7 +377,7 @@ async def create_asset(
             file_data.update(
                 {
                     "file": {
-                        "size": size,
+                        "size": metadata["size"],
                         "filename": filename,
                         "mimetype": mimetype,
                     },
@@ -370,9 +396,7 @@ async def create_asset(
             if not bucket_name:
                 raise HTTPException(status_code=400, detail="Bucket name is required")
 
-            bucket = storage.bucket(bucket_name)
-
-            if not bucket.exists():
+            if not await bucket_exists(bucket_name):
                 raise HTTPException(status_code=400, detail="Bucket not found")
 
             file: UploadFile = asset_data["file"]
@@ -387,10 +411,6 @@ async def create_asset(
             if file.content_type == "image/svg+xml":
                 subtype = AssetSubtype.vector
 
-            size = len(await file.read())
-
-            await file.seek(0)
-
             filename = file.filename
             mimetype = (
                 file.content_type or mimetypes.guess_type(filename, strict=False)[0]
@@ -402,30 +422,44 @@ async def create_asset(
 
             full_location = f"assets{location}/{slugified_name}{extension}"
 
-            blob = bucket.blob(full_location)
-
-            blob.upload_from_file(file.file)
-
-            blob.make_public()
-
-            url = blob.public_url
+            # O UploadFile já está em um arquivo temporário; o tamanho e o hash são
+            # calculados enquanto os chunks vão para o Storage. Imagens são copiadas
+            # para um arquivo próprio na mesma leitura: o UploadFile é fechado ao fim
+            # da requisição, antes das miniaturas ficarem prontas.
+            if get_type_from_mimetype(mimetype) == AssetType.image and subtype is None:
+                TMP_PATH.mkdir(parents=True, exist_ok=True)
+                thumbnail_source = TMP_PATH / f"thumbnail_{uuid.uuid4().hex}{extension}"
+
+            with open(thumbnail_source, "wb") if thumbnail_source else nullcontext() as sink:
+                upload = await upload_stream(
+                    file.file,
+                    full_location,
+                    mimetype,
+                    bucket_name,
+                    size=getattr(file, "size", None),
+                    sink=sink,
+                )
 
             file_data.update(
                 {
                     "file": {
-                        "size": size,
+                        "size": upload.size,
                         "filename": filename,
                         "mimetype": mimetype,
+                        "sha256": upload.sha256,
                     },
                     "subtype": subtype,
                     "bucket": bucket_name,
-                    "url": url,
+                    "url": upload.url,
                     "location": full_location,
                     "type": get_type_from_mimetype(mimetype),
                     "origin": AssetOrigin.firebase,
                 }
             )
     except Exception as e:
+        if thumbnail_source:
+            thumbnail_source.unlink(missing_ok=True)
+
         if isinstance(e, HTTPException):
             raise e
 
@@ -448,6 +482,7 @@ async def create_asset(
     file_data.update(
         {
             "name": asset_data["name"],
+            SEARCH_FIELD: search_tokens(asset_data["name"]),
             "created_at": date.now(),
             "updated_at": date.now(),
             "options": asset_data.get("options"),
@@ -457,7 +492,22 @@ async def create_asset(
         }
     )
 
-    result = await mongo.database.assets.insert_one(file_data)
+    try:
+        result = await mongo.database.assets.insert_one(file_data)
+    except BaseException:
+        if thumbnail_source:
+            thumbnail_source.unlink(missing_ok=True)
+        raise
+
+    if thumbnail_source:
+        schedule_thumbnails(
+            "assets",
+            result.inserted_id,
+            thumbnail_source,
+            file_data["location"],
+            file_data["bucket"],
+            delete_source=True,
+        )
 
     return {
         "message": "Asset created successfully",
@@ -466,16 +516,7 @@ async def create_asset(
             "name": asset_data["name"],
             "url": file_data["url"],
             "type": file_data["type"],
-            "categories": [
-                {
-                    "id": str(category["_id"]),
-                    "name": category["name"],
-                    "slug": category["slug"],
-                }
-                for category in await mongo.database.categories.find(
-                    {"_id": {"$in": file_data["categories"]}}
-                ).to_list(None)
-            ],
+            "categories": await category_registry.resolve(file_data["categories"]),
         },
     }
 
@@ -497,9 +538,8 @@ async def delete_asset(asset_id: str, client: ClientModel = Depends(get_current_
 
     if deleted["origin"] == AssetOrigin.firebase:
         try:
-            bucket = storage.bucket(deleted["bucket"])
-            blob = bucket.blob(deleted["location"])
-            blob.delete()
+            blob = get_blob(deleted["location"], deleted["bucket"])
+            await asyncio.to_thread(blob.delete)
         except Exception as e:
             logging.exception(e)
 
@@ -530,6 +570,9 @@ async def update_asset(
 
     new_data = data.model_dump(exclude_none=True, exclude_unset=True)
 
+    if new_data.get("name"):
+        new_data[SEARCH_FIELD] = search_tokens(new_data["name"])
+
     if new_data.get("categories"):
         new_data["categories"] = [
             ObjectId(category) for category in new_data["categories"]
@@ -1,5 +1,5 @@
+import asyncio
 import logging
-import mimetypes
 import re
 import shutil
 import uuid
@@ -7,13 +7,15 @@ from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.datastructures import FormData
-from fastapi_cache.decorator import cache
 
 import config
 from src.api.picwish import Picwish
 from src.auth.login import admin_resource
-from src.database import mongo
-from src.helpers.download import download_file
+from src.database.client_search import CLIENTS_SORT, client_search_tokens, search_clients
+from src.database.mongo import mongo
+from src.database.search import SEARCH_FIELD, decode_cursor, next_cursor
+from src.helpers.audio_index import NARRATION_KINDS, narration_audio_index
+from src.helpers.jobs import jobs
 from src.helpers.string import snake_case
 from src.models.client import CRM, ClientInfoModel, ClientModel, Colors, Prospector
 from src.models.niches import segmented_models
@@ -22,11 +24,11 @@ router = APIRouter(prefix="/clients", tags=["Client"])
 
 
 @router.get("/")
-@cache(expire=60)
 async def get_clients(
     _: ClientModel = Depends(admin_resource),
     skip: int = Query(0),
     limit: int = Query(12),
+    cursor: str = Query(None),
     search_term: str = Query(alias="searchTerm", default=None),
     niche: str = Query(None),
     payment_type: str = Query(None, alias="paymentType"),
@@ -36,17 +38,6 @@ async def get_clients(
 ):
     query = {}
 
-    if search_term:
-        query = {
-            "$or": [
-                {"client": {"$regex": search_term, "$options": "i"}},
-                {"info.name": {"$regex": search_term, "$options": "i"}},
-                {"info.email": {"$regex": search_term, "$options": "i"}},
-                {"info.cellphone": {"$regex": search_term, "$options": "i"}},
-                {"info.instagram": {"$regex": search_term, "$options": "i"}},
-            ]
-        }
-
     if niche:
         query["niche"] = {"$in": niche.split(",")}
 
@@ -62,19 +53,24 @@ async def get_clients(
     if exclude_dev:
         query["is_dev"] = {"$ne": exclude_dev}
 
-    count = await mongo.database.clients.count_documents(query)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    clients = (
-        await mongo.database.clients.find(query)
-        .skip(skip)
-        .limit(limit)
-        .to_list(length=limit)
-    )
+    clients, count, estimated = await search_clients(search_term, query, limit, after, skip)
+    clients, next_page = next_cursor(clients, CLIENTS_SORT, limit)
 
     for client in clients:
         client["id"] = str(client.pop("_id"))
 
-    return {"count": count, "clients": clients, "pages": count // limit}
+    return {
+        "count": count,
+        "count_is_estimate": estimated,
+        "clients": clients,
+        "pages": count // limit,
+        "next_cursor": next_page,
+    }
 
 
 def parse_form(form: FormData):
@@ -140,24 +136,17 @@ async def update_client(
     ):
         raise HTTPException(status_code=400, detail="Invalid file type")
 
-    tmp_path = config.TMP_PATH / uuid.uuid4().hex
-    tmp_path.mkdir(parents=True, exist_ok=True)
-
     client_images_path: Path = config.ABS_PATH / "data/clients/images" / phone
     new_client_images_path: Path = config.ABS_PATH / "data/clients/images" / new_phone
 
     client_audios_path: Path = config.ABS_PATH / "data/clients/audios" / phone
     new_client_audios_path: Path = config.ABS_PATH / "data/clients/audios" / new_phone
 
-    if client_images_path.exists():
-        shutil.move(client_images_path, new_client_images_path)
-
-    client_images_path.mkdir(parents=True, exist_ok=True)
-
-    if client_audios_path.exists():
-        shutil.move(client_audios_path, new_client_audios_path)
-
-    client_audios_path.mkdir(parents=True, exist_ok=True)
+    await asyncio.gather(
+        asyncio.to_thread(move_client_dir, client_images_path, new_client_images_path),
+        asyncio.to_thread(move_client_dir, client_audios_path, new_client_audios_path),
+        narration_audio_index.rename_client(phone, new_phone),
+    )
 
     try:
         segmented_data = segmented_models(data.get("niche"))
@@ -168,53 +157,18 @@ async def update_client(
             extra_info = segmented_data(**data).model_dump()
 
         client_info = ClientInfoModel(**data, extra=extra_info)
-        logo_modified = False
-
-        if logo_light and (logo_light_contents := await logo_light.read()):
-            ext = mimetypes.guess_extension(logo_light.content_type) or ".png"
-
-            path = tmp_path / f"logo-light{ext}"
-            path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(path, "wb") as f:
-                f.write(logo_light_contents)
 
-            logo_url = Picwish().process_image(path)
+        # Os arquivos do form são fechados ao fim da requisição: lê antes de enfileirar.
+        logos = {}
 
-            removed_bg_path = await download_file(logo_url, tmp_path)
-
-            shutil.move(
-                removed_bg_path,
-                client_images_path / "logo.png",
-            )
-
-            logo_modified = True
+        if logo_light and (logo_light_contents := await logo_light.read()):
+            logos["logo.png"] = logo_light_contents
 
         if logo_dark and (logo_dark_contents := await logo_dark.read()):
-            ext = mimetypes.guess_extension(logo_dark.content_type) or ".png"
-
-            path = tmp_path / f"logo-dark{ext}"
-            path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(path, "wb") as f:
-                f.write(logo_dark_contents)
-
-            logo_url = Picwish().process_image(path)
-
-            removed_bg_path = await download_file(logo_url, tmp_path)
-
-            shutil.move(
-                removed_bg_path,
-                client_images_path / "dark-logo.png",
-            )
-
-            logo_modified = True
+            logos["dark-logo.png"] = logo_dark_contents
 
         client_has_logo = client.get("has_logo", False)
 
-        if logo_modified:
-            client_has_logo = True
-
         narration_obj = client.get("narration", {})
 
         current_company_genre = narration_obj.get("company_genre", "")
@@ -236,14 +190,11 @@ async def update_client(
             narration_obj["company_name"] = company_name
             narration_obj["number_narration"] = number_narration
 
-            for audio in new_client_audios_path.rglob("*.mp3"):
-                if number_ne and audio.name.startswith("call-us"):
-                    audio.unlink(missing_ok=True)
-
-                if company_name_ne and audio.name.startswith(
-                    ("opening-", "call-us-", "slogan-")
-                ):
-                    audio.unlink(missing_ok=True)
+            await narration_audio_index.invalidate(
+                new_phone,
+                new_client_audios_path,
+                NARRATION_KINDS if company_name_ne else ["call-us"],
+            )
 
         use_limit = data.get(
             "use_limit", client.get("purchase", {}).get("use_limit", 0)
@@ -282,6 +233,9 @@ async def update_client(
                     "narration": narration_obj,
                     "client": data.get("client"),
                     "info": client_info.model_dump(),
+                    SEARCH_FIELD: client_search_tokens(
+                        {"client": data.get("client"), "info": client_info.model_dump()}
+                    ),
                     "purchase.type": data.get("purchase_status", "free"),
                     "purchase.use_limit": int(use_limit),
                     "has_logo": data.get("has_logo", False),
@@ -324,7 +278,67 @@ async def update_client(
     except Exception as e:
         logging.exception(e)
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        shutil.rmtree(tmp_path)
 
-    return {"message": "Client updated successfully"}
+    job_id = None
+
+    if logos:
+        job_id = await jobs.submit(
+            "client_logos",
+            process_logos,
+            new_phone,
+            new_client_images_path,
+            logos,
+            webhook=data.get("webhook"),
+            metadata={"client": new_phone},
+        )
+
+    return {"message": "Client updated successfully", "job_id": job_id}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, _: ClientModel = Depends(admin_resource)):
+    job = await jobs.get(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+def move_client_dir(path: Path, new_path: Path) -> None:
+    if path != new_path and path.exists():
+        if new_path.exists():
+            logging.warning(f"{new_path} já existe, mantendo {path} onde está.")
+        else:
+            # Mesmo disco: é só um rename, sem copiar os arquivos.
+            shutil.move(path, new_path)
+
+    new_path.mkdir(parents=True, exist_ok=True)
+
+
+async def process_logos(phone: str, images_path: Path, logos: dict[str, bytes]) -> dict:
+    """
+    Job: remove o fundo dos logos em paralelo, grava na pasta do cliente e marca `has_logo`.
+    """
+    results = await asyncio.gather(
+        *[Picwish().remove_background(contents) for contents in logos.values()]
+    )
+
+    def write() -> dict:
+        images_path.mkdir(parents=True, exist_ok=True)
+        paths = {}
+
+        for filename, contents in zip(logos, results):
+            path = images_path / filename
+            tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+            tmp_path.write_bytes(contents)
+            tmp_path.replace(path)
+            paths[filename] = str(path)
+
+        return paths
+
+    paths = await asyncio.to_thread(write)
+
+    await mongo.database.clients.update_one({"client": phone}, {"$set": {"has_logo": True}})
+
+    return {"logos": paths}
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import json
 import logging
@@ -7,19 +8,23 @@ from pathlib import Path
 from typing import Optional
 from urllib import response
 
+import aiohttp
 from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException
-from firebase_admin import storage
 from pydantic import BaseModel, Field
 
-from config import FIREBASE_STORAGE_BUCKET, TMP_PATH, VIDEOAI_API_TOKEN
+from config import FIREBASE_STORAGE_BUCKET, VIDEOAI_API_TOKEN
+from src.api.firebase import delete_blob, upload_bytes
 from src.api.picwish import Picwish
 from src.api.request import Requests
 from src.auth.login import get_current_user
-from src.database import mongo
+from src.database.categories import category_registry
+from src.database.mongo import mongo
+from src.database.search import SEARCH_FIELD, search_tokens
 from src.helpers import date
-from src.helpers.download import download_file
 from src.helpers.string import slugify
+from src.helpers.tasks import run_in_background
+from src.helpers.thumbnails import schedule_thumbnails
 from src.models.client import ClientModel
 from src.routes.assets import AssetOrigin
 
@@ -58,6 +63,30 @@ class PriceResize(BaseModel):
 requests = Requests()
 
 
+async def art_api_post(url: str, payload: dict, attempts: int = 3) -> Optional[dict]:
+    """
+    Versão assíncrona do `requests.post` para a Art API, usada nas rotas que
+    não podem bloquear o loop enquanto esperam a resposta.
+    """
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
+        for attempt in range(attempts):
+            try:
+                async with session.post(
+                    url, json=payload, headers={"VideoAI-Authorization": VIDEOAI_API_TOKEN}
+                ) as response:
+                    if response.status == 404:
+                        logging.error(f"Failed to request {url} with status code 404")
+                        return None
+
+                    response.raise_for_status()
+                    return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Failed to request {url} with error: {e}")
+                await asyncio.sleep(2**attempt)
+
+    return None
+
+
 @router.post("/textResize")
 async def text_resize(
     text_data: TextResize, _: ClientModel = Depends(get_current_user)
@@ -119,6 +148,20 @@ class ProcessImage(BaseModel):
     name: Optional[str] = None
 
 
+async def discard_upload(upload: asyncio.Task, location: str, bucket_name: str) -> None:
+    """
+    Remove o arquivo de um upload cujo asset não vai ser criado. O upload roda em
+    uma thread e não para com `cancel()`, então espera ele terminar antes de apagar.
+    """
+    try:
+        await upload
+    except Exception:
+        # Upload que falhou não deixou arquivo para trás.
+        return
+
+    await delete_blob(location, bucket_name)
+
+
 @router.post("/processImage")
 async def process_image(
     data: ProcessImage, client: ClientModel = Depends(get_current_user)
@@ -130,71 +173,57 @@ async def process_image(
     if not endpoint:
         raise HTTPException(status_code=500, detail="Art API endpoint not found")
 
-    tmp_path = TMP_PATH / uuid.uuid4().hex
-
-    mimetype, base64_str = data.image_base64.split(";base64,")
-
-    extension = mimetype.split("/")[-1]
-
-    tmp_path = tmp_path.with_suffix(f".{extension}")
-
-    with open(tmp_path, "wb") as f:
-        f.write(base64.b64decode(base64_str))
-
-    url = Picwish().process_image(tmp_path)
-
-    image_bytes = (await download_file(url, tmp_path, extension, get_bytes=True))[
-        "bytes"
-    ]
+    _, base64_str = data.image_base64.split(";base64,")
 
-    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
-    image_data = ImageResize(
-        image=data.image, imageUrl=f"data:image/png;base64,{image_base64}"
-    )
-
-    response = requests.post(
-        f"{endpoint}/imageResize",
-        json=image_data.model_dump(),
-        headers={"VideoAI-Authorization": VIDEOAI_API_TOKEN},
-    )
-
-    new_image_base64 = response["src"].split(";base64,")[-1]
-
-    new_image_bytes = base64.b64decode(new_image_base64)
+    image_bytes = await Picwish().remove_background(base64.b64decode(base64_str))
 
     mime_type = "image/png"
-    image_file_size = len(new_image_bytes)
     filename = Path(f"{uuid.uuid4().hex}.png")
     slugfied_name = slugify(filename.stem)
     full_location = f"assets/personal/{client.id}/{slugfied_name}.png"
 
     bucket_name = FIREBASE_STORAGE_BUCKET
 
-    bucket = storage.bucket(bucket_name)
+    # O upload do PNG sem fundo não depende do resize: roda em paralelo com ele e
+    # é esperado antes de gravar o asset, que só aponta para arquivos enviados.
+    upload = asyncio.create_task(upload_bytes(image_bytes, full_location, mime_type, bucket_name))
 
-    blob = bucket.blob(full_location)
+    image_data = ImageResize(
+        image=data.image,
+        imageUrl=f"data:image/png;base64,{base64.b64encode(image_bytes).decode('utf-8')}",
+    )
 
-    blob.upload_from_string(image_bytes, content_type=mime_type)
+    try:
+        response = await art_api_post(f"{endpoint}/imageResize", image_data.model_dump())
+    except BaseException:
+        run_in_background(discard_upload(upload, full_location, bucket_name), name=f"discard:{full_location}")
+        raise
 
-    blob.make_public()
+    if response is None:
+        run_in_background(discard_upload(upload, full_location, bucket_name), name=f"discard:{full_location}")
+        raise HTTPException(status_code=502, detail="Failed to resize image")
 
-    image_url = blob.public_url
+    try:
+        url = await upload
+    except Exception as e:
+        logging.error(f"Falha ao enviar {full_location} para o Firebase: {e}")
+        raise HTTPException(status_code=502, detail="Failed to upload image")
 
     file_data = {
         "file": {
-            "size": image_file_size,
+            "size": len(image_bytes),
             "filename": filename.name,
             "mimetype": mime_type,
         },
         "bucket": bucket_name,
-        "url": image_url,
+        "url": url,
         "location": full_location,
         "type": "image",
         "origin": AssetOrigin.firebase,
         "is_public": False,
         "niche": client.niche,
         "name": data.name or filename.stem,
+        SEARCH_FIELD: search_tokens(data.name or filename.stem),
         "created_at": date.now(),
         "updated_at": date.now(),
         "options": {},
@@ -212,7 +241,9 @@ async def process_image(
 
     if result.inserted_id is None:
         logging.error("Failed to insert asset to database")
-        logging.error(json.dumps(file_data))
+        logging.error(json.dumps(file_data, default=str))
+    else:
+        schedule_thumbnails("assets", result.inserted_id, image_bytes, full_location, bucket_name)
 
     return {
         "image": response,
@@ -221,15 +252,6 @@ async def process_image(
             "name": file_data["name"],
             "url": file_data["url"],
             "type": file_data["type"],
-            "categories": [
-                {
-                    "id": str(category["_id"]),
-                    "name": category["name"],
-                    "slug": category["slug"],
-                }
-                for category in await mongo.database.categories.find(
-                    {"_id": {"$in": file_data["categories"]}}
-                ).to_list(None)
-            ],
+            "categories": await category_registry.resolve(file_data["categories"]),
         },
     }
@@ -21,7 +21,7 @@ async def create_link():
 
 async def generate_login():
     try:
-        clients = await mongo.find(
+        clients = mongo.iter_find(
             "clients", 
             {
                 "niche": "hortifruti",
@@ -32,7 +32,7 @@ async def generate_login():
             }
         )
 
-        for client in clients:
+        async for client in clients:
             username = client.get("username")
             password = client.get("password")
 
@@ -167,7 +167,7 @@ async def get_links():
             }
         )
     image_thumb = saved_changes.get("thumbnail", "")
-    image_url = image_thumb.replace("_500x500.webp", ".png")
+    image_url = saved_changes.get("url") or image_thumb.replace("_500x500.webp", ".png")
 
     try:
         #tenta validar se existe a imagem no link
@@ -4,7 +4,8 @@ from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime
 
-logging.basicConfig(level=logging.INFO)
+from src.helpers.metrics import AGENDOR_REQUEST_SECONDS, timer
+
 logger = logging.getLogger(__name__)
 
 class AgendorApi:
@@ -21,7 +22,8 @@ class AgendorApi:
 
     def _request(self, method: str, endpoint: str, **kwargs) -> Any:
         url = self.agendor_base_url + endpoint
-        response = self.session.request(method, url, **kwargs)
+        with timer(AGENDOR_REQUEST_SECONDS, "agendor.request", method=method, resource=endpoint.split("/")[0]):
+            response = self.session.request(method, url, **kwargs)
 
         return self._handle_response(response)
     
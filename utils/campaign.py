@@ -0,0 +1,453 @@
+import asyncio
+import logging
+import random
+import re
+from datetime import datetime, time, timedelta
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import aiohttp
+from pymongo import ReturnDocument
+
+import config
+from src.database.mongo import mongo
+from src.database.resilience import DatabaseError
+from src.helpers.metrics import (
+    PROSPECTION_ACTIVE_INSTANCES,
+    PROSPECTION_OUTCOMES,
+    PROSPECTION_STAGE_SECONDS,
+    serve_metrics,
+    timer,
+)
+from utils.instances import InstanceRegistry, ZapiInstance
+from utils.sharding import WorkerMembership
+from utils.zapi import Zapi
+
+RELEASE = {
+    "$unset": {
+        "assigned_to": "",
+        "assigned_at": ""
+    }
+}
+
+
+class SkipProspect(Exception):
+    """
+    Interrompe o envio para o prospect atual sem contar como falha de envio.
+    """
+
+
+class Pacing:
+    """
+    Intervalos (em segundos) entre as etapas de uma campanha.
+    """
+
+    def __init__(
+        self,
+        checked: tuple[int, int] = (7, 13),
+        success: tuple[int, int] = (280, 320),
+        failure: tuple[int, int] = (45, 60),
+        retry: tuple[int, int] = (50, 70),
+        off_hours: int = 600,
+    ) -> None:
+        self.checked = checked
+        self.success = success
+        self.failure = failure
+        self.retry = retry
+        self.off_hours = off_hours
+
+
+class WorkingHours:
+    def __init__(self, start_hour: int = 8, end_hour: int = 20, weekdays: Iterable[int] = range(6)) -> None:
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.weekdays = set(weekdays)
+
+    def allows(self, now: datetime) -> bool:
+        """
+        Verifica se o dia e o horário atual estão dentro do horário de prospeção.
+        """
+        return now.weekday() in self.weekdays and self.start_hour <= now.hour <= self.end_hour
+
+
+class ProspectContext:
+    def __init__(
+        self,
+        campaign: "Campaign",
+        instance: ZapiInstance,
+        session: aiohttp.ClientSession,
+        zapi: Zapi,
+        prospect: dict,
+        phone: str,
+        whatsapp_number: Any,
+        settings: dict,
+    ) -> None:
+        self.campaign = campaign
+        self.instance = instance
+        self.session = session
+        self.zapi = zapi
+        self.prospect = prospect
+        self.phone = phone
+        self.whatsapp_number = whatsapp_number
+        self.settings = settings
+        self.data: dict = {}
+
+    @property
+    def number(self) -> str:
+        return self.whatsapp_number if isinstance(self.whatsapp_number, str) else self.phone
+
+
+Step = Callable[[ProspectContext], Awaitable[bool]]
+
+
+class Campaign:
+    """
+    Declaração de uma campanha de prospecção.
+
+    Args:
+        name (str): Nome usado na linha de comando e nos logs.
+        collection (str): Coleção com os prospects da campanha.
+        seller_field (str): Campo do prospect que identifica o vendedor.
+        seller_key (str): Atributo da instância comparado com `seller_field` ("seller_phone" ou "seller").
+        steps (list[Step]): Etapas executadas em ordem para cada prospect com WhatsApp.
+            Uma etapa que retorna False interrompe o envio como falha.
+        on_sent (list[Step]): Ações executadas após um envio bem-sucedido; erros são apenas logados.
+        filter (dict): Filtro adicional fixo para os prospects.
+        prepare (Callable): Gera um filtro dinâmico antes de cada busca; None adia a busca.
+        pacing (Pacing): Intervalos entre as etapas.
+        quota (int): Limite diário de prospecções por vendedor.
+        hours (WorkingHours): Horário de prospecção.
+        slots (Iterable[str]): Instâncias ZAPI ("primary", "secondary") usadas pela campanha.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        collection: str,
+        seller_field: str,
+        seller_key: str,
+        steps: list[Step],
+        on_sent: Optional[list[Step]] = None,
+        filter: Optional[dict] = None,
+        prepare: Optional[Callable[[], Awaitable[Optional[dict]]]] = None,
+        pacing: Optional[Pacing] = None,
+        quota: Optional[int] = None,
+        hours: Optional[WorkingHours] = None,
+        slots: Iterable[str] = ("primary", "secondary"),
+    ) -> None:
+        self.name = name
+        self.collection = collection
+        self.seller_field = seller_field
+        self.seller_key = seller_key
+        self.steps = steps
+        self.on_sent = on_sent or []
+        self.filter = filter or {}
+        self.prepare = prepare
+        self.pacing = pacing or Pacing()
+        self.quota = quota
+        self.hours = hours or WorkingHours()
+        self.slots = tuple(slots)
+
+    def seller_value(self, instance: ZapiInstance) -> Any:
+        return getattr(instance, self.seller_key)
+
+    async def count_today(self, instance: ZapiInstance) -> int:
+        now = datetime.now()
+        query = {
+            "prospection_date": {"$gte": datetime(now.year, now.month, now.day)},
+            self.seller_field: self.seller_value(instance)
+        }
+        return await mongo.count_documents(self.collection, query=query)
+
+    async def build_query(self, instance: ZapiInstance) -> Optional[dict]:
+        query = {
+            "prospection_date": {"$exists": False},
+            self.seller_field: self.seller_value(instance),
+            "no_whatsapp": {"$ne": True},
+            "assigned_to": {"$exists": False},
+            **self.filter
+        }
+
+        if self.prepare:
+            extra = await self.prepare()
+            if extra is None:
+                return None
+            query.update(extra)
+
+        if config.DEV:
+            query["phone"] = config.SUPPORT_NUMBERS[0]
+
+        return query
+
+
+async def confirm_write(writes, query: dict, update: dict, description: str, max_delay: float = 60) -> None:
+    """
+    Reenvia a escrita pelo buffer até o MongoDB confirmá-la, com backoff exponencial.
+    O buffer só registra falhas no log; aqui perder a escrita não é aceitável.
+    """
+    attempt = 0
+
+    while True:
+        result = await (await writes.update_one(query, update))
+
+        if result.ok:
+            if attempt:
+                logging.info(f"Gravação de {description} confirmada após {attempt + 1} tentativas.")
+            return
+
+        delay = min(max_delay, 2**attempt)
+        attempt += 1
+        logging.error(f"Gravação de {description} falhou ({result.error}), nova tentativa em {delay}s.")
+        await asyncio.sleep(delay)
+
+
+async def pause(interval: tuple[int, int]) -> None:
+    await asyncio.sleep(random.randint(*interval) * config.PACING_SCALE)
+
+
+async def sleep_until_tomorrow(prospector_name):
+    """
+    Aguarda pelo horário de prospeção do dia seguinte.
+    """
+    now = datetime.now()
+    tomorrow_date = now.date() + timedelta(days=1)
+    tomorrow = datetime.combine(tomorrow_date, time.min)
+
+    sleep_time = (tomorrow - now).total_seconds()
+
+    logging.info(f"Limite de prospecções diárias atingido para {prospector_name}. Aguardando {sleep_time / 3600:.2f} horas.")
+    await asyncio.sleep(sleep_time)
+
+
+async def wait_for_instance_status(session, zapi, zapi_instance, prospector_name, initial_delay=250, max_delay=3600, max_retries=None):
+    """
+    Aguarda pelo status da instância ZAPI.
+    """
+    delay = initial_delay
+    retries = 0
+    while not await zapi.get_instance_status(session):
+        if max_retries is not None and retries >= max_retries:
+            logging.error(f"Instância ZAPI {zapi_instance} de {prospector_name} não conectada. Abortando prospeção.")
+            return False
+
+        logging.error(f"Instância ZAPI {zapi_instance} de {prospector_name} não conectada, tentando novamente em {delay / 60:.2f} minutos")
+        await asyncio.sleep(random.randint(int(delay * 0.8), int(delay * 1.2)) * config.PACING_SCALE)
+
+        delay = min(delay * 2, max_delay)
+        retries += 1
+
+    return True
+
+
+def stage(campaign: Campaign, name: str):
+    return timer(PROSPECTION_STAGE_SECONDS, f"prospection.{name}", campaign=campaign.name, stage=name)
+
+
+def outcome(campaign: Campaign, instance: ZapiInstance, name: str) -> None:
+    PROSPECTION_OUTCOMES.inc(campaign=campaign.name, seller=instance.seller, outcome=name)
+
+
+async def prospection(campaign: Campaign, instance: ZapiInstance, session: aiohttp.ClientSession, instance_id: str):
+    PROSPECTION_ACTIVE_INSTANCES.inc(campaign=campaign.name)
+    try:
+        await _prospection(campaign, instance, session, instance_id)
+    finally:
+        PROSPECTION_ACTIVE_INSTANCES.dec(campaign=campaign.name)
+
+
+async def _prospection(campaign: Campaign, instance: ZapiInstance, session: aiohttp.ClientSession, instance_id: str):
+    zapi = instance.zapi()
+    prospector_name = instance.seller
+    settings = await mongo.find_one("config", {}) or {}
+    writes = mongo.buffer(campaign.collection)
+
+    while True:
+        connected = await wait_for_instance_status(session, zapi, instance.instance, prospector_name)
+
+        if not connected:
+            await pause(campaign.pacing.retry)
+            continue
+
+        if not campaign.hours.allows(datetime.now()):
+            logging.info(f"Prospecção {campaign.name} fora do horário. Aguardando 10 minutos...")
+            await asyncio.sleep(campaign.pacing.off_hours * config.PACING_SCALE)
+            continue
+
+        try:
+            if campaign.quota is not None and await campaign.count_today(instance) > campaign.quota:
+                await sleep_until_tomorrow(prospector_name)
+                continue
+
+            prospection_query = await campaign.build_query(instance)
+
+        except Exception as e:
+            logging.exception(f"Erro ao preparar prospecções {campaign.name} para {prospector_name}: {e}")
+            await pause(campaign.pacing.retry)
+            continue
+
+        if prospection_query is None:
+            logging.warning(f"Prospecção {campaign.name} sem prospects elegíveis. Aguardando 1 minuto para tentar novamente...")
+            await pause(campaign.pacing.retry)
+            continue
+
+        try:
+            with stage(campaign, "claim"):
+                prospect = await mongo.find_one_and_update(
+                    campaign.collection,
+                    filter=prospection_query,
+                    update={
+                        "$set": {
+                            "assigned_to": instance_id,
+                            "assigned_at": datetime.now()
+                        }
+                    },
+                    return_document=ReturnDocument.AFTER
+                )
+            if not prospect:
+                logging.info(f"Sem prospecções {campaign.name} para {prospector_name}")
+                outcome(campaign, instance, "empty")
+                for support_number in config.SUPPORT_NUMBERS:
+                    await zapi.send_message(session, support_number, f"Minha lista de prospecção está vazia!")
+
+                return
+
+        except Exception as e:
+            logging.exception(f"Erro ao buscar prospecções para {prospector_name}: {e}")
+            await pause(campaign.pacing.retry)
+            continue
+
+        query = {"_id": prospect["_id"]}
+
+        try:
+            phone = re.sub(r"\D", "", str(prospect["phone"]))
+            with stage(campaign, "phone_check"):
+                whatsapp_number = await zapi.check_phone_exists(session, phone)
+
+            if not whatsapp_number:
+                logging.info(f"Telefone {phone} não possui WhatsApp")
+                outcome(campaign, instance, "no_whatsapp")
+                await writes.update_one(query, {"$set": {"no_whatsapp": True}, **RELEASE})
+                await pause(campaign.pacing.checked)
+                continue
+
+            await pause(campaign.pacing.checked)
+
+            context = ProspectContext(campaign, instance, session, zapi, prospect, phone, whatsapp_number, settings)
+
+            sent = True
+            with stage(campaign, "send"):
+                for step in campaign.steps:
+                    if not await step(context):
+                        sent = False
+                        break
+
+            if sent:
+                outcome(campaign, instance, "sent")
+
+                with stage(campaign, "crm_update"):
+                    for action in campaign.on_sent:
+                        try:
+                            await action(context)
+                        except Exception as e:
+                            logging.exception(f"Erro ao finalizar a prospecção de {phone} com o prospector {prospector_name}: {e}")
+
+                update = {
+                    "$set": {
+                        "phone": context.number,
+                        "prospection_date": datetime.now()
+                    },
+                    **RELEASE
+                }
+                try:
+                    with stage(campaign, "db_write"):
+                        await mongo.update_one(campaign.collection, query=query, update=update)
+                except DatabaseError as e:
+                    # A mensagem já foi enviada: liberar o prospect faria outro vendedor reenviá-la.
+                    logging.error(f"Falha ao registrar a prospecção de {phone}, tentando de novo: {e}")
+                    await confirm_write(writes, query, update, f"prospecção de {phone}")
+
+                logging.info(f"Prospecção de {prospector_name} aguardando 5 minutos...")
+                await pause(campaign.pacing.success)
+
+            else:
+                logging.error(f"Erro ao enviar mensagem para {phone} com o prospector {prospector_name}")
+                outcome(campaign, instance, "send_failure")
+                await writes.update_one(query, RELEASE)
+                logging.info(f"Prospecção de {prospector_name} aguardando 45 a 60 segundos...")
+                await pause(campaign.pacing.failure)
+
+        except SkipProspect as e:
+            logging.info(f"Prospect {prospect.get('phone')} ignorado: {e}")
+            outcome(campaign, instance, "skipped")
+            await writes.update_one(query, RELEASE)
+            await pause(campaign.pacing.checked)
+
+        except Exception as e:
+            prospect_name = prospect.get("name", "Nome desconhecido")
+            logging.exception(f"Erro ao prospectar {prospect_name} com o prospector {prospector_name}: {e}")
+            outcome(campaign, instance, "exception")
+            await writes.update_one(query, RELEASE)
+            logging.info(f"Prospecção de {prospector_name} aguardando 45 a 60 segundos...")
+            await pause(campaign.pacing.failure)
+
+
+async def clear_old_assigned_tasks(campaigns: list[Campaign]):
+    collections = sorted({campaign.collection for campaign in campaigns})
+
+    while True:
+        try:
+            query = {
+                "assigned_to": {
+                    "$exists": True
+                },
+                "assigned_at": {
+                    "$lt": datetime.now() - timedelta(minutes=10)
+                }
+            }
+
+            for collection in collections:
+                result = await mongo.update_many(collection, query, RELEASE)
+
+                if result and result.modified_count:
+                    logging.info(f"Limpeza de tarefas antiga concluída em {collection}.")
+
+        except Exception as e:
+            logging.exception(f"Erro ao limpar tarefas antiga: {e}")
+            await asyncio.sleep(100)
+            continue
+
+        await asyncio.sleep(600)
+
+
+async def run_campaigns(campaigns: list[Campaign]):
+    """
+    Executa as campanhas em um único processo, compartilhando a sessão HTTP e os workers.
+    """
+    membership = WorkerMembership(config.WORKER_ID) if config.WORKER_SHARDING else None
+
+    if config.MONGODB_PROFILE == "default":
+        mongo.use_profile("campaign")
+
+    if config.METRICS_PORT:
+        await serve_metrics(config.METRICS_PORT)
+
+    async with aiohttp.ClientSession() as session:
+        tasks = [clear_old_assigned_tasks(campaigns)]
+
+        for campaign in campaigns:
+            def start(instance: ZapiInstance, campaign: Campaign = campaign):
+                return prospection(campaign, instance, session, f"{campaign.name}:{instance.key}")
+
+            registry = InstanceRegistry(start, slots=campaign.slots, membership=membership, name=campaign.name)
+            tasks.append(registry.run(session))
+
+        if membership:
+            await membership.heartbeat()
+            await membership.refresh()
+            tasks.append(membership.run())
+
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            logging.exception(f"Erro durante a execução das tarefas: {e}")
+        finally:
+            await mongo.flush_buffers()
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+
+import config
+from src.database.mongo import mongo
+from utils.agendor import agendor
+from utils.campaign import Campaign, Pacing, ProspectContext, SkipProspect, pause
+
+ELEGIBLE_CLIENTS_TTL = 300
+
+_elegible_clients = {"ids": [], "loaded_at": float("-inf"), "lock": asyncio.Lock()}
+
+BF_FROZEN_IMAGE = "https://storage.googleapis.com/video-ai-bae31.appspot.com/prospection_BF/bf.jpg"
+BF_FROZEN_MESSAGE = "🔥 Alerta de oportunidade exclusiva para você!\n\nSua chance de explodir as vendas de hortifrúti com artes e vídeos narrados ilimitados e personalizados é AGORA!\n\nUse o cupom BLACK e aproveite 20% de desconto só na Black November! 🚀\n\nA oferta é limitada e só dura até o fim do mês!\n\nClique e garanta seu sucesso 👇\nhttps://payfast.greenn.com.br/68790/offer/n99JgQ?ch_id=5318 🎯"
+
+
+def get_greetings():
+    hour = datetime.now().hour
+
+    if 6 <= hour < 12:
+        return "Bom dia"
+    elif 12 <= hour < 18:
+        return "Boa tarde"
+    else:
+        return "Boa noite"
+
+
+def delay(low: int, high: int):
+    async def step(context: ProspectContext) -> bool:
+        await pause((low, high))
+        return True
+
+    return step
+
+
+# SDR
+async def send_greeting(context: ProspectContext) -> bool:
+    greeting_messages = context.settings.get("greeting_messages", {}).get(context.instance.slot, [])
+    message = random.choice(greeting_messages).format(prospector=context.instance.seller, greeting=get_greetings())
+
+    return await context.zapi.send_message(context.session, context.whatsapp_number, message)
+
+
+async def update_agendor_deal(context: ProspectContext) -> bool:
+    agendor_deal_id = context.prospect.get("agendor_deal_id")
+
+    if not agendor_deal_id:
+        logging.info(f"Agendamento de Prospeção não encontrado para {context.instance.seller}")
+        return False
+
+    await asyncio.to_thread(agendor.update_deal_stage, deal_id=agendor_deal_id, deal_stage=3, funnel_id=752583)
+    logging.info(f"Atualizando o stage do deal {agendor_deal_id}")
+
+    return True
+
+
+# Black Friday
+async def veryfy_elegible_clients():
+    pipeline = [
+        {
+            "$match": {
+                "thumbnail": {"$exists": True}
+            }
+        },
+        {
+            "$group": {
+                "_id": "$client",
+                "count": {"$sum": 1}
+            }
+        },
+        {
+            "$match": {
+                "count": {"$gt": 8}
+            }
+        },
+        {
+            "$project": {"_id": 1}
+        }
+    ]
+    async with _elegible_clients["lock"]:
+        if time.monotonic() - _elegible_clients["loaded_at"] < ELEGIBLE_CLIENTS_TTL:
+            return _elegible_clients["ids"]
+
+        clients_ids = [
+            entry["_id"]
+            async for entry in mongo.iter_aggregate("saved_changes", pipeline, allow_disk_use=True)
+        ]
+
+        _elegible_clients.update(ids=clients_ids, loaded_at=time.monotonic())
+
+    return clients_ids
+
+
+async def elegible_clients_filter():
+    elegible_clients_id = await veryfy_elegible_clients()
+
+    if not elegible_clients_id:
+        return None
+
+    return {"client_id": {"$in": elegible_clients_id}}
+
+
+async def get_image(context: ProspectContext, prospect_client_id, prospect_name: str):
+    from src.helpers.make_template import create_template
+
+    prospect = context.prospect
+    image_url = prospect.get("image", {}).get("url")
+    if not image_url:
+        saved_changes = await mongo.find_one(
+            "saved_changes",
+            {
+                "client": prospect_client_id
+            }
+        )
+        if not saved_changes:
+            logging.error(f"Não foram encontradas mudanças salvas para o cliente {prospect_client_id}.")
+            return None
+        image_thumb = saved_changes.get("thumbnail", "")
+        image_url = saved_changes.get("url") or image_thumb.replace("_500x500.webp", ".png")
+    try:
+        async with context.session.get(image_url) as response:
+            if response.status == 200:
+                logging.info(f"Imagem encontrada no link: {image_url}")
+                return image_url
+            else:
+                logging.info(f"Imagem não encontrada no link: {image_url}")
+                render_template = await create_template(prospect_client_id)
+                trys = 1
+                while trys <= 3:
+                    new_prospect = await mongo.find_one(context.campaign.collection, {"_id": prospect["_id"]})
+                    image_url = new_prospect.get("image", {}).get("url")
+                    if image_url:
+                        logging.info(f"Imagem encontrada após {trys} tentativas: {image_url}")
+                        return image_url
+                    logging.info(f"{context.instance.key} - URL não encontrada, aguardando 10 segundos... {trys}ª tentativa...")
+                    await asyncio.sleep(10)
+                    trys += 1
+                raise Exception(f"Erro ao gerar imagem de {prospect_name}: {render_template}")
+    except Exception as e:
+        logging.error(f"Erro ao validar a imagem no link: {image_url}. Erro: {e}")
+        return None
+
+
+async def load_bf_image(context: ProspectContext) -> bool:
+    logging.info(f"Enviando mensagem para {context.phone} ({context.whatsapp_number})")
+    prospect_client = await mongo.find_one("clients", {"client": context.phone})
+    prospect_client_id = prospect_client["_id"]
+    prospect_name = prospect_client.get("info", {}).get("name", "")
+
+    image_url = await get_image(context, prospect_client_id, prospect_name)
+
+    if not image_url:
+        raise SkipProspect(f"Sem imagem para {context.phone} ({context.whatsapp_number})")
+
+    context.data.update(client_id=prospect_client_id, name=prospect_name, image_url=image_url)
+
+    return True
+
+
+async def send_bf_audio(context: ProspectContext) -> bool:
+    prospector_audio = config.BF_AUDIO[context.instance.seller]
+
+    return await context.zapi.send_audio(context.session, context.whatsapp_number, prospector_audio)
+
+
+async def send_bf_image(context: ProspectContext) -> bool:
+    from src.helpers.auth import create_login_url
+
+    prospect_name = context.data["name"]
+    prospect_link = await create_login_url(context.data["client_id"])
+    prospect_message = f"Olá{f', {prospect_name}' if prospect_name else ''}!\nSegue o link para as artes de divulgação dos seus produtos. 🎨\nDeixamos 10 modelos gratuitos disponíveis exclusivamente para você!\n\n👇 Só clicar no link abaixo e editar com seus produtos e preços: \n{prospect_link}\n\n🛒 Aproveite e destaque seus produtos com facilidade!"
+
+    return await context.zapi.send_image(context.session, context.whatsapp_number, context.data["image_url"], prospect_message)
+
+
+# Black Friday (clientes congelados)
+async def send_bf_frozen_offer(context: ProspectContext) -> bool:
+    return await context.zapi.send_image(context.session, context.whatsapp_number, BF_FROZEN_IMAGE, BF_FROZEN_MESSAGE)
+
+
+SDR = Campaign(
+    name="sdr",
+    collection="sdr_prospecting",
+    seller_field="prospector.phone",
+    seller_key="seller_phone",
+    steps=[send_greeting],
+    on_sent=[update_agendor_deal],
+    quota=300,
+    slots=("secondary",),
+)
+
+BF = Campaign(
+    name="bf",
+    collection="prospecting_BF",
+    seller_field="prospector",
+    seller_key="seller",
+    steps=[load_bf_image, send_bf_audio, delay(7, 13), send_bf_image],
+    prepare=elegible_clients_filter,
+    pacing=Pacing(checked=(3, 6)),
+    slots=("primary", "secondary"),
+)
+
+BF_FROZEN = Campaign(
+    name="bf_frozen",
+    collection="prospecting_BF_frozen",
+    seller_field="prospector",
+    seller_key="seller",
+    steps=[send_bf_frozen_offer],
+    pacing=Pacing(checked=(3, 6)),
+    slots=("primary",),
+)
+
+CAMPAIGNS = {campaign.name: campaign for campaign in (SDR, BF, BF_FROZEN)}
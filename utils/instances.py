@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+import aiohttp
+
+import config
+from src.database.mongo import mongo
+from utils.sharding import WorkerMembership
+from utils.zapi import Zapi
+
+INSTANCES_COLLECTION = "zapi_instances"
+
+
+class ZapiInstance:
+    def __init__(
+        self,
+        seller: str,
+        slot: str,
+        instance: str,
+        token: str,
+        seller_phone: Optional[str] = None,
+        enabled: bool = True,
+        **metadata,
+    ) -> None:
+        self.seller = seller
+        self.slot = slot
+        self.instance = instance
+        self.token = token
+        self.seller_phone = seller_phone
+        self.enabled = enabled
+        self.metadata = metadata
+
+    @classmethod
+    def from_document(cls, document: dict) -> "ZapiInstance":
+        """
+        Levanta ValueError se faltar algum campo obrigatório ou se ele não for texto.
+        """
+        try:
+            instance = cls(**document)
+        except TypeError as e:
+            raise ValueError(str(e)) from e
+
+        for field in ("seller", "slot", "instance", "token"):
+            if not isinstance(getattr(instance, field), str) or not getattr(instance, field):
+                raise ValueError(f"campo {field} inválido: {getattr(instance, field)!r}")
+
+        return instance
+
+    @property
+    def key(self) -> str:
+        return self.instance
+
+    @property
+    def fingerprint(self) -> tuple:
+        """
+        Identifica mudanças que exigem reiniciar a tarefa da instância.
+        """
+        return (self.seller, self.seller_phone, self.slot, self.instance, self.token)
+
+    def zapi(self) -> Zapi:
+        return Zapi(self.instance, self.token, config.ZAPI_CLIENT_TOKEN)
+
+
+def seller_name(seller: dict) -> str:
+    return seller["name"].replace(" - Video AI", "")
+
+
+def credentials_from_env() -> list[dict]:
+    """
+    Converte o dicionário legado config.ZAPI_CREDENTIALS em documentos de instância.
+    """
+    documents = []
+
+    for seller, slots in config.ZAPI_CREDENTIALS.items():
+        for slot, (instance, token) in slots.items():
+            if instance and token:
+                documents.append({"seller": seller, "slot": slot, "instance": instance, "token": token})
+
+    return documents
+
+
+async def import_env_credentials() -> int:
+    """
+    Copia as credenciais ZAPI_* do ambiente para a coleção de instâncias.
+    """
+    documents = credentials_from_env()
+
+    for document in documents:
+        await mongo.update_one(
+            INSTANCES_COLLECTION,
+            query={"instance": document["instance"]},
+            update={"$set": document, "$setOnInsert": {"enabled": True, "created_at": datetime.now()}},
+            upsert=True
+        )
+
+    return len(documents)
+
+
+class InstanceRegistry:
+    """
+    Mantém as tarefas de prospecção sincronizadas com as instâncias cadastradas no MongoDB.
+
+    A cada `refresh_interval` segundos as instâncias são recarregadas, verificadas na
+    Z-API e iniciadas, reiniciadas ou canceladas sem precisar reiniciar o processo.
+    Enquanto a coleção estiver vazia, as credenciais de config.ZAPI_CREDENTIALS são usadas.
+    Com `membership`, apenas as instâncias atribuídas a este worker são executadas; uma
+    mudança no grupo sincroniza na hora (para as instâncias perdidas) e as instâncias
+    ganhas só começam depois de `membership.handoff_delay`.
+    """
+
+    def __init__(
+        self,
+        start: Callable[[ZapiInstance], Awaitable],
+        slots: Iterable[str] = ("primary", "secondary"),
+        refresh_interval: int = 60,
+        collection: str = INSTANCES_COLLECTION,
+        membership: Optional[WorkerMembership] = None,
+        name: str = "prospection",
+    ) -> None:
+        self.start = start
+        self.name = name
+        self.slots = tuple(slots)
+        self.refresh_interval = refresh_interval
+        self.collection = collection
+        self.membership = membership
+        self.instances: dict[str, ZapiInstance] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+
+    async def load(self) -> dict[str, ZapiInstance]:
+        sellers = {seller_name(seller): seller for seller in await mongo.find("sellers", {}) if seller.get("name")}
+
+        documents = await mongo.find(self.collection, {"enabled": {"$ne": False}}, {"_id": 0})
+
+        if not documents:
+            documents = credentials_from_env()
+
+        instances = {}
+        for document in documents:
+            try:
+                instance = ZapiInstance.from_document(document)
+            except ValueError as e:
+                # Um documento inválido não pode derrubar a sincronização das demais instâncias.
+                logging.error(f"Instância ignorada em {self.collection} ({document.get('instance')}): {e}")
+                continue
+
+            if instance.slot not in self.slots:
+                continue
+
+            seller = sellers.get(instance.seller)
+            if not seller:
+                logging.warning(f"Vendedor {instance.seller} não encontrado para a instância {instance.instance}.")
+                continue
+
+            if self.membership and not self.membership.owns(instance.key):
+                continue
+
+            instance.seller_phone = seller.get("phone")
+            instances[instance.key] = instance
+
+        return instances
+
+    async def health_check(self, session: aiohttp.ClientSession, instance: ZapiInstance) -> bool:
+        connected = await instance.zapi().get_instance_status(session)
+
+        await mongo.update_one(
+            self.collection,
+            query={"instance": instance.instance},
+            update={"$set": {"status.connected": connected, "status.checked_at": datetime.now()}}
+        )
+
+        return connected
+
+    def stop(self, key: str) -> None:
+        task = self.tasks.pop(key, None)
+        instance = self.instances.pop(key, None)
+
+        if task and not task.done():
+            task.cancel()
+            logging.info(f"Instância {key} de {instance.seller if instance else 'desconhecido'} removida do agendador.")
+
+    async def sync(self, session: aiohttp.ClientSession) -> None:
+        loaded = await self.load()
+
+        for key in list(self.tasks):
+            instance = loaded.get(key)
+            task = self.tasks[key]
+
+            if instance is None or instance.fingerprint != self.instances[key].fingerprint:
+                self.stop(key)
+
+            elif task.done():
+                # Tarefa que terminou (com erro ou não) é recriada logo abaixo.
+                if not task.cancelled() and task.exception():
+                    logging.error(f"Tarefa da instância {key} finalizada com erro: {task.exception()}")
+                else:
+                    logging.warning(f"Tarefa da instância {key} terminou; reiniciando.")
+
+                self.stop(key)
+
+        handoff = self.membership.handoff_remaining() if self.membership else 0
+        deferred = []
+
+        for key, instance in loaded.items():
+            if key in self.tasks:
+                continue
+
+            if handoff:
+                # O dono anterior pode ainda estar enviando por essa instância.
+                deferred.append(key)
+                continue
+
+            try:
+                connected = await self.health_check(session, instance)
+            except Exception as e:
+                logging.error(f"Erro ao verificar a instância {key} de {instance.seller}: {e}")
+                connected = False
+
+            if not connected:
+                logging.warning(f"Instância {key} de {instance.seller} não conectada. Nova tentativa na próxima sincronização.")
+                continue
+
+            self.instances[key] = instance
+            self.tasks[key] = asyncio.create_task(self.start(instance))
+            logging.info(f"Instância {key} ({instance.slot}) de {instance.seller} adicionada ao agendador.")
+
+        if deferred:
+            logging.info(f"Instâncias {', '.join(deferred)} assumidas por este worker; início em {handoff:.0f}s.")
+
+        if self.membership:
+            self.membership.owned[self.name] = sorted(self.tasks)
+
+    async def wait(self, changed: Optional[asyncio.Event]) -> None:
+        """
+        Até a próxima sincronização: o intervalo normal, o fim da espera de uma
+        troca de dono ou uma mudança no grupo de workers, o que vier primeiro.
+        """
+        timeout = self.refresh_interval
+
+        if self.membership and (handoff := self.membership.handoff_remaining()):
+            timeout = min(timeout, handoff)
+
+        if changed is None:
+            await asyncio.sleep(timeout)
+            return
+
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        changed.clear()
+
+    async def run(self, session: Optional[aiohttp.ClientSession] = None) -> None:
+        if session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self.run(session)
+
+        changed = self.membership.subscribe() if self.membership else None
+
+        while True:
+            try:
+                await self.sync(session)
+            except Exception as e:
+                logging.exception(f"Erro ao sincronizar instâncias {self.name}: {e}")
+
+            await self.wait(changed)
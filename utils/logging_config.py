@@ -1,29 +1,20 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
 
-def setup_logging(log_path: str):
+from src.handlers.log import BufferedFileHandler, JsonFormatter, setup_queue_logging
+
+def setup_logging(log_path: str, json_lines: bool = False):
     os.makedirs(log_path, exist_ok=True)
     log_file = os.path.join(log_path, "card.log")
     
-    class FlushFileHandler(logging.FileHandler):
-        def emit(self, record):
-            super().emit(record)
-            self.flush()
-    
-    file_handler = FlushFileHandler(log_file, encoding="utf-8")
+    file_handler = BufferedFileHandler(log_file, encoding="utf-8")
     console_handler = logging.StreamHandler()
 
     file_handler.setLevel(logging.INFO)
     console_handler.setLevel(logging.INFO)
 
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonFormatter(datefmt="%Y-%m-%d %H:%M:%S") if json_lines else formatter)
     console_handler.setFormatter(formatter)
     
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    logger.handlers = []
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
\ No newline at end of file
+    return setup_queue_logging(file_handler, console_handler)
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.database.mongo import mongo
+
+WORKERS_COLLECTION = "prospection_workers"
+
+
+class WorkerMembership:
+    """
+    Divide as instâncias de prospecção entre vários processos ou máquinas.
+
+    Cada worker grava um heartbeat na coleção `prospection_workers`; os workers com
+    heartbeat mais recente que `ttl` segundos formam o grupo ativo. A posse de cada
+    instância é decidida por rendezvous hashing sobre esse grupo, então quando um
+    worker morre apenas as instâncias dele são redistribuídas entre os demais.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        heartbeat_interval: int = 15,
+        ttl: int = 45,
+        collection: str = WORKERS_COLLECTION,
+        handoff_delay: Optional[int] = None,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.heartbeat_interval = heartbeat_interval
+        self.ttl = ttl
+        self.collection = collection
+        # Quem ganha uma instância espera os outros workers perceberem a mudança e
+        # pararem a deles; por padrão, duas atualizações de membros.
+        self.handoff_delay = handoff_delay if handoff_delay is not None else heartbeat_interval * 2
+        self.members: list[str] = [self.worker_id]
+        self.owned: dict[str, list[str]] = {}
+        self.changed_at = time.monotonic()
+        self._listeners: list[asyncio.Event] = []
+
+    def subscribe(self) -> asyncio.Event:
+        """
+        Evento ativado a cada mudança no grupo; quem escuta limpa o evento depois de tratar.
+        """
+        event = asyncio.Event()
+        self._listeners.append(event)
+
+        return event
+
+    def handoff_remaining(self) -> float:
+        """
+        Segundos até ser seguro iniciar instâncias ganhas na última mudança do grupo.
+        """
+        if len(self.members) == 1:
+            return 0
+
+        return max(0.0, self.changed_at + self.handoff_delay - time.monotonic())
+
+    @staticmethod
+    def _score(member: str, key: str) -> int:
+        return int.from_bytes(hashlib.sha1(f"{member}:{key}".encode()).digest()[:8], "big")
+
+    def owner(self, key: str) -> str:
+        return max(self.members, key=lambda member: self._score(member, key))
+
+    def owns(self, key: str) -> bool:
+        return self.owner(key) == self.worker_id
+
+    async def heartbeat(self) -> None:
+        await mongo.update_one(
+            self.collection,
+            query={"_id": self.worker_id},
+            update={
+                "$set": {
+                    "host": socket.gethostname(),
+                    "pid": os.getpid(),
+                    "heartbeat_at": datetime.now(),
+                    "owned": self.owned
+                }
+            },
+            upsert=True
+        )
+
+    async def refresh(self) -> list[str]:
+        alive_since = datetime.now() - timedelta(seconds=self.ttl)
+        workers = await mongo.find(self.collection, {"heartbeat_at": {"$gte": alive_since}}, {"_id": 1})
+
+        members = sorted({worker["_id"] for worker in workers} | {self.worker_id})
+
+        if members != self.members:
+            joined = set(members) - set(self.members)
+            left = set(self.members) - set(members)
+            logging.info(
+                f"Membros de prospecção atualizados ({len(members)}): entraram {sorted(joined)}, saíram {sorted(left)}."
+            )
+            self.members = members
+            self.changed_at = time.monotonic()
+
+            for event in self._listeners:
+                event.set()
+
+        return self.members
+
+    async def leave(self) -> None:
+        await mongo.delete_one(self.collection, {"_id": self.worker_id})
+
+    async def run(self) -> None:
+        await mongo.get_collection(self.collection).create_index("heartbeat_at", expireAfterSeconds=self.ttl * 20)
+
+        try:
+            while True:
+                try:
+                    await self.heartbeat()
+                    await self.refresh()
+                except Exception as e:
+                    logging.exception(f"Erro ao atualizar membros de prospecção: {e}")
+
+                await asyncio.sleep(self.heartbeat_interval)
+        finally:
+            await self.leave()
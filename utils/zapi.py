@@ -1,17 +1,35 @@
+import functools
 import aiohttp
 import logging
 
+import config
+from src.helpers.metrics import ZAPI_INSTANCE_CONNECTED, ZAPI_REQUEST_SECONDS, timer
+
+
+def instrumented(endpoint: str):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            with timer(ZAPI_REQUEST_SECONDS, f"zapi.{endpoint}", endpoint=endpoint):
+                return await func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 class Zapi:
     def __init__(self, instance_id:str, token: str, client_token: str) -> None:
         self.instance = instance_id
         self.token = token
         self.client_token = client_token
-        self.url = f"https://api.z-api.io/instances/{instance_id}/token/{token}"
+        self.url = f"{config.ZAPI_API_URL}/instances/{instance_id}/token/{token}"
         self.headers = {
             "Content-Type": "application/json",
             "Client-Token": client_token
         }
 
+    @instrumented("status")
     async def get_instance_status(self, session: aiohttp.ClientSession) -> bool:
         url = f"{self.url}/status"
         try:
@@ -19,9 +37,11 @@ class Zapi:
                 data = await response.json()
                 if response.status == 200 and data["connected"]:
                     logging.info(f"Instância ZAPI conectada: {self.instance}")
+                    ZAPI_INSTANCE_CONNECTED.set(1, instance=self.instance)
                     return True
                 
                 else:
+                    ZAPI_INSTANCE_CONNECTED.set(0, instance=self.instance)
                     error_msg = data.get("error", "Erro desconhecido")
                     logging.error(f"instância ZAPI não conectada: {self.instance}: {error_msg}")
                     return False
@@ -30,6 +50,7 @@ class Zapi:
             logging.exception(f"Erro ao checar a instância ZAPI {self.instance}: {e}")
             return False
 
+    @instrumented("phone-exists")
     async def check_phone_exists(self, session: aiohttp.ClientSession, phone: str) -> bool:
         url = f"{self.url}/phone-exists/{phone}"
         try:
@@ -47,6 +68,7 @@ class Zapi:
             logging.exception(f"Erro ao checar o telefone {phone} no ZAPI {self.instance}: {e}")
             return False
     
+    @instrumented("send-text")
     async def send_message(self, session: aiohttp.ClientSession, phone: str, message: str) -> bool:
         url = f"{self.url}/send-text"
         payload = {
@@ -67,6 +89,7 @@ class Zapi:
             logging.exception(f"Error sending message to {phone}: {e}")
             return False
         
+    @instrumented("send-image")
     async def send_image(self, session: aiohttp.ClientSession, phone: str, image_url: str, message: str) -> bool:
         url = f"{self.url}/send-image"
         payload = {
@@ -88,6 +111,7 @@ class Zapi:
             logging.exception(f"Error sending image to {phone}: {e}")
             return False
         
+    @instrumented("send-audio")
     async def send_audio(self, session: aiohttp.ClientSession, phone: str, audio_url: str) -> bool:
         url = f"{self.url}/send-audio"
         payload = {
@@ -108,6 +132,7 @@ class Zapi:
             logging.exception(f"Error sending audio to {phone}: {e}")
             return False
     
+    @instrumented("send-button-list")
     async def send_button_text(self, session: aiohttp.ClientSession, phone: str, message: str, buttons: list) -> bool:
         url = f"{self.url}/send-button-list"
         buttons_data = []